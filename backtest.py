@@ -8,9 +8,16 @@ import pandas as pd
 from datetime import datetime, timedelta
 import json
 
+from backtest_core import CandleArrays
+from candle_file import CandleFile
+from candle_integrity import verify_candles
+from candle_store import CandleStore
+from swing_scanner import SwingZoneScan
+
 class ScalpingBacktest:
     def __init__(self, initial_balance=10000, position_size_pct=0.10):
         self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.candle_store = CandleStore()
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.position_size_pct = position_size_pct
@@ -22,29 +29,31 @@ class ScalpingBacktest:
         self.position = None
         
     def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7):
-        """Fetch historical OHLCV data"""
+        """Fetch historical OHLCV data (only missing ranges hit the exchange)"""
         print(f"Fetching {days} days of {timeframe} data for {symbol}...")
         
         since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
-        all_candles = []
-        
-        while True:
-            candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-            if not candles:
-                break
-            all_candles.extend(candles)
-            since = candles[-1][0] + 1
-            
-            # Break if we've caught up to now
-            if candles[-1][0] >= self.exchange.milliseconds():
-                break
-        
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df = self.candle_store.load(self.exchange, symbol, timeframe, since)
+        df, _ = verify_candles(self.candle_store, self.exchange, symbol, timeframe, df, since=since)
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         
         print(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
         return df
     
+    def load_candle_file(self, path, since=None, until=None):
+        """
+        Load candles from a memory-mapped binary candle file (see candle_file.py)
+
+        Args:
+            path: Candle file directory
+            since: Start time in ms (default: first candle)
+            until: End time in ms (default: after the last candle)
+        """
+        df = CandleFile(path).to_frame(since, until)
+        
+        print(f"Loaded {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
+        return df
+    
     def is_full_bodied_candle(self, row):
         """Check if candle is full-bodied"""
         body = abs(row['close'] - row['open'])
@@ -60,7 +69,7 @@ class ScalpingBacktest:
         return is_bullish, is_bearish, body_ratio
     
     def find_zones(self, df, idx):
-        """Find supply/demand zones up to current index"""
+        """Find supply/demand zones up to current index (per-bar version of SwingZoneScan)"""
         start_idx = max(0, idx - self.lookback)
         window = df.iloc[start_idx:idx]
         
@@ -80,19 +89,19 @@ class ScalpingBacktest:
             'previous_high': previous_high
         }
     
-    def check_sell_setup(self, df, idx, zones):
-        """Check for sell setup at given index"""
+    def check_sell_setup(self, candles, idx, zones):
+        """Check for sell setup at given index of CandleArrays"""
         if idx < 1:
             return False, None
         
-        current = df.iloc[idx]
         previous_low = zones['previous_low']
         
         # Check if closed below previous low
-        if current['close'] >= previous_low:
+        if candles.close[idx] >= previous_low:
             return False, None
         
         # Check if full-bodied bearish
+        current = candles.row(idx)
         is_bullish, is_bearish, body_ratio = self.is_full_bodied_candle(current)
         if not is_bearish:
             return False, None
@@ -107,23 +116,23 @@ class ScalpingBacktest:
             'entry': current['close'],
             'stop_loss': stop_loss,
             'take_profit': take_profit,
-            'timestamp': current['timestamp'],
+            'timestamp': candles.time_at(idx),
             'body_ratio': body_ratio
         }
     
-    def check_buy_setup(self, df, idx, zones):
-        """Check for buy setup at given index"""
+    def check_buy_setup(self, candles, idx, zones):
+        """Check for buy setup at given index of CandleArrays"""
         if idx < 1:
             return False, None
         
-        current = df.iloc[idx]
         previous_high = zones['previous_high']
         
         # Check if closed above previous high
-        if current['close'] <= previous_high:
+        if candles.close[idx] <= previous_high:
             return False, None
         
         # Check if full-bodied bullish
+        current = candles.row(idx)
         is_bullish, is_bearish, body_ratio = self.is_full_bodied_candle(current)
         if not is_bullish:
             return False, None
@@ -138,7 +147,7 @@ class ScalpingBacktest:
             'entry': current['close'],
             'stop_loss': stop_loss,
             'take_profit': take_profit,
-            'timestamp': current['timestamp'],
+            'timestamp': candles.time_at(idx),
             'body_ratio': body_ratio
         }
     
@@ -162,15 +171,11 @@ class ScalpingBacktest:
             'entry_time': setup['timestamp']
         }
     
-    def check_exit(self, current_row):
-        """Check if position should exit"""
+    def check_exit(self, high, low):
+        """Check if position should exit given the candle high/low"""
         if not self.position:
             return False, None, None
         
-        current_price = current_row['close']
-        high = current_row['high']
-        low = current_row['low']
-        
         if self.position['type'] == 'SELL':
             # Check stop loss
             if high >= self.position['stop_loss']:
@@ -232,37 +237,42 @@ class ScalpingBacktest:
         print(f"Initial Balance: ${self.initial_balance:,.2f}")
         print(f"{'='*60}\n")
         
-        for idx in range(self.lookback, len(df)):
-            current_row = df.iloc[idx]
-            
+        # Column arrays once; timestamps are only looked up on events
+        candles = CandleArrays(df)
+        high = candles.high.tolist()
+        low = candles.low.tolist()
+        
+        # Supply/demand levels of every bar in one pass
+        swing_zones = SwingZoneScan(candles.high, candles.low, self.lookback)
+        
+        for idx in range(self.lookback, len(candles)):
             # Check if we should exit existing position
             if self.position:
-                should_exit, exit_price, reason = self.check_exit(current_row)
+                should_exit, exit_price, reason = self.check_exit(high[idx], low[idx])
                 if should_exit:
-                    self.close_position(exit_price, reason, current_row['timestamp'])
-                    print(f"[{current_row['timestamp']}] Closed {self.position['type'] if self.position else 'position'}: {reason} | P&L: ${self.trades[-1]['pnl']:.2f} | Balance: ${self.balance:,.2f}")
+                    self.close_position(exit_price, reason, candles.time_at(idx))
+                    print(f"[{candles.time_at(idx)}] Closed {self.position['type'] if self.position else 'position'}: {reason} | P&L: ${self.trades[-1]['pnl']:.2f} | Balance: ${self.balance:,.2f}")
             
             # Look for new setup if no position
             if not self.position:
-                zones = self.find_zones(df, idx)
+                zones = swing_zones.zones(idx)
                 if zones:
                     # Check sell
-                    sell_signal, sell_setup = self.check_sell_setup(df, idx, zones)
+                    sell_signal, sell_setup = self.check_sell_setup(candles, idx, zones)
                     if sell_signal:
                         self.open_position(sell_setup)
-                        print(f"[{current_row['timestamp']}] Opened SELL @ ${sell_setup['entry']:.2f}")
+                        print(f"[{sell_setup['timestamp']}] Opened SELL @ ${sell_setup['entry']:.2f}")
                         continue
                     
                     # Check buy
-                    buy_signal, buy_setup = self.check_buy_setup(df, idx, zones)
+                    buy_signal, buy_setup = self.check_buy_setup(candles, idx, zones)
                     if buy_signal:
                         self.open_position(buy_setup)
-                        print(f"[{current_row['timestamp']}] Opened BUY @ ${buy_setup['entry']:.2f}")
+                        print(f"[{buy_setup['timestamp']}] Opened BUY @ ${buy_setup['entry']:.2f}")
         
         # Close any remaining position at last price
         if self.position:
-            last_row = df.iloc[-1]
-            self.close_position(last_row['close'], 'Backtest End', last_row['timestamp'])
+            self.close_position(candles.close[-1], 'Backtest End', candles.time_at(-1))
         
         self.print_results()
     
@@ -0,0 +1,694 @@
+"""
+Array-Backed Backtest Core
+Pulls the OHLCV columns out of a candle DataFrame once and runs the
+order fill / exit / entry state machine with array forward searches over
+each day's candles (SessionBars) instead of df.iloc rows.
+
+Range strategies plug into RangeSessionEngine by implementing:
+    start_day(current_date, daily_range)           a new session day begins
+    order_filled(candle_time)                      the pending order traded
+    position_exited(exit_price, reason, candle_time)
+    fvg_detected(idx, fvg_scan, candles)           flat, no pending order, FVG at idx
+    close_position(exit_price, reason, exit_time)  used for the final 'Backtest End' exit
+
+run_sharded() splits the same loop into a parallel per-day phase and a
+sequential compounding pass (see its docstring).
+"""
+
+import contextlib
+import multiprocessing
+import os
+
+import numpy as np
+
+from candle_store import timeframe_to_ms, timestamps_to_ms
+
+
+def limit_order_filled(direction, entry_price, high, low):
+    """Check if a limit order at entry_price trades within a candle"""
+    if direction == 'LONG':
+        # Price must come down to our limit order
+        return low <= entry_price
+
+    # Price must come up to our limit order
+    return high >= entry_price
+
+
+def stop_or_target_hit(direction, stop_loss, take_profit, high, low):
+    """
+    Check a candle against stop loss and take profit (stop loss is checked first)
+
+    Returns:
+        tuple: (exit_price, reason) or (None, None)
+    """
+    if direction == 'LONG':
+        if low <= stop_loss:
+            return stop_loss, 'Stop Loss'
+        if high >= take_profit:
+            return take_profit, 'Take Profit'
+
+    else:  # SHORT
+        if high >= stop_loss:
+            return stop_loss, 'Stop Loss'
+        if low <= take_profit:
+            return take_profit, 'Take Profit'
+
+    return None, None
+
+
+def last_closed_index(base_timestamps, base_timeframe, htf_timestamps, htf_timeframe):
+    """
+    As-of alignment of two candle series
+
+    For every base candle, the position of the last higher-timeframe candle
+    that has fully closed by the time the base candle closes (-1 if none).
+    A higher-timeframe candle that is still forming is never included.
+
+    Args:
+        base_timestamps, htf_timestamps: Candle open times (sorted)
+        base_timeframe, htf_timeframe: ccxt timeframe strings ('5m', '1h', ...)
+
+    Returns:
+        np.ndarray: int64 positions into the higher-timeframe series
+    """
+    base_close = timestamps_to_ms(base_timestamps) + timeframe_to_ms(base_timeframe)
+    htf_close = timestamps_to_ms(htf_timestamps) + timeframe_to_ms(htf_timeframe)
+
+    return np.searchsorted(htf_close, base_close, side='right').astype(np.int64) - 1
+
+
+class TimeframeAlignment:
+    def __init__(self, base_df, base_timeframe, htf_frames):
+        """
+        Map each base candle to the last closed candle of higher timeframes
+
+        Args:
+            base_df: Trading timeframe candles (e.g. 5m)
+            base_timeframe: Timeframe of base_df
+            htf_frames: dict timeframe -> DataFrame (e.g. {'15m': df_15m, '1h': df_1h})
+        """
+        self.base_timeframe = base_timeframe
+        self.index = {
+            timeframe: last_closed_index(base_df['timestamp'], base_timeframe, df['timestamp'], timeframe)
+            for timeframe, df in htf_frames.items()
+        }
+
+    def last_closed(self, timeframe, idx):
+        """Position of the last closed `timeframe` candle at base candle idx (-1 if none)"""
+        return int(self.index[timeframe][idx])
+
+    def broadcast(self, timeframe, values, fill=None):
+        """
+        Spread per-candle higher-timeframe values onto the base candles
+
+        Args:
+            values: One value per higher-timeframe candle
+            fill: Value for base candles with no closed higher-timeframe candle yet
+
+        Returns:
+            np.ndarray: One value per base candle
+        """
+        index = self.index[timeframe]
+        values = np.asarray(values)
+
+        out = np.empty(len(index), dtype=values.dtype if fill is None else object)
+        has_closed = index >= 0
+        out[has_closed] = values[index[has_closed]]
+        out[~has_closed] = fill
+        return out
+
+
+def session_spans(day_keys, in_session, daily_ranges, start_idx=0):
+    """
+    Group the tradable candles into per-day index spans
+
+    Args:
+        day_keys: Per-candle session date
+        in_session: Per-candle mask of the trading window
+        daily_ranges: dict date -> range dict or None
+        start_idx: First candle to consider
+
+    Returns:
+        list: (date, [(start, end), ...]) for every day from start_idx on, in order.
+              Spans are half-open and empty on days without a range.
+    """
+    day_keys = np.asarray(day_keys, dtype=object)[start_idx:]
+    in_session = np.asarray(in_session, dtype=bool)[start_idx:]
+    if len(day_keys) == 0:
+        return []
+
+    day_starts = np.flatnonzero(np.r_[True, day_keys[1:] != day_keys[:-1]])
+    day_ends = np.r_[day_starts[1:], len(day_keys)]
+
+    days = []
+    for day_start, day_end in zip(day_starts, day_ends):
+        current_date = day_keys[day_start]
+        spans = []
+
+        if daily_ranges.get(current_date):
+            # Edges of the runs of in-session candles inside the day
+            edges = np.flatnonzero(np.diff(np.r_[0, in_session[day_start:day_end].astype(np.int8), 0]))
+            for run_start, run_end in zip(edges[::2], edges[1::2]):
+                spans.append((int(start_idx + day_start + run_start), int(start_idx + day_start + run_end)))
+
+        days.append((current_date, spans))
+
+    return days
+
+
+class SessionBars:
+    def __init__(self, high, low, days):
+        """
+        The bars a RangeSessionEngine visits, flattened for forward searches
+
+        Positions below index this flat sequence; bar indices of the full
+        series are in self.index.
+
+        Args:
+            high, low: Per-bar price arrays of the whole series
+            days: session_spans() output
+        """
+        parts = [np.arange(start, end) for _, spans in days for start, end in spans]
+        self.index = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        self.high = np.asarray(high, dtype=np.float64)[self.index]
+        self.low = np.asarray(low, dtype=np.float64)[self.index]
+
+        # Position just past the last visited bar of each position's day
+        self.day_end = np.empty(len(self.index), dtype=np.int64)
+        position = 0
+        for _, spans in days:
+            count = sum(end - start for start, end in spans)
+            self.day_end[position:position + count] = position + count
+            position += count
+
+    def __len__(self):
+        return len(self.index)
+
+    def first_fill(self, position, direction, entry_price):
+        """
+        First later bar of the same day where a limit order placed at
+        `position` trades (pending orders are cancelled at the next day)
+
+        Returns:
+            int: Position of the fill or None
+        """
+        start, end = position + 1, self.day_end[position]
+        if direction == 'LONG':
+            hits = self.low[start:end] <= entry_price
+        else:
+            hits = self.high[start:end] >= entry_price
+
+        if not hits.any():
+            return None
+        return start + int(hits.argmax())
+
+    def first_exit(self, position, direction, stop_loss, take_profit, window=64):
+        """
+        First bar from `position` on (the fill bar included) that touches the
+        stop or the target; the stop wins when one bar touches both
+
+        Searches windows of growing size, so an early exit only touches a
+        few bars.
+
+        Returns:
+            tuple: (position, exit_price, reason) or None if neither is ever hit
+        """
+        start = position
+        while start < len(self.index):
+            end = min(start + window, len(self.index))
+            high, low = self.high[start:end], self.low[start:end]
+            if direction == 'LONG':
+                stopped = low <= stop_loss
+                hits = stopped | (high >= take_profit)
+            else:
+                stopped = high >= stop_loss
+                hits = stopped | (low <= take_profit)
+
+            if hits.any():
+                offset = int(hits.argmax())
+                if stopped[offset]:
+                    return start + offset, stop_loss, 'Stop Loss'
+                return start + offset, take_profit, 'Take Profit'
+
+            start = end
+            window *= 4
+
+        return None
+
+
+class ExcursionPaths:
+    def __init__(self, bars, positions, direction, entry_price):
+        """
+        Price path of every setup's position from its fill bar to the end of
+        that session day
+
+        Per bar the running high (peak) and low (trough) since the fill are
+        kept; the favorable / adverse excursion from entry follows from them
+        (excursions()). Both are monotone, so the first bar a stop or target
+        is touched is the number of bars the path stays clear of it, which
+        resolves any stop / target levels for all setups in one pass.
+
+        Args:
+            bars: SessionBars
+            positions: Order placement position of every setup
+            direction: +1 (LONG) / -1 (SHORT) per setup
+            entry_price: Limit price per setup
+        """
+        self.bars = bars
+        self.direction = np.asarray(direction)
+        self.entry_price = np.asarray(entry_price, dtype=np.float64)
+
+        # Fills don't depend on the stop or target
+        self.fill = np.full(len(self.direction), -1, dtype=np.int64)
+        for c, position in enumerate(np.asarray(positions).tolist()):
+            fill = bars.first_fill(position, 'LONG' if self.direction[c] == 1 else 'SHORT', self.entry_price[c])
+            if fill is not None:
+                self.fill[c] = fill
+        self.filled = self.fill >= 0
+
+        # Path c is self.peak / self.trough[start[c]:start[c] + length[c]]
+        self.length = np.where(self.filled, bars.day_end[self.fill] - self.fill, 0)
+        self.start = np.cumsum(self.length) - self.length
+        self.peak = np.empty(int(self.length.sum()))
+        self.trough = np.empty(len(self.peak))
+
+        for c in np.flatnonzero(self.filled).tolist():
+            path = slice(self.fill[c], self.fill[c] + self.length[c])
+            stored = slice(self.start[c], self.start[c] + self.length[c])
+            np.maximum.accumulate(bars.high[path], out=self.peak[stored])
+            np.minimum.accumulate(bars.low[path], out=self.trough[stored])
+
+    def __len__(self):
+        return len(self.direction)
+
+    def excursions(self, c):
+        """
+        Maximum favorable and adverse excursion from entry at every bar of
+        setup c's path (price units, both >= 0 once filled)
+
+        Returns:
+            tuple: (favorable, adverse) arrays
+        """
+        stored = slice(self.start[c], self.start[c] + self.length[c])
+        entry = self.entry_price[c]
+        if self.direction[c] == 1:
+            return self.peak[stored] - entry, entry - self.trough[stored]
+        return entry - self.trough[stored], self.peak[stored] - entry
+
+    def bars_clear(self, clear):
+        """Count of True values of a flat path mask per setup"""
+        counts = np.r_[0, np.cumsum(clear)]
+        return counts[self.start + self.length] - counts[self.start]
+
+    def resolve(self, stop_loss, take_profit, final_close):
+        """
+        Exit of every setup for per-setup stop / target levels, the same as
+        the engine's bar-by-bar checks (the stop wins a bar touching both)
+
+        A position still open at the end of its path (held past the session
+        day) is followed further with SessionBars.first_exit().
+
+        Args:
+            stop_loss, take_profit: One level per setup
+            final_close: Close price of the last candle ('Backtest End' exit)
+
+        Returns:
+            tuple: exit position (-1 = still open at the end of the data),
+                   exit price and reason per setup (NaN / None when unfilled)
+        """
+        stop_loss = np.asarray(stop_loss, dtype=np.float64)
+        take_profit = np.asarray(take_profit, dtype=np.float64)
+
+        setup = np.repeat(np.arange(len(self)), self.length)
+        longs = (self.direction == 1)[setup]
+        stop, target = stop_loss[setup], take_profit[setup]
+
+        # Bars before the path first touches each level
+        stop_at = self.bars_clear(np.where(longs, self.trough > stop, self.peak < stop))
+        target_at = self.bars_clear(np.where(longs, self.peak < target, self.trough > target))
+
+        stopped = self.filled & (stop_at < self.length) & (stop_at <= target_at)
+        targeted = self.filled & (target_at < self.length) & (target_at < stop_at)
+
+        exit_position = np.full(len(self), -1, dtype=np.int64)
+        exit_price = np.full(len(self), np.nan)
+        reason = np.full(len(self), None, dtype=object)
+
+        exit_position[stopped] = self.fill[stopped] + stop_at[stopped]
+        exit_price[stopped] = stop_loss[stopped]
+        reason[stopped] = 'Stop Loss'
+        exit_position[targeted] = self.fill[targeted] + target_at[targeted]
+        exit_price[targeted] = take_profit[targeted]
+        reason[targeted] = 'Take Profit'
+
+        for c in np.flatnonzero(self.filled & ~stopped & ~targeted).tolist():
+            direction = 'LONG' if self.direction[c] == 1 else 'SHORT'
+            hit = self.bars.first_exit(self.fill[c] + self.length[c], direction, stop_loss[c], take_profit[c])
+            if hit is None:
+                exit_price[c], reason[c] = final_close, 'Backtest End'
+            else:
+                exit_position[c], exit_price[c], reason[c] = hit
+
+        return exit_position, exit_price, reason
+
+
+class OpeningRangeIndex:
+    def __init__(self, df_15m, range_time='09:30'):
+        """
+        Session date -> opening range candle, built once per dataset
+
+        Reusable across runs and parameter sets on the same 15m data.
+
+        Args:
+            df_15m: 15-minute candles with tz-aware local timestamps
+            range_time: HH:MM of the candle that marks the range
+        """
+        hour, minute = (int(part) for part in range_time.split(':'))
+        timestamps = df_15m['timestamp']
+        at_range_time = ((timestamps.dt.hour == hour) & (timestamps.dt.minute == minute)).to_numpy()
+
+        dates = timestamps[at_range_time].dt.date.to_numpy()
+        highs = df_15m['high'].to_numpy()[at_range_time]
+        lows = df_15m['low'].to_numpy()[at_range_time]
+
+        self.ranges = {}
+        for date, high, low in zip(dates, highs, lows):
+            # First candle of the date wins, like the original filter + iloc[0]
+            if date not in self.ranges:
+                self.ranges[date] = (high, low)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def get(self, current_date):
+        """
+        Range of a session date
+
+        Returns:
+            dict: Range high/low or None
+        """
+        levels = self.ranges.get(current_date)
+        if levels is None:
+            return None
+
+        return {
+            'high': levels[0],
+            'low': levels[1],
+            'date': current_date
+        }
+
+
+class CandleArrays:
+    def __init__(self, df):
+        """
+        Contiguous column arrays of a candle DataFrame
+
+        Args:
+            df: DataFrame with timestamp/open/high/low/close/volume columns
+        """
+        self.df = df
+        self.timestamp = df['timestamp']
+        self.open = np.ascontiguousarray(df['open'].to_numpy(dtype=np.float64))
+        self.high = np.ascontiguousarray(df['high'].to_numpy(dtype=np.float64))
+        self.low = np.ascontiguousarray(df['low'].to_numpy(dtype=np.float64))
+        self.close = np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64))
+        self.volume = np.ascontiguousarray(df['volume'].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        return len(self.close)
+
+    def time_at(self, idx):
+        """Timestamp of bar idx (only looked up on events)"""
+        return self.timestamp.iloc[idx]
+
+    def row(self, idx):
+        """Plain dict of bar idx prices"""
+        return {
+            'open': self.open[idx],
+            'high': self.high[idx],
+            'low': self.low[idx],
+            'close': self.close[idx],
+            'volume': self.volume[idx]
+        }
+
+
+# Engine of the running sharded backtest, inherited by the forked pool workers
+worker_engine = None
+worker_collect = ()
+
+
+def init_shard_worker(engine, collect):
+    """Pool initializer: keep the engine the worker was forked with"""
+    global worker_engine, worker_collect
+    worker_engine = engine
+    worker_collect = collect
+
+
+def simulate_shard(days):
+    """Pool task: phase one of a run of consecutive days"""
+    return worker_engine.simulate_chain(days, worker_collect)
+
+
+class RangeSessionEngine:
+    def __init__(self, strategy, candles, day_keys, in_session, daily_ranges, fvg_scan,
+                 max_trades_per_day=1):
+        """
+        Event-driven loop of the range FVG backtests
+
+        Args:
+            strategy: Backtest object implementing the hooks listed above
+            candles: CandleArrays of the trading timeframe
+            day_keys: Per-bar session date
+            in_session: Per-bar mask of the trading window
+            daily_ranges: dict date -> range dict or None
+            fvg_scan: FairValueGapScan of the same candles
+            max_trades_per_day: Closed trades allowed per day
+        """
+        self.strategy = strategy
+        self.candles = candles
+        self.day_keys = day_keys
+        self.in_session = in_session
+        self.daily_ranges = daily_ranges
+        self.fvg_scan = fvg_scan
+        self.max_trades_per_day = max_trades_per_day
+
+        # Balance phase one of run_sharded() sizes positions at
+        self.unit_balance = strategy.balance
+
+    def run_day(self, current_date, spans, on_exit):
+        """
+        Drive the strategy hooks through one session day
+
+        Args:
+            current_date: Session date
+            spans: Half-open index spans of its tradable candles
+            on_exit: Called with (exit_price, reason, candle_time) when the position exits
+
+        Instead of stepping every candle, each state jumps straight to its
+        next event with a forward search over the day's candles: a pending
+        order to its fill, an open position to its stop / target (stop
+        first, the fill candle included), and a flat strategy to the next
+        FVG. Hooks are called on the same candles and in the same order as
+        a candle-by-candle loop.
+        """
+        strategy = self.strategy
+        candles = self.candles
+
+        # New day - reset and mark range
+        daily_range = self.daily_ranges[current_date]
+        trades_today = 0
+        strategy.pending_order = None  # Cancel any pending orders from previous day
+        strategy.start_day(current_date, daily_range)
+
+        # Only in-session candles of days with a range are visited;
+        # the position simply carries over the skipped candles
+        bars = SessionBars(candles.high, candles.low, [(current_date, spans)])
+        setups = np.flatnonzero(self.fvg_scan.signal[bars.index]).tolist()
+
+        # Position of the next candle to check, and of the next FVG among setups
+        position = 0
+        next_setup = 0
+
+        while position < len(bars):
+            # Wait for the pending order to fill (it was placed on the previous candle)
+            order = strategy.pending_order
+            if order:
+                fill = bars.first_fill(position - 1, order['direction'], order['entry_price'])
+                if fill is None:
+                    break
+                position = fill
+                strategy.order_filled(candles.time_at(bars.index[position]))
+
+            # Hold the position until it exits (possibly on a later day)
+            pos = strategy.position
+            if pos:
+                hit = bars.first_exit(position, pos['direction'], pos['stop_loss'], pos['take_profit'])
+                if hit is None:
+                    break
+                position, exit_price, reason = hit
+                on_exit(exit_price, reason, candles.time_at(bars.index[position]))
+                trades_today += 1
+
+            # Look for new FVG setups, from the exit candle on
+            if trades_today >= self.max_trades_per_day:
+                break
+            while next_setup < len(setups) and setups[next_setup] < position:
+                next_setup += 1
+            if next_setup == len(setups):
+                break
+
+            position = setups[next_setup]
+            strategy.fvg_detected(int(bars.index[position]), self.fvg_scan, candles)
+            position += 1
+
+    def run(self, start_idx=3):
+        """Walk the tradable candles and drive the strategy hooks"""
+        strategy = self.strategy
+        candles = self.candles
+
+        for current_date, spans in session_spans(self.day_keys, self.in_session, self.daily_ranges, start_idx):
+            self.run_day(current_date, spans, strategy.position_exited)
+
+        # Close any remaining position
+        if strategy.position:
+            strategy.close_position(candles.close[-1], 'Backtest End', candles.time_at(-1))
+
+    def simulate_day(self, current_date, spans, carried=None, collect=()):
+        """
+        Phase one of a sharded run: one day's fills and exits, sized at the
+        strategy's starting balance and without booking any P&L
+
+        Args:
+            current_date: Session date
+            spans: Half-open index spans of its tradable candles
+            carried: Position still open from the previous day (None = flat)
+            collect: Names of strategy list attributes to gather for the day
+
+        Returns:
+            dict: 'exits' [(position, exit_price, reason, exit_time)], the
+                  'carried' position it started with, the 'position' still open
+                  at the end of the day, plus one list per collected attribute
+        """
+        strategy = self.strategy
+        strategy.balance = self.unit_balance
+        strategy.position = carried
+        for name in collect:
+            setattr(strategy, name, [])
+
+        exits = []
+
+        def record_exit(exit_price, reason, candle_time):
+            exits.append((strategy.position, exit_price, reason, candle_time))
+            strategy.position = None
+
+        self.run_day(current_date, spans, record_exit)
+
+        result = {'exits': exits, 'carried': carried, 'position': strategy.position}
+        for name in collect:
+            result[name] = getattr(strategy, name)
+        return result
+
+    def simulate_chain(self, days, collect=()):
+        """
+        Phase one of consecutive days, carrying open positions from day to day
+
+        Only the first day is assumed to start flat.
+        """
+        results = []
+        carried = None
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for current_date, spans in days:
+                results.append(self.simulate_day(current_date, spans, carried, collect))
+                carried = results[-1]['position']
+
+        return results
+
+    def simulate_days(self, days, workers, collect):
+        """Phase one for every day, across a forked process pool when available"""
+        if workers > 1 and len(days) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # A few consecutive-day chunks per worker keeps the pool busy without much pickling
+            chunk_count = min(len(days), workers * 4)
+            bounds = np.linspace(0, len(days), chunk_count + 1).astype(int)
+            chunks = [days[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+            pool = multiprocessing.get_context('fork').Pool(
+                workers, initializer=init_shard_worker, initargs=(self, collect)
+            )
+            with pool:
+                return [result for chunk in pool.map(simulate_shard, chunks) for result in chunk]
+
+        return self.simulate_chain(days, collect)
+
+    def replay_exit(self, position, exit_price, reason, exit_time, hook=None):
+        """Book a phase-one exit at the current (compounded) balance"""
+        strategy = self.strategy
+        position = dict(position)
+        position['position_size'] *= strategy.balance / self.unit_balance
+        strategy.position = position
+        (hook or strategy.position_exited)(exit_price, reason, exit_time)
+
+    def run_sharded(self, workers=None, collect=(), start_idx=3):
+        """
+        Two-phase run for long backtests
+
+        The strategies reset at every day boundary and only the balance (via
+        position sizing) carries over, so phase one evaluates the days'
+        entries, fills and exits in parallel at the starting balance, in
+        chunks of consecutive days. Phase two books the exits in order,
+        scaling each position by the compounded balance.
+
+        A position still open at a day's end is the one cross-day dependency.
+        Within a chunk it is carried along; a chunk's first day assumes a flat
+        start and is simulated again in this process if a position was in
+        fact still open.
+
+        Trades match run() up to float rounding of the position sizes.
+        Fill / FVG messages are not printed in this mode.
+
+        Args:
+            workers: Processes for phase one (default: CPU count; 1 = no pool)
+            collect: Names of strategy list attributes filled per day (e.g.
+                     'skipped_setups'), concatenated in day order
+            start_idx: First candle to consider
+        """
+        strategy = self.strategy
+        candles = self.candles
+        workers = workers or os.cpu_count() or 1
+
+        days = session_spans(self.day_keys, self.in_session, self.daily_ranges, start_idx)
+        start_balance = strategy.balance
+        self.unit_balance = start_balance
+
+        results = self.simulate_days(days, workers, collect)
+
+        # Phase two: sequential compounding
+        strategy.balance = start_balance
+        collected = {name: [] for name in collect}
+        carried = None
+
+        for (current_date, spans), result in zip(days, results):
+            if result['carried'] != carried:
+                # Phase one assumed a different start (e.g. flat at a chunk boundary)
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    balance = strategy.balance
+                    result = self.simulate_day(current_date, spans, carried, collect)
+                    strategy.balance = balance
+
+            strategy.start_day(current_date, self.daily_ranges[current_date])
+            for position, exit_price, reason, exit_time in result['exits']:
+                self.replay_exit(position, exit_price, reason, exit_time)
+
+            for name in collect:
+                collected[name].extend(result[name])
+            carried = result['position']
+
+        strategy.position = None
+        strategy.pending_order = None
+        for name in collect:
+            setattr(strategy, name, collected[name])
+
+        # Close any remaining position
+        if carried is not None:
+            self.replay_exit(carried, candles.close[-1], 'Backtest End', candles.time_at(-1),
+                             hook=strategy.close_position)
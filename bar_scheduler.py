@@ -0,0 +1,149 @@
+"""
+Bar-Close Scheduler
+Wakes the live bots right after each exchange bar closes instead of after a
+fixed sleep, so decision latency no longer depends on when the bot started.
+
+Bar closes are computed on the exchange clock (local clock + measured offset
+to the server time) plus a short settle delay for the exchange to finalize
+the candle. Session boundaries (market open, range close, entry cutoff,
+market close) fire as one-shot timers.
+"""
+
+import heapq
+import time
+from datetime import datetime, timedelta
+
+from candle_store import timeframe_to_ms
+
+# Session boundaries that wake the bot (SessionCalendar boundary names)
+SESSION_EVENTS = ('market_open', 'range_end', 'entry_cutoff', 'market_close')
+
+
+class BarScheduler:
+    def __init__(self, exchange, timeframe='5m', settle_delay=2.0, calendar=None,
+                 session_events=SESSION_EVENTS, resync_interval=3600):
+        """
+        Initialize scheduler
+
+        Args:
+            exchange: ccxt exchange (fetch_time() for the clock offset)
+            timeframe: Bar timeframe to wake on
+            settle_delay: Seconds after the bar close before waking
+            calendar: SessionCalendar for the session timers (optional)
+            session_events: Boundary names to fire as one-shot timers
+            resync_interval: Seconds between server clock measurements
+        """
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.tf_ms = timeframe_to_ms(timeframe)
+        self.settle_ms = int(settle_delay * 1000)
+        self.calendar = calendar
+        self.session_events = session_events
+        self.resync_interval = resync_interval
+
+        self.offset_ms = 0
+        self.last_sync = None
+
+        # (fire time ms, name) one-shot timers and the (day, name) already queued
+        self.timers = []
+        self.scheduled = set()
+
+        self.next_close = None
+
+    def sync_clock(self):
+        """Measure the offset between the local clock and the exchange server time"""
+        try:
+            sent = time.time()
+            server_ms = self.exchange.fetch_time()
+            received = time.time()
+        except Exception as e:
+            print(f"⚠️ Could not sync exchange clock: {e}")
+            return self.offset_ms
+
+        # Assume the server stamped the reply halfway through the round trip
+        self.offset_ms = int(server_ms - (sent + received) / 2 * 1000)
+        self.last_sync = received
+        return self.offset_ms
+
+    def now_ms(self):
+        """Current exchange time in ms"""
+        if self.last_sync is None or time.time() - self.last_sync > self.resync_interval:
+            self.sync_clock()
+        return int(time.time() * 1000) + self.offset_ms
+
+    def bar_close_after(self, now_ms):
+        """Close time of the bar forming at now_ms"""
+        return (now_ms // self.tf_ms + 1) * self.tf_ms
+
+    def add_timer(self, name, fire_at_ms):
+        """Schedule a one-shot timer"""
+        heapq.heappush(self.timers, (fire_at_ms, name))
+
+    def schedule_session(self, now_ms):
+        """Queue today's and tomorrow's session timers that are still ahead"""
+        if self.calendar is None:
+            return
+
+        today = datetime.fromtimestamp(now_ms / 1000, tz=self.calendar.timezone).date()
+        for day in (today, today + timedelta(days=1)):
+            bounds = self.calendar.boundaries(day)
+            for name in self.session_events:
+                if (day, name) in self.scheduled:
+                    continue
+                self.scheduled.add((day, name))
+                if bounds[name] > now_ms:
+                    self.add_timer(name, bounds[name])
+
+    def next_wake(self, now_ms):
+        """Exchange time (ms) of the next bar close or timer"""
+        if self.next_close is None:
+            self.next_close = self.bar_close_after(now_ms)
+        self.schedule_session(now_ms)
+
+        wake = self.next_close + self.settle_ms
+        if self.timers:
+            wake = min(wake, self.timers[0][0])
+        return wake
+
+    def due_events(self, now_ms, bar_closed=False):
+        """
+        Events that are due at now_ms
+
+        Args:
+            bar_closed: The bar close was already signalled (e.g. by the kline stream)
+
+        Returns:
+            list: 'bar_close' and/or session boundary names
+        """
+        events = []
+
+        # A stream signal before next_close is a late duplicate of a bar already handled
+        if (bar_closed and now_ms >= self.next_close) or now_ms >= self.next_close + self.settle_ms:
+            events.append('bar_close')
+            self.next_close = self.bar_close_after(now_ms)
+
+        while self.timers and self.timers[0][0] <= now_ms:
+            events.append(heapq.heappop(self.timers)[1])
+
+        return events
+
+    def wait(self, wait_fn=None, max_wait=None):
+        """
+        Block until the next bar close or timer
+
+        Args:
+            wait_fn: Called with the seconds to wait instead of time.sleep().
+                     A truthy return means it woke early on a bar close
+                     (e.g. KlineFeed.wait_for_close).
+            max_wait: Longest wait in seconds (None = until the next event)
+
+        Returns:
+            list: Due events (empty if max_wait expired first)
+        """
+        now_ms = self.now_ms()
+        delay = max((self.next_wake(now_ms) - now_ms) / 1000, 0)
+        if max_wait is not None:
+            delay = min(delay, max_wait)
+
+        woke_on_close = (wait_fn or time.sleep)(delay)
+        return self.due_events(self.now_ms(), bar_closed=bool(woke_on_close))
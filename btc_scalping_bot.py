@@ -11,6 +11,10 @@ from datetime import datetime
 import json
 import os
 
+from bar_scheduler import BarScheduler
+from candle_buffer import CandleRingBuffer, refresh_buffer
+from swing_scanner import SwingZoneTracker
+
 class ScalpingBot:
     def __init__(self, symbol='BTC/USDT', timeframe='5m', paper_trading=True):
         """
@@ -46,16 +50,27 @@ class ScalpingBot:
         self.lookback_candles = 20  # Look back for supply/demand zones
         self.min_body_ratio = 0.6  # Minimum body-to-wick ratio for "full-bodied" candle
         
+        # Zones updated one closed candle at a time
+        self.zone_tracker = SwingZoneTracker(self.lookback_candles)
+        self.timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        
+        # Rolling candle buffer, refreshed with delta fetches
+        self.candle_buffer = CandleRingBuffer(timeframe, capacity=100)
+        
+        # Wake right after each exchange bar close
+        self.scheduler = BarScheduler(self.exchange, timeframe)
+        
         # Log file
         self.log_file = '/mnt/user-data/outputs/scalping_bot_log.json'
         
     def get_candles(self, limit=100):
-        """Fetch OHLCV candles from exchange"""
+        """Latest candles from the rolling buffer (after warm-up only new candles are fetched)"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            if self.candle_buffer.capacity < limit:
+                self.candle_buffer = CandleRingBuffer(self.timeframe, capacity=limit)
+            
+            refresh_buffer(self.candle_buffer, self.exchange.fetch_ohlcv, self.symbol, self.exchange.milliseconds())
+            return self.candle_buffer.frame(limit)
         except Exception as e:
             print(f"Error fetching candles: {e}")
             return None
@@ -87,6 +102,9 @@ class ScalpingBot:
         """
         Find supply (resistance) and demand (support) zones
         
+        Recomputes the whole window; the bot itself uses the incremental
+        self.zone_tracker, which gives the same values.
+        
         Returns:
             dict: {'supply': price, 'demand': price}
         """
@@ -114,6 +132,25 @@ class ScalpingBot:
             'previous_high': previous_high
         }
     
+    def update_zone_tracker(self, df):
+        """
+        Feed the candles that closed since the last update into the zone tracker
+        
+        Args:
+            df: Fetched candles (the last one may still be forming)
+            
+        Returns:
+            tuple: (closed candles DataFrame, number of newly closed candles)
+        """
+        now = pd.Timestamp(self.exchange.milliseconds(), unit='ms')
+        closed = df[df['timestamp'] + pd.Timedelta(milliseconds=self.timeframe_ms) <= now]
+        
+        new_candles = 0
+        for timestamp, high, low in zip(closed['timestamp'], closed['high'], closed['low']):
+            new_candles += self.zone_tracker.update(timestamp, high, low)
+        
+        return closed, new_candles
+    
     def check_sell_setup(self, df, zones):
         """
         Check for sell setup:
@@ -347,7 +384,13 @@ class ScalpingBot:
                 
                 # Fetch candles
                 df = self.get_candles()
-                if df is None or len(df) < self.lookback_candles:
+                if df is None:
+                    print("Waiting for data...")
+                    time.sleep(60)
+                    continue
+                
+                closed, new_candles = self.update_zone_tracker(df)
+                if not self.zone_tracker.ready:
                     print("Waiting for data...")
                     time.sleep(60)
                     continue
@@ -364,26 +407,27 @@ class ScalpingBot:
                 else:
                     print(" | No Position")
                     
-                    # Look for new setups
-                    zones = self.find_supply_demand_zones(df)
-                    
-                    # Check for sell setup
-                    sell_signal, sell_setup = self.check_sell_setup(df, zones)
-                    if sell_signal:
-                        self.open_position(sell_setup)
-                    
-                    # Check for buy setup (only if no sell signal)
-                    if not sell_signal:
-                        buy_signal, buy_setup = self.check_buy_setup(df, zones)
-                        if buy_signal:
-                            self.open_position(buy_setup)
+                    # Look for new setups on each newly closed candle
+                    if new_candles:
+                        zones = self.zone_tracker.zones()
+                        
+                        # Check for sell setup
+                        sell_signal, sell_setup = self.check_sell_setup(closed, zones)
+                        if sell_signal:
+                            self.open_position(sell_setup)
+                        
+                        # Check for buy setup (only if no sell signal)
+                        if not sell_signal:
+                            buy_signal, buy_setup = self.check_buy_setup(closed, zones)
+                            if buy_signal:
+                                self.open_position(buy_setup)
                 
                 # Save log periodically
                 if iteration % 10 == 0:
                     self.save_log()
                 
-                # Wait for next candle (5 minutes for 5m timeframe)
-                time.sleep(300)  # 5 minutes
+                # Wait for the next candle to close
+                self.scheduler.wait()
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Bot stopped by user")
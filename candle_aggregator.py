@@ -0,0 +1,114 @@
+"""
+Multi-Timeframe Candle Aggregation
+Builds exchange-aligned higher-timeframe OHLCV (15m, 1h, ...) from a single
+base series (5m or 1m) in one vectorized pass, so every timeframe of a
+backtest comes from the same candles.
+
+Buckets are aligned to UTC epoch multiples of the timeframe, like Binance's
+own 15m/1h/4h candles.
+"""
+
+import numpy as np
+import pandas as pd
+
+from candle_integrity import verify_candles
+from candle_store import OHLCV_COLUMNS, timeframe_to_ms
+
+
+def resample_candles(df, timeframe, base_timeframe, complete_only=True):
+    """
+    Aggregate base candles into a higher timeframe
+
+    Args:
+        df: OHLCV DataFrame with integer ms timestamps, sorted, no duplicates
+        timeframe: Target timeframe ('15m', '1h', ...)
+        base_timeframe: Timeframe of df ('5m', '1m', ...)
+        complete_only: Drop the final bucket while it is still forming (its
+                       last base candle is not in df yet). Buckets with a
+                       missing candle inside are kept and aggregate the
+                       candles that exist, like the exchange's own.
+
+    Returns:
+        DataFrame: OHLCV rows with integer ms timestamps
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    base_ms = timeframe_to_ms(base_timeframe)
+
+    if tf_ms % base_ms != 0:
+        raise ValueError(f"{timeframe} is not a multiple of {base_timeframe}")
+
+    if len(df) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS).astype({'timestamp': 'int64'})
+
+    timestamps = df['timestamp'].to_numpy(dtype=np.int64)
+    buckets = timestamps // tf_ms * tf_ms
+
+    # Start / end of every bucket run
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+
+    result = pd.DataFrame({
+        'timestamp': buckets[starts],
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[ends - 1],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=np.float64), starts)
+    })
+
+    if complete_only and timestamps[-1] + base_ms < buckets[-1] + tf_ms:
+        result = result.iloc[:-1]
+
+    return result.reset_index(drop=True)
+
+
+def derived_series(timeframe, base_timeframe):
+    """Candle store series name of a timeframe derived from base_timeframe"""
+    return f"{timeframe}_from_{base_timeframe}"
+
+
+def load_resampled(store, exchange, symbol, timeframe, since, until=None, base_timeframe='5m', cache=True):
+    """
+    Load higher-timeframe candles aggregated from a cached base series
+
+    Only the base series is ever downloaded. Derived candles are cached in
+    the store under their own series (e.g. '1h_from_5m') once the base
+    series fully covers them.
+
+    Args:
+        store: CandleStore
+        exchange: ccxt exchange used for missing base candles
+        symbol: Trading pair
+        timeframe: Target timeframe
+        since: Start time in ms
+        until: End time in ms (default: open time of the current candle)
+        base_timeframe: Series to aggregate from
+        cache: Store derived candles on disk
+
+    Returns:
+        DataFrame: OHLCV rows with integer ms timestamps
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    since = -(-since // tf_ms) * tf_ms
+    if until is None:
+        until = exchange.milliseconds()
+    until = until // tf_ms * tf_ms
+
+    if not cache:
+        base = store.load(exchange, symbol, base_timeframe, since, until)
+        base, _ = verify_candles(store, exchange, symbol, base_timeframe, base, since, until)
+        return resample_candles(base, timeframe, base_timeframe)
+
+    series = derived_series(timeframe, base_timeframe)
+
+    for start, end in store.missing_ranges(symbol, series, since, until):
+        base = store.load(exchange, symbol, base_timeframe, start, end)
+        base, _ = verify_candles(store, exchange, symbol, base_timeframe, base, start, end)
+        derived = resample_candles(base, timeframe, base_timeframe)
+        store.write(symbol, series, list(derived.itertuples(index=False, name=None)))
+
+        # Only remember ranges the base series has completely
+        if not store.missing_ranges(symbol, base_timeframe, start, end):
+            store.mark_covered(symbol, series, start, end)
+
+    return store.read(symbol, series, since, until)
@@ -0,0 +1,302 @@
+"""
+Rolling Candle Ring Buffer
+Fixed-capacity, preallocated OHLCV arrays per (symbol, timeframe) for the
+live bots. After the first full fetch only candles from the last stored
+timestamp on are fetched; the forming bar is overwritten in place.
+
+Every row is written twice (at i and i + capacity), so the newest N candles
+are always one contiguous slice and can be handed out as numpy views and a
+DataFrame over them without copying. Views are only valid until the next
+update.
+
+LiveCandles keeps one buffer per timeframe for a bot and builds higher
+timeframes (15m, 1h) from the base buffer, so after a one-time backfill
+they cost no extra requests. It updates each buffer at most once per bot
+loop iteration (next_iteration()), so every frame handed out during an
+iteration stays unchanged until the next one.
+"""
+
+import numpy as np
+import pandas as pd
+
+from candle_aggregator import resample_candles
+from candle_store import OHLCV_COLUMNS, timeframe_to_ms
+
+PRICE_COLUMNS = OHLCV_COLUMNS[1:]
+
+
+class CandleRingBuffer:
+    def __init__(self, timeframe, capacity=100):
+        """
+        Initialize an empty buffer
+
+        Args:
+            timeframe: Candle timeframe
+            capacity: Candles kept
+        """
+        self.timeframe = timeframe
+        self.tf_ms = timeframe_to_ms(timeframe)
+        self.capacity = capacity
+
+        self.timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self.columns = {column: np.zeros(2 * capacity, dtype=np.float64) for column in PRICE_COLUMNS}
+
+        # Rows written so far; the newest row sits at slot (written - 1) % capacity
+        self.written = 0
+
+        # Exchange time (ms) of the last refresh
+        self.refreshed_at = None
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    @property
+    def last_timestamp(self):
+        """Open time of the newest candle (None while empty)"""
+        if not self.written:
+            return None
+        return int(self.timestamp[(self.written - 1) % self.capacity])
+
+    def clear(self):
+        """Drop every candle (e.g. after a gap longer than the buffer)"""
+        self.written = 0
+
+    def write_slot(self, slot, candle):
+        """Write one [timestamp, open, high, low, close, volume] row to a slot and its mirror"""
+        for offset in (slot, slot + self.capacity):
+            self.timestamp[offset] = candle[0]
+            for column, value in zip(PRICE_COLUMNS, candle[1:6]):
+                self.columns[column][offset] = value
+
+    def update(self, candles):
+        """
+        Merge fetched candles (oldest first)
+
+        Candles newer than the last one are appended, the last one is
+        overwritten in place, older ones are ignored.
+
+        Returns:
+            int: Number of new candles
+        """
+        added = 0
+        for candle in candles:
+            last = self.last_timestamp
+            if last is not None and candle[0] < last:
+                continue
+
+            if last is not None and candle[0] == last:
+                self.write_slot((self.written - 1) % self.capacity, candle)
+            else:
+                self.write_slot(self.written % self.capacity, candle)
+                self.written += 1
+                added += 1
+
+        return added
+
+    def resume_from(self, now_ms):
+        """
+        Timestamp to resume delta fetching from
+
+        Returns:
+            int: Open time of the newest (forming) candle, or None if the buffer
+                 is empty or too far behind and needs a full reload
+        """
+        last = self.last_timestamp
+        if last is None or now_ms - last >= self.capacity * self.tf_ms:
+            self.clear()
+            return None
+        return last
+
+    def window(self, count=None):
+        """Contiguous slice of the newest `count` candles in the doubled arrays"""
+        size = len(self) if count is None else min(count, len(self))
+        start = (self.written - size) % self.capacity
+        return slice(start, start + size)
+
+    def arrays(self, count=None):
+        """
+        Views of the newest `count` candles (oldest first)
+
+        Returns:
+            dict: timestamp (int64 ms) / open / high / low / close / volume arrays
+        """
+        rows = self.window(count)
+        arrays = {'timestamp': self.timestamp[rows]}
+        arrays.update((column, values[rows]) for column, values in self.columns.items())
+        return arrays
+
+    def frame(self, count=None, timezone=None):
+        """
+        DataFrame over the newest `count` candles
+
+        Price columns are views of the buffer; only the (at most `capacity`)
+        timestamps are converted, to `timezone` when given, else naive UTC.
+
+        The frame is only valid until the buffer's next update(): a new
+        candle can reuse the slot of its oldest row and the forming candle
+        is rewritten in place. Copy it to keep it longer.
+        """
+        arrays = self.arrays(count)
+
+        timestamps = arrays['timestamp'].view('datetime64[ms]')
+        if timezone is not None:
+            timestamps = pd.DatetimeIndex(timestamps).tz_localize('UTC').tz_convert(timezone)
+
+        data = {'timestamp': timestamps}
+        data.update((column, arrays[column]) for column in PRICE_COLUMNS)
+        return pd.DataFrame(data, copy=False)
+
+
+def refresh_buffer(buffer, fetch_ohlcv, symbol, now_ms):
+    """
+    Bring a buffer up to date with one delta fetch
+
+    Args:
+        buffer: CandleRingBuffer
+        fetch_ohlcv: exchange.fetch_ohlcv or a compatible callable
+        symbol: Trading pair
+        now_ms: Current exchange time in ms
+
+    Returns:
+        int: Number of new candles
+    """
+    since = buffer.resume_from(now_ms)
+    if since is None:
+        candles = fetch_ohlcv(symbol, buffer.timeframe, limit=buffer.capacity)
+    else:
+        # The forming candle and everything after it
+        candles = fetch_ohlcv(symbol, buffer.timeframe, since=since)
+
+    buffer.refreshed_at = now_ms
+    return buffer.update(candles)
+
+
+def roll_up_buffer(buffer, base, fetch_ohlcv, symbol, now_ms):
+    """
+    Bring a higher-timeframe buffer up to date from a base-timeframe buffer
+
+    The forming bar and any newer ones are rebuilt from the base candles.
+    Only when the base buffer does not reach back to the forming bar (first
+    call, or after falling behind) are candles fetched instead.
+
+    Args:
+        buffer: CandleRingBuffer of the higher timeframe
+        base: Up-to-date CandleRingBuffer of the base timeframe
+        fetch_ohlcv: exchange.fetch_ohlcv for the backfill
+        symbol: Trading pair
+        now_ms: Current exchange time in ms
+
+    Returns:
+        int: Number of new candles
+    """
+    since = buffer.resume_from(now_ms)
+    arrays = base.arrays()
+    if since is None or not len(base) or arrays['timestamp'][0] > since:
+        return refresh_buffer(buffer, fetch_ohlcv, symbol, now_ms)
+
+    start = int(np.searchsorted(arrays['timestamp'], since))
+    rows = pd.DataFrame({column: values[start:] for column, values in arrays.items()}, copy=False)
+    candles = resample_candles(rows, buffer.timeframe, base.timeframe, complete_only=False)
+
+    buffer.refreshed_at = now_ms
+    return buffer.update(candles.itertuples(index=False, name=None))
+
+
+class LiveCandles:
+    def __init__(self, exchange, symbol, base_timeframe='5m', derived_timeframes=(), feed=None, capacity=100):
+        """
+        Rolling candles of one symbol for a live bot
+
+        Args:
+            exchange: ccxt exchange for REST fetches and the clock
+            symbol: Trading pair
+            base_timeframe: Timeframe fetched (or streamed) continuously
+            derived_timeframes: Timeframes built locally from the base candles
+                                (ones that are not a multiple of it are fetched)
+            feed: KlineFeed serving the timeframes it streams (optional)
+            capacity: Minimum candles kept per timeframe
+        """
+        self.exchange = exchange
+        self.symbol = symbol
+        self.base_timeframe = base_timeframe
+        self.feed = feed
+        self.capacity = capacity
+        self.buffers = {}
+
+        # Timeframes already updated in the current bot loop iteration
+        self.refreshed = set()
+
+        base_ms = timeframe_to_ms(base_timeframe)
+        self.derived_timeframes = [
+            timeframe for timeframe in derived_timeframes
+            if timeframe != base_timeframe and timeframe_to_ms(timeframe) % base_ms == 0
+        ]
+
+    def buffer(self, timeframe, limit=None):
+        """Buffer of a timeframe, created (or grown) to hold `limit` candles"""
+        buffer = self.buffers.get(timeframe)
+        if buffer is None or (limit and buffer.capacity < limit):
+            buffer = CandleRingBuffer(timeframe, capacity=max(limit or 0, self.capacity))
+            self.buffers[timeframe] = buffer
+            self.refreshed.discard(timeframe)
+        return buffer
+
+    def fetcher(self, timeframe):
+        """fetch_ohlcv of the feed if it streams the timeframe, else of the exchange"""
+        if self.feed and self.feed.has(timeframe):
+            return self.feed.fetch_ohlcv
+        return self.exchange.fetch_ohlcv
+
+    def next_iteration(self):
+        """
+        Start a new bot loop iteration (call at the top of the loop)
+
+        Frames handed out during the previous iteration may change from
+        here on.
+        """
+        self.refreshed.clear()
+
+    def refresh(self, timeframe, limit=None):
+        """
+        Update one timeframe, at most once per loop iteration
+
+        A derived timeframe refreshes the base buffer first, unless that
+        already happened in this iteration. Skipping repeat updates keeps
+        the frames already handed out (e.g. the 5m frame while the 1h one
+        is requested after a 5m boundary passed) from changing under the
+        caller.
+
+        Returns:
+            CandleRingBuffer
+        """
+        buffer = self.buffer(timeframe, limit)
+        if timeframe in self.refreshed:
+            return buffer
+
+        now_ms = self.exchange.milliseconds()
+
+        if timeframe not in self.derived_timeframes:
+            refresh_buffer(buffer, self.fetcher(timeframe), self.symbol, now_ms)
+            self.refreshed.add(timeframe)
+            return buffer
+
+        base = self.buffer(self.base_timeframe)
+        if self.base_timeframe not in self.refreshed:
+            refresh_buffer(base, self.fetcher(self.base_timeframe), self.symbol, now_ms)
+            self.refreshed.add(self.base_timeframe)
+
+        roll_up_buffer(buffer, base, self.exchange.fetch_ohlcv, self.symbol, now_ms)
+        self.refreshed.add(timeframe)
+        return buffer
+
+    def backfill(self):
+        """Load the history of every derived timeframe once (call at startup)"""
+        for timeframe in self.derived_timeframes:
+            self.refresh(timeframe)
+
+    def frame(self, timeframe, limit=100, timezone=None):
+        """
+        Latest `limit` candles of a timeframe as a DataFrame (see
+        CandleRingBuffer.frame), valid until the next iteration
+        """
+        return self.refresh(timeframe, limit).frame(limit, timezone=timezone)
@@ -0,0 +1,226 @@
+"""
+Concurrent Historical Candle Downloader
+Fetches several timeframes and several non-overlapping time windows at once
+with the async ccxt client, under one shared rate-limit budget, then stitches
+and deduplicates the pages.
+
+Any object with an async fetch_ohlcv(symbol, timeframe, since, limit) can be
+passed as the exchange, so a local fake exchange works for testing.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import ccxt.async_support as ccxt_async
+
+from candle_store import DAY_MS, timeframe_to_ms
+
+
+def stitch_candles(pages):
+    """
+    Merge candle pages into one sorted list without duplicate timestamps
+
+    Args:
+        pages: Iterable of [timestamp, open, high, low, close, volume] lists
+
+    Returns:
+        list: Candles sorted by timestamp (later pages win on duplicates)
+    """
+    by_time = {}
+    for page in pages:
+        for candle in page:
+            by_time[candle[0]] = candle
+
+    return [by_time[timestamp] for timestamp in sorted(by_time)]
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second, max_concurrent):
+        """
+        Shared request budget for every concurrent fetch
+
+        Args:
+            requests_per_second: Request starts allowed per second
+            max_concurrent: Requests allowed in flight at once
+        """
+        self.interval = 1.0 / requests_per_second
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+
+        # Hand out evenly spaced start slots
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+class CandleDownloader:
+    def __init__(self, exchange_id='binance', exchange=None, window_days=7, max_concurrent=6,
+                 requests_per_second=None, page_limit=1000, retries=3):
+        """
+        Initialize downloader
+
+        Args:
+            exchange_id: ccxt exchange id used when no exchange is given
+            exchange: Async exchange object to use instead (not closed by the downloader)
+            window_days: Size of the time windows fetched in parallel
+            max_concurrent: Requests in flight at once
+            requests_per_second: Shared request budget (default: the exchange's rateLimit)
+            page_limit: Candles per request
+            retries: Attempts per request before a window is given up
+        """
+        self.exchange_id = exchange_id
+        self.exchange = exchange
+        self.window_days = window_days
+        self.max_concurrent = max_concurrent
+        self.requests_per_second = requests_per_second
+        self.page_limit = page_limit
+        self.retries = retries
+
+    def create_exchange(self):
+        """
+        Exchange to download with
+
+        Returns:
+            tuple: (exchange, owned) - owned exchanges are closed after use
+        """
+        if self.exchange is not None:
+            return self.exchange, False
+
+        # The shared RateLimiter enforces the exchange's rateLimit across all windows
+        exchange_class = getattr(ccxt_async, self.exchange_id)
+        return exchange_class({'enableRateLimit': False}), True
+
+    def split_windows(self, since, until, timeframe):
+        """Split [since, until) into candle-aligned windows of about window_days"""
+        tf_ms = timeframe_to_ms(timeframe)
+        window_ms = max(self.window_days * DAY_MS // tf_ms, 1) * tf_ms
+
+        windows = []
+        start = since
+        while start < until:
+            end = min(start + window_ms, until)
+            windows.append((start, end))
+            start = end
+
+        return windows
+
+    async def fetch_window(self, exchange, limiter, symbol, timeframe, start, end):
+        """
+        Page through one window serially
+
+        Returns:
+            tuple: (candles, complete) - complete is False if a request kept failing
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        candles = []
+        since = start
+
+        while since < end:
+            page = None
+            for attempt in range(self.retries):
+                try:
+                    async with limiter:
+                        page = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.page_limit)
+                    break
+                except Exception as e:
+                    print(f"⚠️ {symbol} {timeframe} request failed ({attempt + 1}/{self.retries}): {e}")
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+
+            if page is None:
+                return candles, False
+
+            if not page:
+                break
+
+            candles.extend(c for c in page if c[0] < end)
+
+            if page[-1][0] + tf_ms >= end:
+                break
+
+            since = page[-1][0] + 1
+
+        return candles, True
+
+    async def fetch_ranges(self, symbol, ranges):
+        """
+        Download [start, end) ranges of several timeframes concurrently
+
+        Args:
+            symbol: Trading pair
+            ranges: List of (timeframe, start, end) in ms
+
+        Returns:
+            list: (timeframe, start, end, candles, complete) per downloaded window
+        """
+        exchange, owned = self.create_exchange()
+        requests_per_second = self.requests_per_second or 1000 / getattr(exchange, 'rateLimit', 50)
+        limiter = RateLimiter(requests_per_second, self.max_concurrent)
+
+        jobs = [
+            (timeframe, window_start, window_end)
+            for timeframe, start, end in ranges
+            for window_start, window_end in self.split_windows(start, end, timeframe)
+        ]
+
+        try:
+            results = await asyncio.gather(*(
+                self.fetch_window(exchange, limiter, symbol, timeframe, start, end)
+                for timeframe, start, end in jobs
+            ))
+        finally:
+            if owned:
+                await exchange.close()
+
+        return [job + result for job, result in zip(jobs, results)]
+
+    def fetch(self, symbol, ranges):
+        """Blocking wrapper around fetch_ranges()"""
+        return asyncio.run(self.fetch_ranges(symbol, ranges))
+
+    def download(self, symbol, timeframes, since, until=None):
+        """
+        Download closed candles of several timeframes for [since, until)
+
+        Args:
+            symbol: Trading pair
+            timeframes: List of timeframes ('5m', '15m', '1h', ...)
+            since: Start time in ms
+            until: End time in ms (default: now)
+
+        Returns:
+            dict: timeframe -> stitched candle list
+        """
+        if until is None:
+            until = int(time.time() * 1000)
+
+        ranges = []
+        for timeframe in timeframes:
+            tf_ms = timeframe_to_ms(timeframe)
+            ranges.append((timeframe, -(-since // tf_ms) * tf_ms, until // tf_ms * tf_ms))
+
+        started = time.monotonic()
+        windows = self.fetch(symbol, ranges)
+
+        candles = {
+            timeframe: stitch_candles(window[3] for window in windows if window[0] == timeframe)
+            for timeframe in timeframes
+        }
+
+        print(f"Downloaded {symbol} {', '.join(f'{tf}: {len(c)}' for tf, c in candles.items())} candles "
+              f"from {datetime.fromtimestamp(since / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} UTC "
+              f"in {time.monotonic() - started:.1f}s")
+        return candles
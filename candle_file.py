@@ -0,0 +1,152 @@
+"""
+Memory-Mapped Binary Candle Files
+Compact columnar on-disk format for multi-year candle datasets.
+
+Layout:
+    <path>/meta.json                 symbol, timeframe, price dtype, row count
+    <path>/timestamp.npy             int64 epoch ms (sorted, unique)
+    <path>/open.npy ... volume.npy   float64 (or float32) columns
+
+Columns are opened with numpy memory-mapping: opening a file is near-instant,
+pages are only read from disk when touched, and time slices are views into
+the mapping instead of copies.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from candle_store import OHLCV_COLUMNS
+
+PRICE_COLUMNS = OHLCV_COLUMNS[1:]
+PRICE_DTYPES = ('float64', 'float32')
+
+
+def write_candle_file(path, df, symbol=None, timeframe=None, price_dtype='float64'):
+    """
+    Write candles to a binary candle file (replaces an existing one)
+
+    Args:
+        path: Directory of the candle file
+        df: OHLCV DataFrame with integer ms timestamps
+        symbol: Trading pair stored in the metadata
+        timeframe: Candle timeframe stored in the metadata
+        price_dtype: 'float64', or 'float32' to halve the file size
+
+    Returns:
+        int: Number of candles written
+    """
+    if price_dtype not in PRICE_DTYPES:
+        raise ValueError(f"price_dtype must be one of {PRICE_DTYPES}, got {price_dtype}")
+
+    df = df.drop_duplicates(subset='timestamp', keep='last').sort_values('timestamp')
+
+    # Write next to the target and swap it in, so readers never see a partial file
+    tmp_path = path.rstrip(os.sep) + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, 'timestamp.npy'), df['timestamp'].to_numpy(dtype=np.int64))
+    for column in PRICE_COLUMNS:
+        np.save(os.path.join(tmp_path, f"{column}.npy"), df[column].to_numpy(dtype=price_dtype))
+
+    meta = {
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'price_dtype': price_dtype,
+        'rows': len(df)
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+    return len(df)
+
+
+def export_store_series(store, symbol, timeframe, since, until, path, price_dtype='float64'):
+    """
+    Write the cached candles of a CandleStore series to a binary candle file
+
+    Returns:
+        int: Number of candles written
+    """
+    df = store.read(symbol, timeframe, since, until)
+    count = write_candle_file(path, df, symbol=symbol, timeframe=timeframe, price_dtype=price_dtype)
+    print(f"💾 Wrote {count} {symbol} {timeframe} candles to {path}")
+    return count
+
+
+class CandleFile:
+    def __init__(self, path):
+        """
+        Open a binary candle file (nothing is read until a column is touched)
+
+        Args:
+            path: Directory written by write_candle_file()
+        """
+        self.path = path
+
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+
+        self.symbol = self.meta['symbol']
+        self.timeframe = self.meta['timeframe']
+        self.timestamp = np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r')
+        self.columns = {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')
+            for column in PRICE_COLUMNS
+        }
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def bounds(self, since=None, until=None):
+        """Row slice of since <= timestamp < until (binary search, no scan)"""
+        start = 0 if since is None else int(np.searchsorted(self.timestamp, since, side='left'))
+        end = len(self) if until is None else int(np.searchsorted(self.timestamp, until, side='left'))
+        return slice(start, max(start, end))
+
+    def arrays(self, since=None, until=None):
+        """
+        Zero-copy column views for since <= timestamp < until
+
+        Returns:
+            dict: column -> read-only memory-mapped array
+        """
+        rows = self.bounds(since, until)
+        arrays = {'timestamp': self.timestamp[rows]}
+        arrays.update((column, values[rows]) for column, values in self.columns.items())
+        return arrays
+
+    def to_frame(self, since=None, until=None, timezone=None):
+        """
+        DataFrame over the mapped columns
+
+        Price columns are not copied. Timestamps stay naive UTC views, or are
+        converted to `timezone` in one vectorized pass when one is given.
+
+        Args:
+            since: Start time in ms (inclusive)
+            until: End time in ms (exclusive)
+            timezone: tz name or tzinfo for tz-aware local timestamps
+
+        Returns:
+            DataFrame: OHLCV candles
+        """
+        arrays = self.arrays(since, until)
+
+        timestamps = arrays['timestamp'].view('datetime64[ms]')
+        if timezone is not None:
+            # Localizing to UTC copies the int64 column once; tz_convert only relabels it
+            timestamps = pd.DatetimeIndex(timestamps, copy=False).tz_localize('UTC').tz_convert(timezone)
+
+        data = {'timestamp': timestamps}
+        data.update((column, arrays[column]) for column in PRICE_COLUMNS)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,221 @@
+"""
+Candle Integrity Scanner
+Vectorized checks of a candle series for missing bars, duplicate or
+misaligned timestamps, out-of-order rows and zero-range bars, plus a
+targeted re-fetch of only the broken spans.
+
+A silent gap changes which three candles the FVG detection sees, so the
+backtests run this on every load (well under 0.1s for years of 1m candles).
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from candle_store import merge_intervals, timeframe_to_ms
+
+
+class IntegrityReport:
+    def __init__(self, timeframe, gaps, duplicates, out_of_order, misaligned, zero_range):
+        """
+        Result of scan_candles()
+
+        Args:
+            timeframe: Candle timeframe
+            gaps: [start, end) ms ranges with no candle
+            duplicates: Timestamps (ms) that appear more than once
+            out_of_order: Row positions whose timestamp is not after the previous row
+            misaligned: Timestamps (ms) not on a timeframe boundary
+            zero_range: Timestamps (ms) of bars with high == low
+        """
+        self.timeframe = timeframe
+        self.gaps = gaps
+        self.duplicates = duplicates
+        self.out_of_order = out_of_order
+        self.misaligned = misaligned
+        self.zero_range = zero_range
+
+    @property
+    def missing_candles(self):
+        """Number of candles missing in the gaps"""
+        tf_ms = timeframe_to_ms(self.timeframe)
+        return sum((end - start) // tf_ms for start, end in self.gaps)
+
+    @property
+    def ok(self):
+        """True when nothing needs to be re-fetched (zero-range bars are only reported)"""
+        return not (self.gaps or len(self.duplicates) or len(self.out_of_order) or len(self.misaligned))
+
+    def repair_spans(self):
+        """
+        [start, end) ms ranges to download again
+
+        Gaps, plus the candle slot of every duplicate timestamp (rewriting a
+        slot also deduplicates its day partition in the store).
+        """
+        tf_ms = timeframe_to_ms(self.timeframe)
+        spans = [list(gap) for gap in self.gaps]
+
+        for timestamp in self.duplicates.tolist():
+            slot = timestamp // tf_ms * tf_ms
+            spans.append([slot, slot + tf_ms])
+
+        return merge_intervals(spans)
+
+    def summary(self):
+        """One line per problem type"""
+        if self.ok and not len(self.zero_range):
+            return f"✅ {self.timeframe} candles OK"
+
+        lines = []
+        if self.gaps:
+            largest = max(self.gaps, key=lambda gap: gap[1] - gap[0])
+            lines.append(f"⚠️ {len(self.gaps)} gap(s), {self.missing_candles} missing {self.timeframe} candle(s) "
+                         f"(largest from {datetime.fromtimestamp(largest[0] / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} UTC)")
+        if len(self.duplicates):
+            lines.append(f"⚠️ {len(self.duplicates)} duplicate timestamp(s)")
+        if len(self.out_of_order):
+            lines.append(f"⚠️ {len(self.out_of_order)} out-of-order row(s)")
+        if len(self.misaligned):
+            lines.append(f"⚠️ {len(self.misaligned)} timestamp(s) not on a {self.timeframe} boundary")
+        if len(self.zero_range):
+            lines.append(f"ℹ️ {len(self.zero_range)} zero-range bar(s) (high == low)")
+        return '\n'.join(lines)
+
+
+def scan_candles(timestamps, timeframe, high=None, low=None, since=None, until=None):
+    """
+    Check a candle series in a few vectorized passes
+
+    Args:
+        timestamps: Candle open times in ms, in stored order
+        timeframe: Candle timeframe
+        high, low: Price columns for the zero-range check (optional)
+        since, until: Expected [since, until) coverage, so missing candles
+                      before the first / after the last one count as gaps
+
+    Returns:
+        IntegrityReport
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+
+    steps = np.diff(timestamps)
+    out_of_order = np.flatnonzero(steps < 0) + 1
+
+    ordered = np.sort(timestamps) if len(out_of_order) else timestamps
+    repeated = np.diff(ordered) == 0
+    duplicates = np.unique(ordered[1:][repeated])
+
+    misaligned = np.unique(timestamps[timestamps % tf_ms != 0])
+
+    # Gaps between consecutive aligned candle slots (sorted; repeats don't matter)
+    slots = ordered // tf_ms * tf_ms
+    if since is not None:
+        since = -(-since // tf_ms) * tf_ms
+    if until is not None:
+        until = until // tf_ms * tf_ms
+
+    if len(slots):
+        expected = slots
+        if since is not None and since < slots[0]:
+            expected = np.r_[since - tf_ms, expected]
+        if until is not None and until > slots[-1] + tf_ms:
+            expected = np.r_[expected, until]
+        jumps = np.flatnonzero(np.diff(expected) > tf_ms)
+        gaps = [[int(expected[i]) + tf_ms, int(expected[i + 1])] for i in jumps]
+    elif since is not None and until is not None and since < until:
+        gaps = [[since, until]]
+    else:
+        gaps = []
+
+    zero_range = np.empty(0, dtype=np.int64)
+    if high is not None and low is not None:
+        zero_range = timestamps[np.asarray(high, dtype=np.float64) == np.asarray(low, dtype=np.float64)]
+
+    return IntegrityReport(timeframe, gaps, duplicates, out_of_order, misaligned, zero_range)
+
+
+def load_known_gaps(store, symbol, timeframe):
+    """Gaps that were re-fetched before and are missing on the exchange too"""
+    path = os.path.join(store.series_dir(symbol, timeframe), 'known_gaps.json')
+    if not os.path.exists(path):
+        return []
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_known_gaps(store, symbol, timeframe, gaps):
+    """Remember unfillable gaps so they are not re-fetched on every load"""
+    series_dir = store.series_dir(symbol, timeframe)
+    os.makedirs(series_dir, exist_ok=True)
+
+    with open(os.path.join(series_dir, 'known_gaps.json'), 'w') as f:
+        json.dump(merge_intervals(gaps), f)
+
+
+def verify_candles(store, exchange, symbol, timeframe, df, since=None, until=None, repair=True):
+    """
+    Scan a loaded store series and re-fetch only the broken spans
+
+    Args:
+        store: CandleStore the candles came from
+        exchange: ccxt exchange used for the re-fetch
+        symbol: Trading pair
+        timeframe: Candle timeframe
+        df: OHLCV DataFrame with integer ms timestamps
+        since, until: Range df was loaded for (gaps at the edges count too)
+        repair: Re-fetch broken spans and re-read the series
+
+    Returns:
+        tuple: (df, IntegrityReport) - the repaired series and its final report
+    """
+    report = scan_candles(df['timestamp'], timeframe, df['high'], df['low'], since, until)
+    known_gaps = load_known_gaps(store, symbol, timeframe)
+    report.gaps = [
+        gap for gap in report.gaps
+        if not any(start <= gap[0] and gap[1] <= end for start, end in known_gaps)
+    ]
+
+    if report.ok or not repair:
+        if not report.ok or len(report.zero_range):
+            print(report.summary())
+        return df, report
+
+    print(report.summary())
+    spans = report.repair_spans()
+    print(f"🔧 Re-fetching {len(spans)} broken {symbol} {timeframe} span(s)...")
+
+    completed = []
+    for start, end in spans:
+        candles, complete = store.fetch_range(exchange, symbol, timeframe, start, end)
+        store.write(symbol, timeframe, candles)
+        if complete:
+            completed.append([start, end])
+
+    read_since = since if since is not None else int(df['timestamp'].min())
+    read_until = until if until is not None else int(df['timestamp'].max()) + timeframe_to_ms(timeframe)
+    df = store.read(symbol, timeframe, read_since, read_until)
+
+    # Off-grid rows cannot be fixed by downloading again - drop them, from the store too
+    off_grid = df['timestamp'] % timeframe_to_ms(timeframe) != 0
+    if off_grid.any():
+        store.remove(symbol, timeframe, df.loc[off_grid, 'timestamp'])
+        df = df[~off_grid].reset_index(drop=True)
+
+    report = scan_candles(df['timestamp'], timeframe, df['high'], df['low'], since, until)
+
+    # Exchange outages - nothing more to download, don't ask again. Gaps of a
+    # span whose re-fetch failed are retried on the next load instead.
+    outages = [
+        gap for gap in report.gaps
+        if any(start <= gap[0] and gap[1] <= end for start, end in completed)
+    ]
+    if outages:
+        save_known_gaps(store, symbol, timeframe, known_gaps + outages)
+    if not report.ok:
+        print(f"{report.summary()}\n   (left as-is after re-fetch)")
+    return df, report
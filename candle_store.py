@@ -0,0 +1,289 @@
+"""
+Local OHLCV Candle Store
+Caches exchange candles on disk so backtests only download what they have not seen yet.
+
+Layout:
+    <root_dir>/<SYMBOL>/<timeframe>/<YYYY-MM-DD>.csv   one file per UTC day
+    <root_dir>/<SYMBOL>/<timeframe>/coverage.json      time ranges already downloaded
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import ccxt
+import pandas as pd
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def timeframe_to_ms(timeframe):
+    """Convert a ccxt timeframe string ('5m', '1h', ...) to milliseconds"""
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+def timestamps_to_ms(timestamps):
+    """Epoch milliseconds of a (tz-aware or naive UTC) timestamp Series"""
+    return pd.DatetimeIndex(timestamps).as_unit('ms').asi8
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching [start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class CandleStore:
+    def __init__(self, root_dir='data/candles', request_pause=0.5):
+        """
+        Initialize candle store
+
+        Args:
+            root_dir: Directory holding the cached candles
+            request_pause: Seconds to wait between paged exchange requests
+        """
+        self.root_dir = root_dir
+        self.request_pause = request_pause
+
+    def series_dir(self, symbol, timeframe):
+        """Directory for one symbol/timeframe series"""
+        return os.path.join(self.root_dir, symbol.replace('/', '_'), timeframe)
+
+    def partition_path(self, symbol, timeframe, day_start_ms):
+        """Path of the day file starting at day_start_ms (UTC midnight)"""
+        day = datetime.fromtimestamp(day_start_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.series_dir(symbol, timeframe), f"{day}.csv")
+
+    def load_coverage(self, symbol, timeframe):
+        """Load the list of [start, end) ms ranges already downloaded"""
+        path = os.path.join(self.series_dir(symbol, timeframe), 'coverage.json')
+        if not os.path.exists(path):
+            return []
+
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save_coverage(self, symbol, timeframe, coverage):
+        """Persist coverage ranges"""
+        series_dir = self.series_dir(symbol, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+
+        path = os.path.join(series_dir, 'coverage.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(merge_intervals(coverage), f)
+        os.replace(tmp_path, path)
+
+    def mark_covered(self, symbol, timeframe, start, end):
+        """Record that [start, end) has been downloaded"""
+        if end <= start:
+            return
+
+        coverage = self.load_coverage(symbol, timeframe)
+        coverage.append([start, end])
+        self.save_coverage(symbol, timeframe, coverage)
+
+    def missing_ranges(self, symbol, timeframe, since, until):
+        """
+        Find the parts of [since, until) that are not cached yet
+
+        Returns:
+            list: [start, end) ms ranges to download
+        """
+        missing = []
+        cursor = since
+
+        for start, end in merge_intervals(self.load_coverage(symbol, timeframe)):
+            if end <= cursor:
+                continue
+            if start >= until:
+                break
+            if start > cursor:
+                missing.append([cursor, start])
+            cursor = max(cursor, end)
+
+        if cursor < until:
+            missing.append([cursor, until])
+
+        return missing
+
+    def write(self, symbol, timeframe, candles):
+        """
+        Append candles to their day partitions
+
+        Existing rows with the same timestamp are replaced by the new ones.
+
+        Args:
+            candles: List of [timestamp, open, high, low, close, volume] rows,
+                     or an OHLCV DataFrame
+        """
+        if len(candles) == 0:
+            return
+
+        df = pd.DataFrame(candles, columns=OHLCV_COLUMNS)
+        df['timestamp'] = df['timestamp'].astype('int64')
+        os.makedirs(self.series_dir(symbol, timeframe), exist_ok=True)
+
+        for day_start, day_df in df.groupby(df['timestamp'] // DAY_MS * DAY_MS):
+            path = self.partition_path(symbol, timeframe, day_start)
+
+            if os.path.exists(path):
+                existing = pd.read_csv(path, float_precision='round_trip')
+                day_df = pd.concat([existing, day_df], ignore_index=True)
+
+            day_df = day_df.drop_duplicates(subset='timestamp', keep='last').sort_values('timestamp')
+            day_df.to_csv(path, index=False)
+
+    def remove(self, symbol, timeframe, timestamps):
+        """
+        Delete rows from their day partitions
+
+        Args:
+            timestamps: Open times (ms) of the rows to delete
+        """
+        timestamps = pd.Series(timestamps, dtype='int64')
+
+        for day_start, day_timestamps in timestamps.groupby(timestamps // DAY_MS * DAY_MS):
+            path = self.partition_path(symbol, timeframe, day_start)
+            if not os.path.exists(path):
+                continue
+
+            existing = pd.read_csv(path, float_precision='round_trip')
+            existing[~existing['timestamp'].isin(day_timestamps)].to_csv(path, index=False)
+
+    def read(self, symbol, timeframe, since, until):
+        """
+        Read cached candles with since <= timestamp < until
+
+        Returns:
+            DataFrame: OHLCV rows with integer ms timestamps
+        """
+        frames = []
+        day_start = since // DAY_MS * DAY_MS
+
+        while day_start < until:
+            path = self.partition_path(symbol, timeframe, day_start)
+            if os.path.exists(path):
+                frames.append(pd.read_csv(path, float_precision='round_trip'))
+            day_start += DAY_MS
+
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS).astype({'timestamp': 'int64'})
+
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df['timestamp'] >= since) & (df['timestamp'] < until)]
+        return df.reset_index(drop=True)
+
+    def fetch_range(self, exchange, symbol, timeframe, since, until):
+        """
+        Download closed candles in [since, until) page by page
+
+        Returns:
+            tuple: (candles, complete) - complete is False if a request failed
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        all_candles = []
+
+        while since < until:
+            try:
+                candles = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
+            except Exception as e:
+                print(f"Error fetching data: {e}")
+                return all_candles, False
+
+            if not candles:
+                break
+
+            all_candles.extend(c for c in candles if c[0] < until)
+
+            if candles[-1][0] + tf_ms >= until:
+                break
+
+            since = candles[-1][0] + 1
+
+            # Rate limiting
+            time.sleep(self.request_pause)
+
+        return all_candles, True
+
+    def prefetch(self, downloader, symbol, timeframes, since, until=None):
+        """
+        Download the missing ranges of several timeframes concurrently
+
+        Args:
+            downloader: CandleDownloader
+            symbol: Trading pair
+            timeframes: List of timeframes
+            since: Start time in ms
+            until: End time in ms (default: now)
+        """
+        if until is None:
+            until = int(time.time() * 1000)
+
+        ranges = []
+        for timeframe in timeframes:
+            tf_ms = timeframe_to_ms(timeframe)
+            aligned_since = -(-since // tf_ms) * tf_ms
+            aligned_until = until // tf_ms * tf_ms
+            ranges.extend(
+                (timeframe, start, end)
+                for start, end in self.missing_ranges(symbol, timeframe, aligned_since, aligned_until)
+            )
+
+        if not ranges:
+            return
+
+        print(f"Downloading {len(ranges)} missing range(s) of {symbol} {', '.join(timeframes)} concurrently...")
+
+        for timeframe, start, end, candles, complete in downloader.fetch(symbol, ranges):
+            self.write(symbol, timeframe, candles)
+
+            if complete:
+                self.mark_covered(symbol, timeframe, start, end)
+            elif candles:
+                self.mark_covered(symbol, timeframe, start, candles[-1][0] + timeframe_to_ms(timeframe))
+
+    def load(self, exchange, symbol, timeframe, since, until=None):
+        """
+        Load candles for [since, until), downloading only missing ranges
+
+        Only closed candles are cached; the candle still forming at `until`
+        is never stored.
+
+        Args:
+            exchange: ccxt exchange used for missing ranges
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            since: Start time in ms
+            until: End time in ms (default: open time of the current candle)
+
+        Returns:
+            DataFrame: OHLCV rows with integer ms timestamps
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        since = -(-since // tf_ms) * tf_ms
+        if until is None:
+            until = exchange.milliseconds()
+        until = until // tf_ms * tf_ms
+
+        for start, end in self.missing_ranges(symbol, timeframe, since, until):
+            print(f"Downloading {symbol} {timeframe} "
+                  f"{datetime.fromtimestamp(start / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} -> "
+                  f"{datetime.fromtimestamp(end / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} UTC")
+
+            candles, complete = self.fetch_range(exchange, symbol, timeframe, start, end)
+            self.write(symbol, timeframe, candles)
+
+            if complete:
+                self.mark_covered(symbol, timeframe, start, end)
+            elif candles:
+                self.mark_covered(symbol, timeframe, start, candles[-1][0] + tf_ms)
+
+        return self.read(symbol, timeframe, since, until)
@@ -0,0 +1,117 @@
+"""
+Vectorized Fair Value Gap Scanner
+Finds every 3-candle FVG of a candle series in one array pass.
+
+For every bar idx (candle3), candle1 = idx-2 and candle2 = idx-1: the same
+3-candle rule the live bots' detect_fair_value_gap(df) applies to their last
+three candles, so backtests and bots give identical signals.
+"""
+
+import numpy as np
+
+
+def daily_range_arrays(day_keys, ranges):
+    """
+    Broadcast per-day ranges to per-bar arrays
+
+    Args:
+        day_keys: Per-bar day key (e.g. session date)
+        ranges: dict mapping day key -> {'high': ..., 'low': ...} or None
+
+    Returns:
+        tuple: (range_high, range_low) float arrays, NaN on days without a range
+    """
+    range_high = np.full(len(day_keys), np.nan)
+    range_low = np.full(len(day_keys), np.nan)
+
+    for i, key in enumerate(day_keys):
+        daily_range = ranges.get(key)
+        if daily_range:
+            range_high[i] = daily_range['high']
+            range_low[i] = daily_range['low']
+
+    return range_high, range_low
+
+
+class FairValueGapScan:
+    def __init__(self, high, low, close, range_high, range_low, stop_buffer=0.001):
+        """
+        Scan a whole series for Fair Value Gaps
+
+        Args:
+            high, low, close: Per-bar price arrays
+            range_high, range_low: Per-bar daily range arrays (NaN = no range)
+            stop_buffer: Stop distance beyond candle1 as a fraction (0.001 = 0.1%)
+        """
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        range_high = np.asarray(range_high, dtype=np.float64)
+        range_low = np.asarray(range_low, dtype=np.float64)
+
+        n = len(self.high)
+        self.bullish = np.zeros(n, dtype=bool)
+        self.bearish = np.zeros(n, dtype=bool)
+        self.gap_top = np.full(n, np.nan)
+        self.gap_bottom = np.full(n, np.nan)
+        self.fvg_price = np.full(n, np.nan)
+        self.stop_loss = np.full(n, np.nan)
+
+        if n < 3:
+            return
+
+        # candle1 / candle2 / candle3 aligned on candle3's index
+        h1, h2, h3 = self.high[:-2], self.high[1:-1], self.high[2:]
+        l1, l2, l3 = self.low[:-2], self.low[1:-1], self.low[2:]
+        c1, c2, c3 = self.close[:-2], self.close[1:-1], self.close[2:]
+        rh, rl = range_high[2:], range_low[2:]
+
+        # BULLISH: gap between candle1 high and candle3 low
+        bullish = (
+            (l3 > h1) &
+            ((c1 > rh) | (c2 > rh) | (c3 > rh)) &
+            ((l1 <= rh) | (l2 <= rh) | (l3 <= rh))
+        )
+
+        # BEARISH: gap between candle1 low and candle3 high (only if not bullish)
+        bearish = (
+            ~bullish &
+            (l1 > h3) &
+            ((c1 < rl) | (c2 < rl) | (c3 < rl)) &
+            ((h1 >= rl) | (h2 >= rl) | (h3 >= rl))
+        )
+
+        self.bullish[2:] = bullish
+        self.bearish[2:] = bearish
+        self.gap_top[2:] = np.where(bullish, l3, np.where(bearish, l1, np.nan))
+        self.gap_bottom[2:] = np.where(bullish, h1, np.where(bearish, h3, np.nan))
+        self.fvg_price[2:] = np.where(bullish, (h1 + l3) / 2, np.where(bearish, (l1 + h3) / 2, np.nan))
+        self.stop_loss[2:] = np.where(bullish, l1 * (1 - stop_buffer), np.where(bearish, h1 * (1 + stop_buffer), np.nan))
+
+    @property
+    def signal(self):
+        """Mask of bars that complete any FVG"""
+        return self.bullish | self.bearish
+
+    def at(self, idx):
+        """
+        FVG completed by bar idx
+
+        Returns:
+            dict: type, direction, gap_top, gap_bottom, fvg_price, stop_loss; or None
+        """
+        if self.bullish[idx]:
+            fvg_type, direction = 'BULLISH', 'LONG'
+        elif self.bearish[idx]:
+            fvg_type, direction = 'BEARISH', 'SHORT'
+        else:
+            return None
+
+        return {
+            'type': fvg_type,
+            'direction': direction,
+            'gap_top': self.gap_top[idx],
+            'gap_bottom': self.gap_bottom[idx],
+            'fvg_price': self.fvg_price[idx],
+            'stop_loss': self.stop_loss[idx]
+        }
@@ -0,0 +1,530 @@
+"""
+Indicator Pipeline
+Computes the EMA / ATR / volume columns used by the setup quality filters
+once per series instead of once per detected setup.
+
+Streaming indicators (EMA, TrueRange, ATR, RollingMean, StreamingIndicators,
+SessionIndicators) update in O(1) per candle and are shared by the live bots
+and the backtests.
+Their recurrences are the ones pandas uses for ewm(adjust=False).mean() and
+rolling().mean(), and batch() runs the very same update loop, so streaming and
+batch values are identical.
+
+Columns added by add_indicator_columns():
+    ema         EMA of close
+    atr         Rolling mean of true range
+    atr_avg     Mean of the last `atr_avg_period` ATR values
+    volume_avg  Mean volume of the last `volume_period` bars
+    window_len  Number of bars the indicators were computed over
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+INDICATOR_COLUMNS = ['ema', 'atr', 'atr_avg', 'volume_avg', 'window_len']
+
+# Bars per batch in windowed mode (bounds the size of the window matrices)
+WINDOW_CHUNK = 4096
+
+# Closed candles the live bot warms up on at the session open (100-candle 5m frame)
+SESSION_WARMUP = 99
+
+
+def true_range(high, low, close):
+    """True range per bar; the first bar has no previous close and uses high - low"""
+    prev_close = np.r_[np.nan, close[:-1]]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def tail_mean(matrix):
+    """Row-wise mean of non-NaN values, summed the same way as Series.mean()"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    mask = np.isnan(matrix)
+    count = (~mask).sum(axis=1)
+    total = np.where(mask, 0.0, matrix).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _rows_to_indices(rows, n):
+    """Normalize a bar mask / index list to a sorted index array"""
+    if rows is None:
+        return np.arange(n)
+
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        return np.flatnonzero(rows)
+
+    return np.unique(rows.astype(np.int64))
+
+
+def _windowed_indicators(high, low, close, volume, rows, ema_period, atr_period,
+                         atr_avg_period, volume_period, lookback):
+    """
+    Indicators exactly as computed on df.iloc[max(0, idx-lookback):idx+1]
+
+    Each window restarts the EMA and the true range at its first bar, so the
+    values include the warm-up effect of the window.
+    """
+    n = len(close)
+    tr = true_range(high, low, close)
+    ema_out = np.full(n, np.nan)
+    atr_out = np.full(n, np.nan)
+    atr_avg_out = np.full(n, np.nan)
+    volume_avg_out = np.full(n, np.nan)
+
+    # Windows at the start of the series are plain prefixes
+    for idx in rows[rows < lookback]:
+        ema = pd.Series(close[:idx + 1]).ewm(span=ema_period, adjust=False).mean()
+        atr = pd.Series(tr[:idx + 1]).rolling(atr_period).mean()
+        ema_out[idx] = ema.iloc[-1]
+        atr_out[idx] = atr.iloc[-1]
+        atr_avg_out[idx] = atr.iloc[-atr_avg_period:].mean()
+
+    # Full windows: one column per bar, evaluated by the same pandas kernels
+    full = rows[rows >= lookback]
+    window_size = lookback + 1
+
+    for start in range(0, len(full), WINDOW_CHUNK):
+        chunk = full[start:start + WINDOW_CHUNK]
+        first = chunk - lookback
+
+        window_close = sliding_window_view(close, window_size)[first]
+        window_tr = sliding_window_view(tr, window_size)[first]
+        window_tr[:, 0] = high[first] - low[first]
+
+        ema = pd.DataFrame(window_close.T).ewm(span=ema_period, adjust=False).mean().to_numpy()
+        atr = pd.DataFrame(window_tr.T).rolling(atr_period).mean().to_numpy()
+
+        ema_out[chunk] = ema[-1]
+        atr_out[chunk] = atr[-1]
+        atr_avg_out[chunk] = tail_mean(atr[-atr_avg_period:].T)
+
+    # Volume average only depends on the last `volume_period` bars
+    volume_rows = rows[rows >= volume_period - 1]
+    if len(volume_rows) > 0:
+        windows = sliding_window_view(volume, volume_period)[volume_rows - volume_period + 1]
+        volume_avg_out[volume_rows] = tail_mean(windows)
+
+    window_len = np.minimum(np.arange(n), lookback) + 1
+    return ema_out, atr_out, atr_avg_out, volume_avg_out, window_len
+
+
+def _continuous_indicators(high, low, close, volume, ema_period, atr_period,
+                           atr_avg_period, volume_period):
+    """Indicators run over the whole series without restarting"""
+    indicators = StreamingIndicators(ema_period, atr_period, atr_avg_period, volume_period)
+    values = indicators.batch(high, low, close, volume)
+    return tuple(values[column] for column in INDICATOR_COLUMNS)
+
+
+def _session_indicators(high, low, close, volume, rows, session_starts, warmup,
+                        ema_period, atr_period, atr_avg_period, volume_period):
+    """
+    Indicators as the live bot streams them through each session
+
+    Every session starts a fresh stream `warmup` bars before its first bar
+    (SessionIndicators on the frame seen at the open) and runs up to the last
+    requested bar of the session.
+    """
+    n = len(close)
+    out = {column: np.full(n, np.nan) for column in INDICATOR_COLUMNS}
+    indicators = StreamingIndicators(ema_period, atr_period, atr_avg_period, volume_period)
+
+    starts = _rows_to_indices(session_starts, n)
+    ends = np.r_[starts[1:], n]
+
+    for first, end in zip(starts, ends):
+        session_rows = rows[(rows >= first) & (rows < end)]
+        if len(session_rows) == 0:
+            continue
+
+        begin = max(0, first - warmup)
+        stop = session_rows[-1] + 1
+        values = indicators.batch(high[begin:stop], low[begin:stop], close[begin:stop], volume[begin:stop])
+        for column in INDICATOR_COLUMNS:
+            out[column][session_rows] = values[column][session_rows - begin]
+
+    return tuple(out[column] for column in INDICATOR_COLUMNS)
+
+
+def add_indicator_columns(df, ema_period=50, atr_period=14, atr_avg_period=50,
+                          volume_period=20, lookback=100, mode='windowed', rows=None,
+                          session_starts=None, warmup=SESSION_WARMUP):
+    """
+    Attach indicator columns to a candle DataFrame
+
+    Args:
+        df: DataFrame with high/low/close/volume columns
+        ema_period: EMA span
+        atr_period: ATR rolling period
+        atr_avg_period: Number of ATR values averaged into atr_avg
+        volume_period: Number of bars averaged into volume_avg
+        lookback: Window size used in 'windowed' mode (bars before the current one)
+        mode: 'windowed' - bit-identical to running the filters on
+                           df.iloc[max(0, idx-lookback):idx+1] (default)
+              'session' - restarted `warmup` bars before every session start,
+                          same values as SessionIndicators in the live bot
+              'continuous' - one pass over the whole series with
+                             StreamingIndicators
+        rows: Optional bar mask / indices to compute in 'windowed' and
+              'session' mode; other bars get NaN
+        session_starts: Bar mask / indices of the first bar of every session
+                        ('session' mode)
+        warmup: Closed candles streamed before a session's first bar
+
+    Returns:
+        DataFrame: Copy of df with INDICATOR_COLUMNS added
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+
+    if mode == 'windowed':
+        values = _windowed_indicators(
+            high, low, close, volume, _rows_to_indices(rows, len(df)),
+            ema_period, atr_period, atr_avg_period, volume_period, lookback
+        )
+    elif mode == 'session':
+        if session_starts is None:
+            raise ValueError("session mode needs session_starts")
+        values = _session_indicators(
+            high, low, close, volume, _rows_to_indices(rows, len(df)),
+            session_starts, warmup, ema_period, atr_period, atr_avg_period, volume_period
+        )
+    elif mode == 'continuous':
+        values = _continuous_indicators(
+            high, low, close, volume, ema_period, atr_period, atr_avg_period, volume_period
+        )
+    else:
+        raise ValueError(f"Unknown indicator mode: {mode}")
+
+    df = df.copy()
+    for column, value in zip(INDICATOR_COLUMNS, values):
+        df[column] = value
+
+    return df
+
+
+class EMA:
+    def __init__(self, period, field='close'):
+        """
+        Streaming exponential moving average
+
+        Same recurrence as Series.ewm(span=period, adjust=False).mean().
+
+        Args:
+            period: EMA span
+            field: Candle field read by update()
+        """
+        self.period = period
+        self.field = field
+        self.alpha = 2 / (period + 1)
+        self.value = np.nan
+        self.count = 0
+
+    def _next(self, value):
+        """EMA after value, without changing state"""
+        if self.count == 0:
+            return value
+
+        # Skip the update on equal values to avoid drift on flat series
+        if self.value == value:
+            return self.value
+
+        old_weight = 1 - self.alpha
+        return (old_weight * self.value + self.alpha * value) / (old_weight + self.alpha)
+
+    def push(self, value):
+        """Add a value and return the new EMA"""
+        self.value = self._next(value)
+        self.count += 1
+        return self.value
+
+    def update(self, candle):
+        """Add a closed candle"""
+        return self.push(candle[self.field])
+
+    def preview(self, candle):
+        """EMA including a still-forming candle, without committing it"""
+        return self._next(candle[self.field])
+
+    def batch(self, values):
+        """EMA of a whole array, via the same update loop"""
+        ema = EMA(self.period, self.field)
+        return np.array([ema.push(value) for value in values], dtype=np.float64)
+
+
+class RollingMean:
+    def __init__(self, period, min_periods=None, field='volume'):
+        """
+        Streaming rolling mean over the last `period` values
+
+        Keeps a compensated running sum (same algorithm as
+        Series.rolling(period, min_periods).mean()), so each update is O(1).
+        NaN values occupy a slot but are not counted.
+
+        Args:
+            period: Window size
+            min_periods: Values required for a result (default: period)
+            field: Candle field read by update()
+        """
+        self.period = period
+        self.min_periods = period if min_periods is None else min_periods
+        self.field = field
+        self.values = deque()
+        # sum, add compensation, remove compensation, nobs, negatives,
+        # consecutive equal values, last value
+        self.state = (0.0, 0.0, 0.0, 0, 0, 0, np.nan)
+        self.value = np.nan
+
+    def _advance(self, value):
+        """State after adding value (and evicting the oldest one)"""
+        total, comp_add, comp_remove, nobs, neg_ct, same_ct, prev = self.state
+
+        if len(self.values) == self.period:
+            old = self.values[0]
+            if not math.isnan(old):
+                nobs -= 1
+                y = -old - comp_remove
+                t = total + y
+                comp_remove = t - total - y
+                total = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+
+        if not self.values:
+            prev, same_ct = value, 0
+
+        if not math.isnan(value):
+            nobs += 1
+            y = value - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            same_ct = same_ct + 1 if value == prev else 1
+            prev = value
+
+        return total, comp_add, comp_remove, nobs, neg_ct, same_ct, prev
+
+    def _mean(self, state):
+        """Mean for a state tuple"""
+        total, _, _, nobs, neg_ct, same_ct, prev = state
+
+        if nobs < self.min_periods or nobs == 0:
+            return np.nan
+
+        if same_ct >= nobs:
+            return prev
+
+        mean = total / nobs
+        if neg_ct == 0 and mean < 0:
+            return 0.0
+        if neg_ct == nobs and mean > 0:
+            return 0.0
+        return mean
+
+    def push(self, value):
+        """Add a value and return the new mean"""
+        self.state = self._advance(value)
+        if len(self.values) == self.period:
+            self.values.popleft()
+        self.values.append(value)
+        self.value = self._mean(self.state)
+        return self.value
+
+    def update(self, candle):
+        """Add a closed candle"""
+        return self.push(candle[self.field])
+
+    def preview_value(self, value):
+        """Mean including value, without committing it"""
+        return self._mean(self._advance(value))
+
+    def preview(self, candle):
+        """Mean including a still-forming candle, without committing it"""
+        return self.preview_value(candle[self.field])
+
+    def batch(self, values):
+        """Rolling mean of a whole array, via the same update loop"""
+        rolling = RollingMean(self.period, self.min_periods, self.field)
+        return np.array([rolling.push(value) for value in values], dtype=np.float64)
+
+
+class TrueRange:
+    def __init__(self):
+        """Streaming true range; the first candle uses high - low"""
+        self.prev_close = None
+        self.value = np.nan
+
+    def _next(self, high, low):
+        if self.prev_close is None:
+            return high - low
+
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def update(self, candle):
+        """Add a closed candle"""
+        self.value = self._next(candle['high'], candle['low'])
+        self.prev_close = candle['close']
+        return self.value
+
+    def preview(self, candle):
+        """True range of a still-forming candle"""
+        return self._next(candle['high'], candle['low'])
+
+
+class ATR:
+    def __init__(self, period=14):
+        """Streaming average true range (rolling mean of true range)"""
+        self.period = period
+        self.true_range = TrueRange()
+        self.mean = RollingMean(period)
+        self.value = np.nan
+
+    def update(self, candle):
+        """Add a closed candle"""
+        self.value = self.mean.push(self.true_range.update(candle))
+        return self.value
+
+    def preview(self, candle):
+        """ATR including a still-forming candle, without committing it"""
+        return self.mean.preview_value(self.true_range.preview(candle))
+
+    def batch(self, high, low, close):
+        """ATR of whole arrays, via the same update loop"""
+        atr = ATR(self.period)
+        return np.array([
+            atr.update({'high': h, 'low': l, 'close': c})
+            for h, l, c in zip(high, low, close)
+        ], dtype=np.float64)
+
+
+class StreamingIndicators:
+    def __init__(self, ema_period=50, atr_period=14, atr_avg_period=50, volume_period=20):
+        """
+        All setup-filter indicators, updated one candle at a time
+
+        Produces the same values as add_indicator_columns(mode='continuous').
+        """
+        self.ema_period = ema_period
+        self.atr_period = atr_period
+        self.atr_avg_period = atr_avg_period
+        self.volume_period = volume_period
+
+        self.ema = EMA(ema_period)
+        self.atr = ATR(atr_period)
+        self.atr_avg = RollingMean(atr_avg_period, min_periods=1)
+        self.volume_avg = RollingMean(volume_period)
+        self.count = 0
+
+    def update(self, candle):
+        """
+        Add a closed candle
+
+        Args:
+            candle: Mapping with high/low/close/volume
+
+        Returns:
+            dict: Current values keyed by INDICATOR_COLUMNS
+        """
+        self.count += 1
+        return {
+            'ema': self.ema.update(candle),
+            'atr': self.atr.update(candle),
+            'atr_avg': self.atr_avg.push(self.atr.value),
+            'volume_avg': self.volume_avg.update(candle),
+            'window_len': self.count
+        }
+
+    def preview(self, candle):
+        """Values including a still-forming candle, without committing it"""
+        atr = self.atr.preview(candle)
+        return {
+            'ema': self.ema.preview(candle),
+            'atr': atr,
+            'atr_avg': self.atr_avg.preview_value(atr),
+            'volume_avg': self.volume_avg.preview(candle),
+            'window_len': self.count + 1
+        }
+
+    def batch(self, high, low, close, volume):
+        """
+        Run a fresh indicator set over whole arrays
+
+        Returns:
+            dict: Arrays keyed by INDICATOR_COLUMNS
+        """
+        indicators = StreamingIndicators(
+            self.ema_period, self.atr_period, self.atr_avg_period, self.volume_period
+        )
+        rows = [
+            indicators.update({'high': h, 'low': l, 'close': c, 'volume': v})
+            for h, l, c, v in zip(high, low, close, volume)
+        ]
+        return {
+            column: np.array([row[column] for row in rows], dtype=np.float64)
+            for column in INDICATOR_COLUMNS
+        }
+
+
+class SessionIndicators:
+    def __init__(self, ema_period=50, atr_period=14, atr_avg_period=50, volume_period=20):
+        """
+        StreamingIndicators fed from live candle frames, warmed up once per session
+
+        The first frame of a session (or the first one after missed candles)
+        starts a fresh StreamingIndicators over its closed candles; later frames
+        only add the candles not seen yet. add_indicator_columns(mode='session')
+        gives the backtests the same values.
+        """
+        self.periods = (ema_period, atr_period, atr_avg_period, volume_period)
+        self.indicators = StreamingIndicators(*self.periods)
+        self.session = None
+        self.last_time = None
+
+    def update(self, df, session, step):
+        """
+        Feed the closed candles of a live frame
+
+        Args:
+            df: Candle DataFrame whose last row is the candle still forming
+            session: Session key of the frame (local trading date)
+            step: Candle duration (Timedelta)
+        """
+        timestamps = df['timestamp'].to_numpy()
+        highs = df['high'].to_numpy()
+        lows = df['low'].to_numpy()
+        closes = df['close'].to_numpy()
+        volumes = df['volume'].to_numpy()
+
+        # New session or missed candles - warm up again from this frame
+        if session != self.session or (self.last_time is not None and timestamps[0] > self.last_time + step):
+            self.indicators = StreamingIndicators(*self.periods)
+            self.session = session
+            self.last_time = None
+
+        # Last row is the candle still forming
+        for i in range(len(df) - 1):
+            if self.last_time is not None and timestamps[i] <= self.last_time:
+                continue
+
+            self.indicators.update({
+                'high': highs[i],
+                'low': lows[i],
+                'close': closes[i],
+                'volume': volumes[i]
+            })
+            self.last_time = timestamps[i]
+
+    def preview(self, candle):
+        """Values including the still-forming candle"""
+        return self.indicators.preview(candle)
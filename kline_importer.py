@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Bulk Kline Archive Importer
+Backfills the candle store from Binance-style monthly (or daily) kline
+archives already on disk, e.g. data/binance/BTCUSDT-5m-2024-01.zip as
+published on data.binance.vision. Works fully offline.
+
+Archives are processed one at a time and parsed with pandas' C CSV parser,
+so memory stays bounded to a single month and no per-row Python objects
+are created.
+"""
+
+import os
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from candle_store import OHLCV_COLUMNS, CandleStore, timeframe_to_ms
+
+# BTCUSDT-5m-2024-01.zip / BTCUSDT-1m-2024-01-15.csv
+ARCHIVE_PATTERN = re.compile(r'^(?P<market>[A-Z0-9]+)-(?P<timeframe>\d+[smhdwM])-(?P<period>\d{4}-\d{2}(-\d{2})?)\.(zip|csv)$')
+
+# Open times above this are microseconds (Binance spot archives from 2025 on)
+MICROSECOND_THRESHOLD = 10 ** 14
+
+
+def find_archives(directory, symbol, timeframes=None):
+    """
+    List the archive files of a symbol in a directory
+
+    Args:
+        directory: Folder with the downloaded archives
+        symbol: Trading pair ('BTC/USDT' matches BTCUSDT-*.zip)
+        timeframes: Only these timeframes (default: all found)
+
+    Returns:
+        list: (timeframe, path) sorted by timeframe and period
+    """
+    market = symbol.replace('/', '')
+    archives = []
+
+    for name in os.listdir(directory):
+        match = ARCHIVE_PATTERN.match(name)
+        if not match or match.group('market') != market:
+            continue
+        if timeframes and match.group('timeframe') not in timeframes:
+            continue
+        archives.append((match.group('timeframe'), match.group('period'), os.path.join(directory, name)))
+
+    return [(timeframe, path) for timeframe, _, path in sorted(archives)]
+
+
+def parse_klines(open_file):
+    """
+    Parse a kline CSV stream into an OHLCV DataFrame
+
+    Only the first six columns are read (open time, open, high, low, close,
+    volume). A header row, present in some archives, is skipped.
+
+    Args:
+        open_file: Callable returning a fresh binary file object of the CSV
+
+    Returns:
+        DataFrame: OHLCV rows with integer ms timestamps
+    """
+    with open_file() as f:
+        first_line = f.readline()
+    has_header = not first_line[:1].isdigit()
+
+    with open_file() as f:
+        df = pd.read_csv(
+            f,
+            header=None,
+            skiprows=1 if has_header else 0,
+            usecols=range(len(OHLCV_COLUMNS)),
+            names=OHLCV_COLUMNS,
+            dtype={'timestamp': np.int64, 'open': np.float64, 'high': np.float64,
+                   'low': np.float64, 'close': np.float64, 'volume': np.float64},
+            engine='c',
+            float_precision='round_trip'
+        )
+
+    timestamps = df['timestamp'].to_numpy()
+    if len(timestamps) and timestamps[0] > MICROSECOND_THRESHOLD:
+        df['timestamp'] = timestamps // 1000
+
+    return df
+
+
+def read_archive(path):
+    """Parse one .zip (first CSV member) or .csv kline archive"""
+    if path.endswith('.csv'):
+        return parse_klines(lambda: open(path, 'rb'))
+
+    with zipfile.ZipFile(path) as archive:
+        member = next(name for name in archive.namelist() if name.endswith('.csv'))
+        return parse_klines(lambda: archive.open(member))
+
+
+def import_archives(store, directory, symbol='BTC/USDT', timeframes=None):
+    """
+    Import kline archives into the candle store
+
+    Candles already in the store are replaced by the archive rows with the
+    same timestamp, and every imported span is marked as covered so later
+    loads do not download it again.
+
+    Args:
+        store: CandleStore
+        directory: Folder with the downloaded archives
+        symbol: Trading pair
+        timeframes: Only import these timeframes (default: all found)
+
+    Returns:
+        dict: timeframe -> number of candles imported
+    """
+    archives = find_archives(directory, symbol, timeframes)
+    if not archives:
+        print(f"⚠️ No {symbol} kline archives found in {directory}")
+        return {}
+
+    print(f"📦 Importing {len(archives)} {symbol} archive(s) from {directory}...")
+    imported = {}
+
+    for timeframe, path in archives:
+        try:
+            df = read_archive(path)
+        except (zipfile.BadZipFile, StopIteration, ValueError) as e:
+            print(f"❌ Skipping {os.path.basename(path)}: {e}")
+            continue
+
+        if df.empty:
+            continue
+
+        store.write(symbol, timeframe, df)
+        store.mark_covered(symbol, timeframe, int(df['timestamp'].iloc[0]),
+                           int(df['timestamp'].iloc[-1]) + timeframe_to_ms(timeframe))
+
+        imported[timeframe] = imported.get(timeframe, 0) + len(df)
+        print(f"   {os.path.basename(path)}: {len(df)} candles")
+
+    print(f"✅ Imported {', '.join(f'{tf}: {count}' for tf, count in imported.items())} candles")
+    return imported
+
+
+if __name__ == "__main__":
+    # Monthly archives downloaded beforehand, e.g. from
+    # https://data.binance.vision/?prefix=data/spot/monthly/klines/BTCUSDT/5m/
+    import_archives(CandleStore(), 'data/binance', symbol='BTC/USDT', timeframes=['5m'])
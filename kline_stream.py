@@ -0,0 +1,260 @@
+"""
+Streaming Kline Feed
+Keeps the recent candles of several timeframes current from the exchange's
+kline WebSocket stream and wakes the bot loop as soon as a bar closes.
+While the stream is down, candles are polled over REST until it reconnects.
+
+Runs in a background thread with its own asyncio loop, so the synchronous
+bots only call ohlcv() and wait_for_close(). The stream endpoint follows
+the bot's REST exchange (mainnet or testnet) and can be overridden, so a
+local WebSocket server replaying recorded frames can stand in for the
+exchange.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+import aiohttp
+
+from candle_store import timeframe_to_ms
+
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443/stream'
+BINANCE_TESTNET_STREAM_URL = 'wss://testnet.binance.vision/stream'
+
+
+def stream_url_for(exchange):
+    """Combined-stream endpoint of the same network as a ccxt exchange's REST API"""
+    api = exchange.urls.get('api')
+    urls = api.values() if isinstance(api, dict) else [api]
+    if any('testnet' in str(url) for url in urls):
+        return BINANCE_TESTNET_STREAM_URL
+    return BINANCE_STREAM_URL
+
+
+def parse_kline_message(message):
+    """
+    Parse a Binance kline event (raw or combined-stream payload)
+
+    Returns:
+        tuple: (timeframe, candle, closed) or None for other messages
+    """
+    data = message.get('data', message)
+    if data.get('e') != 'kline':
+        return None
+
+    kline = data['k']
+    candle = [int(kline['t']), float(kline['o']), float(kline['h']),
+              float(kline['l']), float(kline['c']), float(kline['v'])]
+    return kline['i'], candle, bool(kline['x'])
+
+
+class KlineFeed:
+    def __init__(self, exchange, symbol, timeframes, history=100, stream_url=None,
+                 poll_interval=60, reconnect_delay=5, stale_after=60):
+        """
+        Initialize kline feed
+
+        Args:
+            exchange: The bot's ccxt exchange, for the REST seed and fallback polling
+            symbol: Trading pair
+            timeframes: Timeframes to keep ('5m', '15m', ...)
+            history: Candles kept per timeframe
+            stream_url: Combined-stream WebSocket endpoint (default: the
+                        mainnet or testnet one matching the exchange)
+            poll_interval: Seconds between REST polls while the stream is down
+            reconnect_delay: First wait before reconnecting (doubles up to 5 minutes)
+            stale_after: Seconds without a message before the stream is considered dead
+        """
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframes = list(timeframes)
+        self.history = history
+        self.stream_url = stream_url or stream_url_for(exchange)
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.stale_after = stale_after
+
+        # timeframe -> {open time: candle}
+        self.series = {timeframe: {} for timeframe in self.timeframes}
+        self.last_closed = {timeframe: None for timeframe in self.timeframes}
+        self.lock = threading.Lock()
+
+        # (timeframe, open time) of every bar close, consumed by wait_for_close()
+        self.closed_bars = queue.Queue()
+
+        self.streaming = False
+        self.seeded = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def has(self, timeframe):
+        """True if the feed keeps this timeframe"""
+        return timeframe in self.series
+
+    def stream_names(self):
+        """Combined-stream names, e.g. btcusdt@kline_5m"""
+        market = self.symbol.replace('/', '').lower()
+        return [f"{market}@kline_{timeframe}" for timeframe in self.timeframes]
+
+    def merge(self, timeframe, candles, closed_until, notify=True):
+        """
+        Upsert candles and report newly closed bars
+
+        Args:
+            timeframe: Timeframe of the candles
+            candles: [timestamp, open, high, low, close, volume] rows
+            closed_until: Time in ms; bars ending at or before it are closed
+            notify: Queue a bar-close event for wait_for_close()
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+
+        with self.lock:
+            series = self.series[timeframe]
+            for candle in candles:
+                series[candle[0]] = list(candle)
+
+            for timestamp in sorted(series)[:-self.history]:
+                del series[timestamp]
+
+            closed = [timestamp for timestamp in series if timestamp + tf_ms <= closed_until]
+            latest_closed = max(closed) if closed else None
+            previous = self.last_closed[timeframe]
+            if latest_closed is None or (previous is not None and latest_closed <= previous):
+                return
+            self.last_closed[timeframe] = latest_closed
+
+        if notify:
+            self.closed_bars.put((timeframe, latest_closed))
+
+    def on_kline(self, timeframe, candle, closed):
+        """Apply one stream update"""
+        if timeframe not in self.series:
+            return
+
+        # A new forming candle also means the one before it has closed
+        closed_until = candle[0] + timeframe_to_ms(timeframe) if closed else candle[0]
+        self.merge(timeframe, [candle], closed_until)
+
+    def ohlcv(self, timeframe, limit=None):
+        """
+        Latest candles like exchange.fetch_ohlcv() (oldest first, the last
+        one may still be forming)
+        """
+        with self.lock:
+            candles = [self.series[timeframe][timestamp] for timestamp in sorted(self.series[timeframe])]
+
+        if limit:
+            candles = candles[-limit:]
+        return [list(candle) for candle in candles]
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        """exchange.fetch_ohlcv() look-alike served from memory"""
+        candles = self.ohlcv(timeframe)
+        if since is not None:
+            candles = [candle for candle in candles if candle[0] >= since]
+            return candles[:limit] if limit else candles
+
+        return candles[-limit:] if limit else candles
+
+    def wait_for_close(self, timeout):
+        """
+        Block until a bar closes or timeout seconds pass
+
+        Returns:
+            list: Timeframes that closed a bar (empty on timeout)
+        """
+        try:
+            closed = [self.closed_bars.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                closed.append(self.closed_bars.get_nowait())
+            except queue.Empty:
+                break
+
+        return sorted({timeframe for timeframe, _ in closed})
+
+    async def poll(self, limit, notify=True):
+        """Fetch the latest candles of every timeframe over REST"""
+        for timeframe in self.timeframes:
+            try:
+                candles = await asyncio.to_thread(self.exchange.fetch_ohlcv, self.symbol, timeframe, limit=limit)
+            except Exception as e:
+                print(f"⚠️ REST candle poll failed ({timeframe}): {e}")
+                continue
+
+            self.merge(timeframe, candles, self.exchange.milliseconds(), notify=notify)
+
+    async def stream(self, session):
+        """Consume the WebSocket until it fails or the feed stops"""
+        url = f"{self.stream_url}?streams={'/'.join(self.stream_names())}"
+
+        async with session.ws_connect(url, heartbeat=30) as ws:
+            self.streaming = True
+            print(f"📡 Kline stream connected ({', '.join(self.timeframes)})")
+
+            # Catch up on anything missed while disconnected
+            await self.poll(limit=self.history)
+
+            last_message = time.monotonic()
+            while not self.stop_event.is_set():
+                try:
+                    message = await ws.receive(timeout=1)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_message > self.stale_after:
+                        raise ConnectionError(f"no kline update for {self.stale_after}s")
+                    continue
+
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    last_message = time.monotonic()
+                    kline = parse_kline_message(message.json())
+                    if kline:
+                        self.on_kline(*kline)
+                elif message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED,
+                                      aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.ERROR):
+                    raise ConnectionError(f"stream closed ({message.type.name})")
+
+    async def run_async(self):
+        """Seed over REST, then stream with REST polling as the fallback"""
+        await self.poll(limit=self.history, notify=False)
+        self.seeded.set()
+
+        delay = self.reconnect_delay
+        async with aiohttp.ClientSession() as session:
+            while not self.stop_event.is_set():
+                connected_at = time.monotonic()
+                try:
+                    await self.stream(session)
+                except Exception as e:
+                    print(f"⚠️ Kline stream unavailable: {e}")
+                self.streaming = False
+
+                if self.stop_event.is_set():
+                    break
+
+                # A connection that lasted a while starts the backoff over
+                if time.monotonic() - connected_at > 10 * self.reconnect_delay:
+                    delay = self.reconnect_delay
+
+                print(f"🔁 Polling REST candles, reconnecting in {delay}s...")
+                retry_at = time.monotonic() + delay
+                while not self.stop_event.is_set() and time.monotonic() < retry_at:
+                    await self.poll(limit=3)
+                    await asyncio.sleep(min(self.poll_interval, max(retry_at - time.monotonic(), 0)))
+                delay = min(delay * 2, 300)
+
+    def start(self, timeout=30):
+        """Start the feed thread and wait for the REST seed"""
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run_async(),), daemon=True)
+        self.thread.start()
+        self.seeded.wait(timeout)
+
+    def stop(self):
+        """Stop streaming and wait for the feed thread"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=10)
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Parallel Parameter Sweep for the v2 / v2.1 Range FVG Backtests
+Runs every combination of a parameter grid over candles loaded once and
+collects one summary row per configuration.
+
+The candles and the opening range index are prepared in the parent
+process; forked pool workers share those pages read-only (copy-on-write),
+so no worker re-fetches or re-parses data.
+
+ThresholdSweep covers the setup filter thresholds (volume, ATR, trend band,
+minimum stars) without re-running the backtest per configuration: the raw
+ratios of every FVG setup are computed once, thresholds are compared along
+a parameter axis, and each setup's fill and exit is resolved once and
+shared by every configuration that takes it.
+
+ExitSweep does the same for reward_ratio and the stop buffer: the price
+excursions after each fill are recorded once, and every (reward_ratio,
+stop_buffer) pair re-resolves its stops and targets against them.
+"""
+
+import contextlib
+import itertools
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest_core import ExcursionPaths, OpeningRangeIndex, SessionBars, last_closed_index, session_spans
+from range_fvg_backtest_v2_1 import RangeFVGBacktestV2_1
+
+# Summary metrics of every sweep table
+METRIC_COLUMNS = ('trades', 'win_rate', 'roi', 'final_balance', 'profit_factor', 'max_drawdown', 'skipped_setups')
+
+# Constructor arguments; every other grid key is set as an attribute
+CONSTRUCTOR_PARAMETERS = ('risk_per_trade', 'reward_ratio')
+
+# Filter thresholds ThresholdSweep broadcasts (other parameters stay as set on the backtest)
+THRESHOLD_PARAMETERS = ('volume_multiplier', 'min_atr_multiplier', 'trend_band', 'min_quality_stars')
+
+# Exit parameters ExitSweep re-scores from the recorded price excursions
+EXIT_PARAMETERS = ('reward_ratio', 'stop_buffer')
+
+# Sweep currently running, inherited by the forked pool workers
+worker_sweep = None
+
+
+def init_sweep_worker(sweep):
+    """Pool initializer: keep the sweep the worker was forked with"""
+    global worker_sweep
+    worker_sweep = sweep
+
+
+def run_configuration(params):
+    """Pool task: backtest one configuration"""
+    return worker_sweep.run_one(params)
+
+
+def expand_grid(grid):
+    """
+    Every combination of a parameter grid
+
+    Args:
+        grid: dict name -> list of values
+
+    Returns:
+        list: One dict per configuration (last key varies fastest)
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def summarize(backtest):
+    """
+    Summary metrics of a finished backtest
+
+    Returns:
+        dict: trades, win_rate, roi, final_balance, profit_factor, max_drawdown, skipped_setups
+    """
+    pnl = np.array([trade['pnl'] for trade in backtest.trades], dtype=np.float64)
+    wins = pnl[pnl > 0].sum()
+    losses = pnl[pnl < 0].sum()
+
+    # Peak-to-trough drop of the balance after each trade, in percent
+    balances = np.r_[backtest.initial_balance, [trade['balance'] for trade in backtest.trades]]
+    peaks = np.maximum.accumulate(balances)
+    max_drawdown = float(((peaks - balances) / peaks).max() * 100)
+
+    return {
+        'trades': len(pnl),
+        'win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+        'roi': (backtest.balance - backtest.initial_balance) / backtest.initial_balance * 100,
+        'final_balance': backtest.balance,
+        'profit_factor': float(abs(wins / losses)) if losses else np.nan,
+        'max_drawdown': max_drawdown,
+        'skipped_setups': len(getattr(backtest, 'skipped_setups', []))
+    }
+
+
+class ParameterSweep:
+    def __init__(self, df_5m, df_15m, df_1h, backtest_class=RangeFVGBacktestV2_1, initial_balance=10000):
+        """
+        Initialize sweep over one dataset
+
+        Args:
+            df_5m, df_15m, df_1h: Candles with tz-aware local timestamps (loaded once)
+            backtest_class: RangeFVGBacktestV2 or RangeFVGBacktestV2_1
+            initial_balance: Starting balance of every configuration
+        """
+        self.df_5m = df_5m
+        self.df_15m = df_15m
+        self.df_1h = df_1h
+        self.backtest_class = backtest_class
+        self.initial_balance = initial_balance
+
+        # The opening ranges don't depend on any swept parameter
+        template = backtest_class(initial_balance=initial_balance)
+        self.range_index = OpeningRangeIndex(df_15m, template.calendar.time_settings['range_start_time'])
+
+    def run_one(self, params):
+        """
+        Backtest one configuration quietly
+
+        Args:
+            params: dict of parameter name -> value (e.g. {'volume_multiplier': 2.0})
+
+        Returns:
+            dict: The parameters followed by the summarize() metrics
+        """
+        backtest = self.backtest_class(
+            initial_balance=self.initial_balance,
+            **{name: params[name] for name in CONSTRUCTOR_PARAMETERS if name in params}
+        )
+
+        for name, value in params.items():
+            if name in CONSTRUCTOR_PARAMETERS:
+                continue
+            if not hasattr(backtest, name):
+                raise ValueError(f"{self.backtest_class.__name__} has no parameter '{name}'")
+            setattr(backtest, name, value)
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            backtest.run_backtest(self.df_5m, self.df_15m, self.df_1h, range_index=self.range_index, report=False)
+
+        return {**params, **summarize(backtest)}
+
+    def run(self, grid, workers=None, sort_by='roi'):
+        """
+        Backtest every configuration of a grid
+
+        Args:
+            grid: dict name -> list of values
+            workers: Processes (default: CPU count; 1 = no pool)
+            sort_by: Metric column to sort the table by (descending)
+
+        Returns:
+            DataFrame: One row per configuration
+        """
+        configurations = expand_grid(grid)
+        workers = min(workers or os.cpu_count() or 1, len(configurations))
+
+        print(f"🔬 Sweeping {len(configurations)} {self.backtest_class.__name__} configurations "
+              f"on {workers} process(es)...")
+
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context('fork').Pool(
+                workers, initializer=init_sweep_worker, initargs=(self,)
+            )
+            with pool:
+                rows = pool.map(run_configuration, configurations, chunksize=1)
+        else:
+            rows = [self.run_one(params) for params in configurations]
+
+        table = pd.DataFrame(rows)
+        if sort_by:
+            table = table.sort_values(sort_by, ascending=False, kind='stable').reset_index(drop=True)
+        return table
+
+
+def trend_codes(price, ema, band):
+    """EMA trend as +1 (BULLISH), -1 (BEARISH) or 0 (NEUTRAL), like trend_from_ema()"""
+    return np.where(price > ema * (1 + band), 1, np.where(price < ema * (1 - band), -1, 0)).astype(np.int8)
+
+
+class TradeLedger:
+    def __init__(self, count, backtest):
+        """
+        Balances and summary metrics of `count` configurations traded side by side
+
+        Args:
+            count: Configurations
+            backtest: Backtest providing initial_balance and risk_per_trade
+        """
+        self.initial_balance = backtest.initial_balance
+        self.risk_per_trade = backtest.risk_per_trade
+
+        self.balance = np.full(count, float(self.initial_balance))
+        self.peak = self.balance.copy()
+        self.drawdown = np.zeros(count)
+        self.trades = np.zeros(count, dtype=np.int64)
+        self.skipped = np.zeros(count, dtype=np.int64)
+
+        # P&L of every configuration's trades in order (columns grow as needed)
+        self.pnl = np.zeros((count, 16))
+
+    def skip(self, skipping):
+        """Count a setup the filters rejected in the configurations of mask `skipping`"""
+        self.skipped[skipping] += 1
+
+    def book(self, taking, direction, entry_price, exit_price, multiplier, risk_per_unit):
+        """
+        Close one trade in the configurations of mask `taking`
+
+        Sized at the balance when the order was placed and booked like
+        calculate_position_size() / close_position(), so balances match a
+        full run bit for bit.
+
+        Args:
+            taking: Configuration mask
+            direction: +1 long / -1 short
+            entry_price: Fill price
+            exit_price, multiplier, risk_per_unit: Scalars or one value per taking configuration
+        """
+        position_size = self.balance[taking] * (self.risk_per_trade * multiplier) / risk_per_unit
+        if direction == 1:
+            pnl = (exit_price - entry_price) * position_size
+        else:
+            pnl = (entry_price - exit_price) * position_size
+
+        rows = np.flatnonzero(taking)
+        if self.trades[rows].max() == self.pnl.shape[1]:
+            self.pnl = np.concatenate([self.pnl, np.zeros_like(self.pnl)], axis=1)
+        self.pnl[rows, self.trades[rows]] = pnl
+
+        self.balance[taking] += pnl
+        self.trades[taking] += 1
+        self.peak[taking] = np.maximum(self.peak[taking], self.balance[taking])
+        self.drawdown[taking] = np.maximum(self.drawdown[taking],
+                                           (self.peak[taking] - self.balance[taking]) / self.peak[taking])
+
+    def metrics(self):
+        """
+        Summary metrics per configuration, the same values and columns as summarize()
+
+        Returns:
+            DataFrame: One row per configuration, METRIC_COLUMNS
+        """
+        win_rate = np.zeros(len(self.trades))
+        profit_factor = np.full(len(self.trades), np.nan)
+
+        # Same reductions as summarize() over each configuration's trades
+        for row, count in enumerate(self.trades.tolist()):
+            pnl = self.pnl[row, :count]
+            wins = pnl[pnl > 0].sum()
+            losses = pnl[pnl < 0].sum()
+            if count:
+                win_rate[row] = float((pnl > 0).mean() * 100)
+            if losses:
+                profit_factor[row] = float(abs(wins / losses))
+
+        return pd.DataFrame({
+            'trades': self.trades,
+            'win_rate': win_rate,
+            'roi': (self.balance - self.initial_balance) / self.initial_balance * 100,
+            'final_balance': self.balance,
+            'profit_factor': profit_factor,
+            'max_drawdown': self.drawdown * 100,
+            'skipped_setups': self.skipped
+        }, columns=METRIC_COLUMNS)
+
+
+class ThresholdSweep:
+    def __init__(self, backtest, df_5m, df_15m, df_1h, range_index=None):
+        """
+        Prepare the FVG setups of one dataset for threshold sweeps
+
+        Args:
+            backtest: RangeFVGBacktestV2 / RangeFVGBacktestV2_1 instance; its
+                      other parameters (ema_period, atr_period, reward_ratio,
+                      risk_per_trade, initial_balance) stay fixed
+            df_5m, df_15m, df_1h: Candles with tz-aware local timestamps
+            range_index: Optional prebuilt OpeningRangeIndex of df_15m
+        """
+        self.backtest = backtest
+        engine = backtest.prepare_run(df_5m, df_15m, df_1h, range_index)
+        candles = engine.candles
+        scan = engine.fvg_scan
+
+        days = session_spans(engine.day_keys, engine.in_session, engine.daily_ranges, 3)
+        self.bars = SessionBars(candles.high, candles.low, days)
+        self.final_close = candles.close[-1]
+
+        # Candidate setups: visited bars that complete an FVG
+        self.positions = np.flatnonzero(scan.signal[self.bars.index])
+        idx = self.bars.index[self.positions]
+        self.direction = np.where(scan.bullish[idx], 1, -1).astype(np.int8)
+        self.entry = scan.fvg_price[idx]
+        self.stop = scan.stop_loss[idx]
+
+        # Candle1's low (longs) / high (shorts), the stop before its buffer
+        self.stop_anchor = np.where(self.direction == 1, candles.low[idx - 2], candles.high[idx - 2])
+
+        # Raw filter inputs, the same values fvg_detected() compares
+        df = candles.df
+        self.window_len = df['window_len'].to_numpy(dtype=np.float64)[idx]
+        self.close = candles.close[idx]
+        self.ema = df['ema'].to_numpy(dtype=np.float64)[idx]
+        self.atr = df['atr'].to_numpy(dtype=np.float64)[idx]
+        self.atr_avg = df['atr_avg'].to_numpy(dtype=np.float64)[idx]
+        self.volume = candles.volume[idx - 1]  # candle2 of the FVG
+        self.volume_avg = df['volume_avg'].to_numpy(dtype=np.float64)[idx]
+
+        # Close and EMA of the last closed 1h candle (NaN = NEUTRAL)
+        htf = last_closed_index(df_5m['timestamp'], '5m', df_1h['timestamp'], '1h')[idx]
+        ema_1h = backtest.calculate_ema(df_1h, backtest.ema_period).to_numpy()
+        has_trend = htf + 1 >= backtest.ema_period
+        self.close_1h = np.where(has_trend, df_1h['close'].to_numpy(dtype=np.float64)[htf], np.nan)
+        self.ema_1h = np.where(has_trend, ema_1h[htf], np.nan)
+
+        self.resolve_setups()
+
+    def resolve_setups(self):
+        """Fill and exit of every candidate setup, as if it were the only order"""
+        bars = self.bars
+        reward_ratio = self.backtest.reward_ratio
+
+        self.risk = np.abs(self.entry - self.stop)
+        target = np.where(self.direction == 1, self.entry + (self.risk * reward_ratio),
+                          self.entry - (self.risk * reward_ratio))
+
+        count = len(self.positions)
+        self.filled = np.zeros(count, dtype=bool)
+        self.exit_price = np.full(count, np.nan)
+
+        # Position from which the next setup may be taken: the next day after
+        # the order expired or the position closed (one trade per day)
+        self.free_from = np.full(count, len(bars) + 1, dtype=np.int64)
+
+        for c, position in enumerate(self.positions.tolist()):
+            direction = 'LONG' if self.direction[c] == 1 else 'SHORT'
+            fill = bars.first_fill(position, direction, self.entry[c])
+            if fill is None:
+                self.free_from[c] = bars.day_end[position]
+                continue
+
+            self.filled[c] = True
+            hit = bars.first_exit(fill, direction, self.stop[c], target[c])
+            if hit is None:
+                # Closed at the end of the backtest, nothing after it
+                self.exit_price[c] = self.final_close
+            else:
+                exit_position, self.exit_price[c], _ = hit
+                self.free_from[c] = bars.day_end[exit_position]
+
+    def risk_multipliers(self, min_quality_stars):
+        """Risk multiplier per star score (0-5) under the backtest's own sizing rule"""
+        backtest = self.backtest
+        saved = backtest.balance, backtest.risk_per_trade, backtest.min_quality_stars
+        backtest.balance, backtest.risk_per_trade, backtest.min_quality_stars = 1.0, 1.0, min_quality_stars
+
+        try:
+            # Unit balance, risk and distance: the size is the multiplier itself
+            return np.array([backtest.calculate_position_size(1.0, 0.0, stars) for stars in range(6)])
+        finally:
+            backtest.balance, backtest.risk_per_trade, backtest.min_quality_stars = saved
+
+    def filter_tables(self, axes):
+        """
+        Filter results per threshold value and setup
+
+        Args:
+            axes: dict name -> array of values for volume_multiplier,
+                  min_atr_multiplier and trend_band
+
+        Returns:
+            tuple: volume_ok, volatility_ok, trend_5m, trend_1h ([value, setup] arrays)
+        """
+        backtest = self.backtest
+
+        volume_ok = ((self.window_len >= 20) &
+                     (self.volume > self.volume_avg * np.asarray(axes['volume_multiplier'])[:, None]))
+        volatility_ok = ((self.window_len >= backtest.atr_period * 2) &
+                         (self.atr > self.atr_avg * np.asarray(axes['min_atr_multiplier'])[:, None]))
+        bands = np.asarray(axes['trend_band'])[:, None]
+        trend_5m = np.where(self.window_len >= backtest.ema_period, trend_codes(self.close, self.ema, bands), 0)
+        trend_1h = trend_codes(self.close_1h, self.ema_1h, bands)
+
+        return volume_ok, volatility_ok, trend_5m, trend_1h
+
+    def acceptance(self, volume_ok, volatility_ok, trend_5m, trend_1h, min_stars):
+        """
+        Star score and acceptance, as in score_setup_quality() / fvg_detected()
+
+        Returns:
+            tuple: (score, accepted) [configuration, setup] arrays
+        """
+        direction = self.direction
+        trend_match = trend_5m == direction
+        score = (1 + volume_ok + volatility_ok + trend_match + (trend_1h == direction)).astype(np.int64)
+        accepted = ((score >= np.asarray(min_stars)[:, None]) &
+                    (trend_match | (self.backtest.allow_neutral_trend & (trend_5m == 0))))
+        return score, accepted
+
+    def run(self, grid, block_size=4096, sort_by='roi'):
+        """
+        Evaluate every combination of a threshold grid
+
+        Args:
+            grid: dict name -> list of values, names from THRESHOLD_PARAMETERS
+                  (missing ones use the backtest's current value)
+            block_size: Configurations evaluated together
+            sort_by: Metric column to sort the table by (descending)
+
+        Returns:
+            DataFrame: One row per configuration, same metrics as ParameterSweep
+        """
+        unknown = set(grid) - set(THRESHOLD_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Not a threshold parameter: {', '.join(sorted(unknown))}")
+
+        backtest = self.backtest
+        axes = {name: np.asarray(grid.get(name, [getattr(backtest, name)])) for name in THRESHOLD_PARAMETERS}
+
+        volume_ok, volatility_ok, trend_5m, trend_1h = self.filter_tables(axes)
+        multipliers = np.array([self.risk_multipliers(stars) for stars in axes['min_quality_stars'].tolist()])
+
+        # Configurations as axis positions, last parameter varying fastest (like expand_grid)
+        mesh = np.meshgrid(*(np.arange(len(axes[name])) for name in THRESHOLD_PARAMETERS), indexing='ij')
+        volume_at, atr_at, band_at, stars_at = (axis.ravel() for axis in mesh)
+
+        metrics = []
+        for start in range(0, len(volume_at), block_size):
+            block = slice(start, start + block_size)
+            score, accepted = self.acceptance(
+                volume_ok[volume_at[block]], volatility_ok[atr_at[block]],
+                trend_5m[band_at[block]], trend_1h[band_at[block]],
+                axes['min_quality_stars'][stars_at[block]]
+            )
+            metrics.append(self.walk(score, accepted, multipliers[stars_at[block]]))
+
+        table = pd.DataFrame({name: axes[name][at] for name, at in
+                              zip(THRESHOLD_PARAMETERS, (volume_at, atr_at, band_at, stars_at))})
+        table = pd.concat([table, pd.concat(metrics, ignore_index=True)], axis=1)
+        if sort_by:
+            table = table.sort_values(sort_by, ascending=False, kind='stable').reset_index(drop=True)
+        return table
+
+    def walk(self, score, accepted, multipliers):
+        """
+        Trade sequence of a block of configurations, all advanced together
+        setup by setup
+
+        Args:
+            score, accepted: [configuration, setup] arrays from acceptance()
+            multipliers: [configuration, stars] risk multipliers
+
+        Returns:
+            DataFrame: TradeLedger.metrics() of the block
+        """
+        ledger = TradeLedger(len(score), self.backtest)
+        rows = np.arange(len(score))
+        free_at = np.zeros(len(score), dtype=np.int64)
+
+        for c, position in enumerate(self.positions.tolist()):
+            # fvg_detected() only sees setups while flat with no order pending
+            reached = free_at <= position
+            ledger.skip(reached & ~accepted[:, c])
+            taking = reached & accepted[:, c]
+            if not taking.any():
+                continue
+
+            # A zero position size places no order (create_order)
+            multiplier = multipliers[rows, score[:, c]]
+            taking &= (multiplier > 0) & (self.risk[c] != 0)
+            free_at[taking] = self.free_from[c]
+            if self.filled[c] and taking.any():
+                ledger.book(taking, self.direction[c], self.entry[c], self.exit_price[c],
+                            multiplier[taking], self.risk[c])
+
+        return ledger.metrics()
+
+
+class ExitSweep(ThresholdSweep):
+    def __init__(self, backtest, df_5m, df_15m, df_1h, range_index=None):
+        """
+        Prepare re-scoring of reward_ratio / stop_buffer pairs
+
+        The setups the backtest's own filters accept are fixed; their fills
+        don't depend on the stop either, so only the ExcursionPaths from each
+        fill are needed to re-resolve any stop and target.
+
+        Args:
+            backtest: RangeFVGBacktestV2 / RangeFVGBacktestV2_1 instance (filter
+                      thresholds, risk_per_trade and initial_balance stay fixed)
+            df_5m, df_15m, df_1h: Candles with tz-aware local timestamps
+            range_index: Optional prebuilt OpeningRangeIndex of df_15m
+        """
+        super().__init__(backtest, df_5m, df_15m, df_1h, range_index)
+
+        axes = {name: [getattr(backtest, name)] for name in THRESHOLD_PARAMETERS}
+        score, accepted = self.acceptance(*self.filter_tables(axes), axes['min_quality_stars'])
+        multiplier = self.risk_multipliers(backtest.min_quality_stars)[score[0]]
+
+        # Only setups that would place an order at some stop
+        self.accepted = accepted[0]
+        keep = self.accepted & (multiplier > 0)
+        self.setups = np.flatnonzero(keep)
+        self.multiplier = multiplier[keep]
+
+        self.paths = ExcursionPaths(self.bars, self.positions[keep], self.direction[keep], self.entry[keep])
+
+    def outcomes(self, reward_ratio, stop_buffer):
+        """
+        Exits of the kept setups under one (reward_ratio, stop_buffer) pair
+
+        Returns:
+            tuple: (risk, exit_price, free_from) arrays, one value per kept setup
+        """
+        direction = self.direction[self.setups]
+        entry = self.entry[self.setups]
+        stop_anchor = self.stop_anchor[self.setups]
+
+        # Same expressions as FairValueGapScan and create_order()
+        stop_loss = np.where(direction == 1, stop_anchor * (1 - stop_buffer), stop_anchor * (1 + stop_buffer))
+        risk = np.abs(entry - stop_loss)
+        take_profit = np.where(direction == 1, entry + (risk * reward_ratio), entry - (risk * reward_ratio))
+
+        exit_position, exit_price, _ = self.paths.resolve(stop_loss, take_profit, self.final_close)
+        free_from = np.where(self.paths.filled, -1, self.bars.day_end[self.positions[self.setups]])
+        resolved = self.paths.filled & (exit_position >= 0)
+        free_from[resolved] = self.bars.day_end[exit_position[resolved]]
+        free_from[self.paths.filled & (exit_position < 0)] = len(self.bars) + 1
+
+        return risk, exit_price, free_from
+
+    def run(self, grid, sort_by='roi'):
+        """
+        Evaluate every (reward_ratio, stop_buffer) combination of a grid
+
+        Args:
+            grid: dict with 'reward_ratio' and/or 'stop_buffer' value lists
+                  (a missing one uses the backtest's current value)
+            sort_by: Metric column to sort the table by (descending)
+
+        Returns:
+            DataFrame: One row per pair, same metrics as ParameterSweep
+        """
+        unknown = set(grid) - set(EXIT_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Not an exit parameter: {', '.join(sorted(unknown))}")
+
+        configurations = expand_grid({name: grid.get(name, [getattr(self.backtest, name)]) for name in EXIT_PARAMETERS})
+        outcomes = [self.outcomes(params['reward_ratio'], params['stop_buffer']) for params in configurations]
+        risk, exit_price, free_from = (np.array(values) for values in zip(*outcomes))
+
+        ledger = TradeLedger(len(configurations), self.backtest)
+        free_at = np.zeros(len(configurations), dtype=np.int64)
+        filled = self.paths.filled
+        kept = dict(zip(self.setups.tolist(), range(len(self.setups))))
+
+        for c, position in enumerate(self.positions.tolist()):
+            # fvg_detected() only sees setups while flat with no order pending
+            reached = free_at <= position
+            if not self.accepted[c]:
+                ledger.skip(reached)
+                continue
+
+            # Accepted but sized to zero: no order either way
+            k = kept.get(c)
+            if k is None:
+                continue
+
+            taking = reached & (risk[:, k] != 0)
+            if not taking.any():
+                continue
+
+            free_at[taking] = free_from[taking, k]
+            if filled[k]:
+                ledger.book(taking, self.direction[c], self.entry[c], exit_price[taking, k],
+                            self.multiplier[k], risk[taking, k])
+
+        table = pd.DataFrame(configurations)
+        table = pd.concat([table, ledger.metrics()], axis=1)
+        if sort_by:
+            table = table.sort_values(sort_by, ascending=False, kind='stable').reset_index(drop=True)
+        return table
+
+
+if __name__ == "__main__":
+    backtest = RangeFVGBacktestV2_1(initial_balance=10000)
+
+    # Load the candles once; every configuration runs on the same frames
+    backtest.prefetch_history(symbol='BTC/USDT', timeframes=['5m'], days=90)
+    df_5m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='5m', days=90)
+    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=90, base_timeframe='5m')
+    df_1h = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='1h', days=90, base_timeframe='5m')
+
+    sweep = ParameterSweep(df_5m, df_15m, df_1h, RangeFVGBacktestV2_1)
+    table = sweep.run({
+        'volume_multiplier': [1.5, 2.0, 2.5],
+        'min_atr_multiplier': [1.1, 1.2, 1.3],
+        'min_quality_stars': [3, 4],
+        'reward_ratio': [1.5, 2, 3]
+    })
+
+    print(f"\n{table.head(20).to_string(index=False)}\n")
+
+    os.makedirs('/mnt/user-data/outputs', exist_ok=True)
+    table.to_csv('/mnt/user-data/outputs/parameter_sweep_v2_1.csv', index=False)
+    print("✅ Results saved to /mnt/user-data/outputs/parameter_sweep_v2_1.csv")
+
+    # Dense threshold grid in one pass (reward_ratio etc. stay at the defaults)
+    thresholds = ThresholdSweep(backtest, df_5m, df_15m, df_1h, sweep.range_index)
+    table = thresholds.run({
+        'volume_multiplier': np.round(np.arange(1.0, 3.01, 0.1), 2),
+        'min_atr_multiplier': np.round(np.arange(0.8, 1.61, 0.05), 2),
+        'trend_band': [0.0, 0.0025, 0.005, 0.0075, 0.01, 0.015],
+        'min_quality_stars': [2, 3, 4, 5]
+    })
+    print(f"🔬 {len(table)} threshold configurations\n{table.head(20).to_string(index=False)}\n")
+
+    table.to_csv('/mnt/user-data/outputs/threshold_sweep_v2_1.csv', index=False)
+    print("✅ Results saved to /mnt/user-data/outputs/threshold_sweep_v2_1.csv")
+
+    # Exit what-ifs from the recorded excursions of the default filters' setups
+    exits = ExitSweep(backtest, df_5m, df_15m, df_1h, sweep.range_index)
+    table = exits.run({
+        'reward_ratio': [1, 1.5, 2, 2.5, 3, 4, 5],
+        'stop_buffer': [0.0, 0.0005, 0.001, 0.002, 0.003]
+    })
+    print(f"🔬 {len(table)} exit configurations\n{table.head(20).to_string(index=False)}\n")
+
+    table.to_csv('/mnt/user-data/outputs/exit_sweep_v2_1.csv', index=False)
+    print("✅ Results saved to /mnt/user-data/outputs/exit_sweep_v2_1.csv")
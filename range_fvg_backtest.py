@@ -7,10 +7,18 @@ Tests the strategy: Mark 9:30-9:45 EST range, trade FVG breakouts with 2:1 R/R
 import ccxt
 import pandas as pd
 from datetime import datetime, timedelta
-import pytz
 import json
 import os
 
+from backtest_core import CandleArrays, OpeningRangeIndex, RangeSessionEngine
+from candle_aggregator import load_resampled
+from candle_downloader import CandleDownloader
+from candle_file import CandleFile
+from candle_integrity import verify_candles
+from candle_store import CandleStore
+from fvg_scanner import FairValueGapScan, daily_range_arrays
+from session_calendar import SessionCalendar
+
 class RangeFVGBacktest:
     def __init__(self, initial_balance=10000, risk_per_trade=0.02, reward_ratio=2):
         """
@@ -22,52 +30,67 @@ class RangeFVGBacktest:
             reward_ratio: Reward to risk ratio (2 = 2:1)
         """
         self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.candle_store = CandleStore()
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.risk_per_trade = risk_per_trade
         self.reward_ratio = reward_ratio
 
-        self.est = pytz.timezone('America/New_York')
+        # Session times (New York defaults: range 9:30-9:45, entries until 12:00)
+        self.calendar = SessionCalendar()
+        self.est = self.calendar.timezone
+
+        # (df_15m, range start time, OpeningRangeIndex) of the last frame looked up
+        self.range_cache = None
 
         self.trades = []
         self.position = None
         self.pending_order = None
         self.daily_range = None
 
-    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7):
-        """Fetch historical OHLCV data"""
+    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7, base_timeframe=None):
+        """
+        Fetch historical OHLCV data (only missing ranges hit the exchange)
+
+        With base_timeframe set, the candles are aggregated locally from that
+        series instead of being downloaded separately.
+        """
         print(f"Fetching {days} days of {timeframe} data for {symbol}...")
 
         since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
-        all_candles = []
-
-        while True:
-            try:
-                candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-                if not candles:
-                    break
-                all_candles.extend(candles)
-                since = candles[-1][0] + 1
+        if base_timeframe and base_timeframe != timeframe:
+            df = load_resampled(self.candle_store, self.exchange, symbol, timeframe, since,
+                                base_timeframe=base_timeframe)
+        else:
+            df = self.candle_store.load(self.exchange, symbol, timeframe, since)
+            df, _ = verify_candles(self.candle_store, self.exchange, symbol, timeframe, df, since=since)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.est)
 
-                # Break if we've caught up to now
-                if candles[-1][0] >= self.exchange.milliseconds() - (60 * 1000):
-                    break
+        print(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
+        return df
 
-                # Rate limiting
-                import time
-                time.sleep(0.5)
+    def load_candle_file(self, path, since=None, until=None):
+        """
+        Load candles from a memory-mapped binary candle file (see candle_file.py)
 
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                break
+        Price columns stay on disk until touched, so multi-year datasets load instantly.
 
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.est)
+        Args:
+            path: Candle file directory
+            since: Start time in ms (default: first candle)
+            until: End time in ms (default: after the last candle)
+        """
+        df = CandleFile(path).to_frame(since, until, timezone=self.est)
 
-        print(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
+        print(f"Loaded {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
         return df
 
+    def prefetch_history(self, symbol='BTC/USDT', timeframes=('5m', '15m'), days=7):
+        """Download the missing candles of every timeframe concurrently into the candle store"""
+        since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
+        self.candle_store.prefetch(CandleDownloader(), symbol, timeframes, since, self.exchange.milliseconds())
+
     def mark_daily_range_from_15m(self, df_15m, current_date):
         """
         Mark the daily range from 15-minute data for a specific date
@@ -79,91 +102,32 @@ class RangeFVGBacktest:
         Returns:
             dict: Range high/low or None
         """
-        # Find the 9:30 candle for this date
-        candle_930 = df_15m[
-            (df_15m['timestamp'].dt.date == current_date) &
-            (df_15m['timestamp'].dt.hour == 9) &
-            (df_15m['timestamp'].dt.minute == 30)
-        ]
-
-        if len(candle_930) > 0:
-            candle = candle_930.iloc[0]
-            return {
-                'high': candle['high'],
-                'low': candle['low'],
-                'date': current_date
-            }
-
-        return None
-
-    def detect_fair_value_gap(self, candle1, candle2, candle3, range_high, range_low):
+        return self.opening_range_index(df_15m).get(current_date)
+
+    def opening_range_index(self, df_15m):
+        """OpeningRangeIndex of df_15m, built once per frame and range start time"""
+        range_time = self.calendar.time_settings['range_start_time']
+        cache = self.range_cache
+        if cache is None or cache[0] is not df_15m or cache[1] != range_time:
+            self.range_cache = cache = (df_15m, range_time, OpeningRangeIndex(df_15m, range_time))
+        return cache[2]
+
+    def fvg_from_scan(self, fvg_scan, idx):
         """
-        Detect Fair Value Gap pattern from 3 candles
+        Look up the FVG completed by bar idx in a precomputed FairValueGapScan
 
         Returns:
-            dict: FVG details or None
+            dict: FairValueGapScan.at(idx) plus the candle1 stop level, or None
         """
-        # Check for BULLISH Fair Value Gap
-        bullish_gap_bottom = candle1['high']
-        bullish_gap_top = candle3['low']
-
-        if bullish_gap_top > bullish_gap_bottom:
-            candles_close_above = sum([
-                candle1['close'] > range_high,
-                candle2['close'] > range_high,
-                candle3['close'] > range_high
-            ])
-
-            candles_touch_range = sum([
-                candle1['low'] <= range_high,
-                candle2['low'] <= range_high,
-                candle3['low'] <= range_high
-            ])
-
-            if candles_close_above >= 1 and candles_touch_range >= 1:
-                fvg_price = (bullish_gap_bottom + bullish_gap_top) / 2
-
-                return {
-                    'type': 'BULLISH',
-                    'direction': 'LONG',
-                    'gap_top': bullish_gap_top,
-                    'gap_bottom': bullish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['low'] * 0.999,
-                    'candle1_low': candle1['low']
-                }
-
-        # Check for BEARISH Fair Value Gap
-        bearish_gap_top = candle1['low']
-        bearish_gap_bottom = candle3['high']
-
-        if bearish_gap_top > bearish_gap_bottom:
-            candles_close_below = sum([
-                candle1['close'] < range_low,
-                candle2['close'] < range_low,
-                candle3['close'] < range_low
-            ])
-
-            candles_touch_range = sum([
-                candle1['high'] >= range_low,
-                candle2['high'] >= range_low,
-                candle3['high'] >= range_low
-            ])
-
-            if candles_close_below >= 1 and candles_touch_range >= 1:
-                fvg_price = (bearish_gap_top + bearish_gap_bottom) / 2
-
-                return {
-                    'type': 'BEARISH',
-                    'direction': 'SHORT',
-                    'gap_top': bearish_gap_top,
-                    'gap_bottom': bearish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['high'] * 1.001,
-                    'candle1_high': candle1['high']
-                }
-
-        return None
+        fvg = fvg_scan.at(idx)
+
+        if fvg:
+            if fvg['direction'] == 'LONG':
+                fvg['candle1_low'] = fvg_scan.low[idx - 2]
+            else:
+                fvg['candle1_high'] = fvg_scan.high[idx - 2]
+
+        return fvg
 
     def calculate_position_size(self, entry_price, stop_loss):
         """Calculate position size based on risk"""
@@ -201,63 +165,18 @@ class RangeFVGBacktest:
             'created_at': current_time
         }
 
-    def check_order_fill(self, candle):
-        """Check if pending order gets filled"""
-        if not self.pending_order:
-            return False
-
+    def fill_order(self, fill_time):
+        """Turn the pending order into an open position"""
         order = self.pending_order
-        filled = False
-
-        if order['direction'] == 'LONG':
-            # Price must come down to our limit order
-            if candle['low'] <= order['entry_price']:
-                filled = True
-        else:  # SHORT
-            # Price must come up to our limit order
-            if candle['high'] >= order['entry_price']:
-                filled = True
-
-        if filled:
-            self.position = {
-                'direction': order['direction'],
-                'entry_price': order['entry_price'],
-                'stop_loss': order['stop_loss'],
-                'take_profit': order['take_profit'],
-                'position_size': order['position_size'],
-                'entry_time': candle['timestamp']
-            }
-            self.pending_order = None
-            return True
-
-        return False
-
-    def check_exit(self, candle):
-        """Check if position should exit"""
-        if not self.position:
-            return False, None, None
-
-        pos = self.position
-
-        if pos['direction'] == 'LONG':
-            # Check stop loss
-            if candle['low'] <= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-
-            # Check take profit
-            if candle['high'] >= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-
-        else:  # SHORT
-            # Check stop loss
-            if candle['high'] >= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-
-            # Check take profit
-            if candle['low'] <= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-
-        return False, None, None
+        self.position = {
+            'direction': order['direction'],
+            'entry_price': order['entry_price'],
+            'stop_loss': order['stop_loss'],
+            'take_profit': order['take_profit'],
+            'position_size': order['position_size'],
+            'entry_time': fill_time
+        }
+        self.pending_order = None
 
     def close_position(self, exit_price, reason, exit_time):
         """Close position and record trade"""
@@ -288,13 +207,41 @@ class RangeFVGBacktest:
         self.trades.append(trade)
         self.position = None
 
-    def run_backtest(self, df_5m, df_15m):
+    def start_day(self, current_date, daily_range):
+        """Backtest engine hook: a new trading day starts"""
+        if daily_range:
+            print(f"\n📅 {current_date} - Range Marked: High ${daily_range['high']:,.2f} | Low ${daily_range['low']:,.2f}")
+
+    def order_filled(self, candle_time):
+        """Backtest engine hook: the pending order traded"""
+        self.fill_order(candle_time)
+        print(f"  [{candle_time.strftime('%H:%M')}] Order Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f}")
+
+    def position_exited(self, exit_price, reason, candle_time):
+        """Backtest engine hook: stop loss or take profit hit"""
+        self.close_position(exit_price, reason, candle_time)
+        pnl_str = f"+${self.trades[-1]['pnl']:,.2f}" if self.trades[-1]['pnl'] > 0 else f"-${abs(self.trades[-1]['pnl']):,.2f}"
+        print(f"  [{candle_time.strftime('%H:%M')}] Closed: {reason} | P&L: {pnl_str} | Balance: ${self.balance:,.2f}")
+
+    def fvg_detected(self, idx, fvg_scan, candles):
+        """Backtest engine hook: an FVG completed while flat (max 1 trade per day for now)"""
+        fvg = self.fvg_from_scan(fvg_scan, idx)
+        candle_time = candles.time_at(idx)
+
+        self.create_order(fvg, candle_time)
+        if self.pending_order:
+            print(f"  [{candle_time.strftime('%H:%M')}] FVG Detected: {fvg['direction']} | Limit Order @ ${self.pending_order['entry_price']:,.2f}")
+
+    def run_backtest(self, df_5m, df_15m, range_index=None, workers=None):
         """
         Run backtest on historical data
 
         Args:
             df_5m: 5-minute candles
             df_15m: 15-minute candles
+            range_index: Optional prebuilt OpeningRangeIndex of df_15m
+            workers: Run the two-phase sharded engine on this many processes
+                     (see RangeSessionEngine.run_sharded)
         """
         print(f"\n{'='*60}")
         print(f"🔬 STARTING RANGE FVG BACKTEST")
@@ -303,69 +250,19 @@ class RangeFVGBacktest:
         print(f"Reward/Risk Ratio: {self.reward_ratio}:1")
         print(f"{'='*60}\n")
 
-        current_date = None
-        daily_range = None
-        trades_today = 0
-
-        for idx in range(3, len(df_5m)):
-            candle = df_5m.iloc[idx]
-            candle_date = candle['timestamp'].date()
-            candle_time = candle['timestamp'].time()
-
-            # New day - reset and mark range
-            if candle_date != current_date:
-                current_date = candle_date
-                daily_range = self.mark_daily_range_from_15m(df_15m, current_date)
-                trades_today = 0
-                self.pending_order = None  # Cancel any pending orders from previous day
-
-                if daily_range:
-                    print(f"\n📅 {current_date} - Range Marked: High ${daily_range['high']:,.2f} | Low ${daily_range['low']:,.2f}")
-
-            # Skip if no range marked yet
-            if not daily_range:
-                continue
-
-            # Only trade between 9:45 AM and 12:00 PM EST
-            if not (candle_time >= datetime.strptime('09:45', '%H:%M').time() and
-                    candle_time <= datetime.strptime('12:00', '%H:%M').time()):
-                continue
-
-            # Check if pending order is filled
-            if self.pending_order:
-                if self.check_order_fill(candle):
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] Order Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f}")
-
-            # Check exit conditions
-            if self.position:
-                should_exit, exit_price, reason = self.check_exit(candle)
-                if should_exit:
-                    self.close_position(exit_price, reason, candle['timestamp'])
-                    trades_today += 1
-                    pnl_str = f"+${self.trades[-1]['pnl']:,.2f}" if self.trades[-1]['pnl'] > 0 else f"-${abs(self.trades[-1]['pnl']):,.2f}"
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] Closed: {reason} | P&L: {pnl_str} | Balance: ${self.balance:,.2f}")
-
-            # Look for new FVG setups (max 1 trade per day for now)
-            if not self.position and not self.pending_order and trades_today < 1:
-                if idx >= 2:
-                    candle1 = df_5m.iloc[idx - 2]
-                    candle2 = df_5m.iloc[idx - 1]
-                    candle3 = candle
-
-                    fvg = self.detect_fair_value_gap(
-                        candle1, candle2, candle3,
-                        daily_range['high'], daily_range['low']
-                    )
-
-                    if fvg:
-                        self.create_order(fvg, candle['timestamp'])
-                        if self.pending_order:
-                            print(f"  [{candle['timestamp'].strftime('%H:%M')}] FVG Detected: {fvg['direction']} | Limit Order @ ${self.pending_order['entry_price']:,.2f}")
-
-        # Close any remaining position
-        if self.position:
-            last_candle = df_5m.iloc[-1]
-            self.close_position(last_candle['close'], 'Backtest End', last_candle['timestamp'])
+        # Precompute sessions, daily ranges and every FVG of the series in one pass
+        day_keys, in_session = self.calendar.session_arrays(df_5m['timestamp'])
+        if range_index is None:
+            range_index = self.opening_range_index(df_15m)
+        daily_ranges = {day: range_index.get(day) for day in pd.unique(day_keys)}
+        range_high, range_low = daily_range_arrays(day_keys, daily_ranges)
+        fvg_scan = FairValueGapScan(df_5m['high'], df_5m['low'], df_5m['close'], range_high, range_low)
+
+        engine = RangeSessionEngine(self, CandleArrays(df_5m), day_keys, in_session, daily_ranges, fvg_scan)
+        if workers:
+            engine.run_sharded(workers)
+        else:
+            engine.run()
 
         self.print_results()
 
@@ -447,12 +344,15 @@ if __name__ == "__main__":
         reward_ratio=2  # 2:1 reward/risk
     )
 
+    # Only the 5m series is downloaded; higher timeframes are aggregated from it
+    backtest.prefetch_history(symbol='BTC/USDT', timeframes=['5m'], days=7)
+
     # Fetch historical data
     print("Fetching 5-minute data...")
     df_5m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='5m', days=7)
 
     print("Fetching 15-minute data...")
-    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7)
+    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7, base_timeframe='5m')
 
     # Run backtest
     if df_5m is not None and df_15m is not None:
@@ -13,10 +13,19 @@ Improvements:
 import ccxt
 import pandas as pd
 from datetime import datetime, timedelta
-import pytz
 import json
 import os
 
+from backtest_core import CandleArrays, OpeningRangeIndex, RangeSessionEngine, TimeframeAlignment
+from candle_aggregator import load_resampled
+from candle_downloader import CandleDownloader
+from candle_file import CandleFile
+from candle_integrity import verify_candles
+from candle_store import CandleStore
+from fvg_scanner import FairValueGapScan, daily_range_arrays
+from indicators import add_indicator_columns
+from session_calendar import SessionCalendar
+
 class RangeFVGBacktestV2:
     def __init__(self, initial_balance=10000, risk_per_trade=0.02, reward_ratio=2):
         """
@@ -28,211 +37,143 @@ class RangeFVGBacktestV2:
             reward_ratio: Reward to risk ratio
         """
         self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.candle_store = CandleStore()
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.risk_per_trade = risk_per_trade
         self.reward_ratio = reward_ratio
+        self.stop_buffer = 0.001  # Stop 0.1% beyond candle1
+
+        # Session times (New York defaults: range 9:30-9:45, entries until 12:00)
+        self.calendar = SessionCalendar()
+        self.est = self.calendar.timezone
 
-        self.est = pytz.timezone('America/New_York')
+        # (df_15m, range start time, OpeningRangeIndex) of the last frame looked up
+        self.range_cache = None
 
         self.trades = []
         self.position = None
         self.pending_order = None
         self.daily_range = None
+        self.trend_1h = None
+        self.skipped_setups = []
 
         # Enhanced parameters
         self.volume_multiplier = 1.5  # Require 1.5x average volume
         self.ema_period = 50  # For trend detection
         self.atr_period = 14  # For volatility
         self.min_atr_multiplier = 1.2  # Only trade if ATR > 1.2x average
+        self.trend_band = 0.005  # Price must be 0.5% above / below the EMA for a trend
+        self.allow_neutral_trend = True  # NEUTRAL 5m trend may trade
+        self.min_quality_stars = 3  # Only trade 3+ star setups
+        self.indicator_mode = 'session'  # Same warm-up and streaming values as the live bot
 
-    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7):
-        """Fetch historical OHLCV data"""
+    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7, base_timeframe=None):
+        """
+        Fetch historical OHLCV data (only missing ranges hit the exchange)
+
+        With base_timeframe set, the candles are aggregated locally from that
+        series instead of being downloaded separately.
+        """
         print(f"Fetching {days} days of {timeframe} data for {symbol}...")
 
         since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
-        all_candles = []
-
-        while True:
-            try:
-                candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-                if not candles:
-                    break
-                all_candles.extend(candles)
-                since = candles[-1][0] + 1
-
-                if candles[-1][0] >= self.exchange.milliseconds() - (60 * 1000):
-                    break
-
-                import time
-                time.sleep(0.5)
-
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                break
-
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        if base_timeframe and base_timeframe != timeframe:
+            df = load_resampled(self.candle_store, self.exchange, symbol, timeframe, since,
+                                base_timeframe=base_timeframe)
+        else:
+            df = self.candle_store.load(self.exchange, symbol, timeframe, since)
+            df, _ = verify_candles(self.candle_store, self.exchange, symbol, timeframe, df, since=since)
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.est)
 
         print(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
         return df
 
-    def calculate_ema(self, df, period=50):
-        """Calculate Exponential Moving Average"""
-        return df['close'].ewm(span=period, adjust=False).mean()
-
-    def calculate_atr(self, df, period=14):
-        """Calculate Average True Range"""
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
-
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
+    def load_candle_file(self, path, since=None, until=None):
+        """
+        Load candles from a memory-mapped binary candle file (see candle_file.py)
 
-        return true_range.rolling(period).mean()
+        Price columns stay on disk until touched, so multi-year datasets load instantly.
 
-    def get_trend_direction(self, df):
+        Args:
+            path: Candle file directory
+            since: Start time in ms (default: first candle)
+            until: End time in ms (default: after the last candle)
         """
-        Determine trend direction using EMA
+        df = CandleFile(path).to_frame(since, until, timezone=self.est)
 
-        Returns:
-            'BULLISH', 'BEARISH', or 'NEUTRAL'
-        """
-        if len(df) < self.ema_period:
-            return 'NEUTRAL'
+        print(f"Loaded {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
+        return df
+
+    def prefetch_history(self, symbol='BTC/USDT', timeframes=('5m', '15m', '1h'), days=7):
+        """Download the missing candles of every timeframe concurrently into the candle store"""
+        since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
+        self.candle_store.prefetch(CandleDownloader(), symbol, timeframes, since, self.exchange.milliseconds())
 
-        ema = self.calculate_ema(df, self.ema_period)
-        current_price = df.iloc[-1]['close']
-        current_ema = ema.iloc[-1]
+    def calculate_ema(self, df, period=50):
+        """Calculate Exponential Moving Average"""
+        return df['close'].ewm(span=period, adjust=False).mean()
 
+    def trend_from_ema(self, current_price, current_ema):
+        """Classify price against its EMA as 'BULLISH', 'BEARISH' or 'NEUTRAL'"""
         # Check if price is above/below EMA
-        if current_price > current_ema * 1.005:  # 0.5% above EMA
+        if current_price > current_ema * (1 + self.trend_band):  # 0.5% above EMA
             return 'BULLISH'
-        elif current_price < current_ema * 0.995:  # 0.5% below EMA
+        elif current_price < current_ema * (1 - self.trend_band):  # 0.5% below EMA
             return 'BEARISH'
         else:
             return 'NEUTRAL'
 
-    def check_volatility(self, df):
+    def trend_by_candle(self, df):
         """
-        Check if current volatility is high enough to trade
+        Trend of every candle of df from the EMA up to that candle
 
         Returns:
-            bool: True if volatile enough
+            list: 'BULLISH', 'BEARISH' or 'NEUTRAL' per candle
         """
-        if len(df) < self.atr_period * 2:
-            return False
+        ema = self.calculate_ema(df, self.ema_period).to_numpy()
+        closes = df['close'].to_numpy()
 
-        atr = self.calculate_atr(df, self.atr_period)
-        current_atr = atr.iloc[-1]
-        avg_atr = atr.iloc[-50:].mean()  # Average of last 50 periods
+        return [
+            self.trend_from_ema(closes[i], ema[i]) if i + 1 >= self.ema_period else 'NEUTRAL'
+            for i in range(len(df))
+        ]
 
-        # Only trade if current ATR is above average
-        return current_atr > (avg_atr * self.min_atr_multiplier)
+    def get_trend_direction_at(self, row):
+        """Trend from a row carrying precomputed indicator columns"""
+        if row['window_len'] < self.ema_period:
+            return 'NEUTRAL'
 
-    def check_volume(self, candle, df):
-        """
-        Check if volume is high enough
+        return self.trend_from_ema(row['close'], row['ema'])
 
-        Returns:
-            bool: True if volume is 1.5x average
-        """
-        if len(df) < 20:
+    def check_volatility_at(self, row):
+        """Volatility check from a row carrying precomputed indicator columns"""
+        if row['window_len'] < self.atr_period * 2:
             return False
 
-        avg_volume = df['volume'].iloc[-20:].mean()
-        return candle['volume'] > (avg_volume * self.volume_multiplier)
+        return row['atr'] > (row['atr_avg'] * self.min_atr_multiplier)
+
+    def check_volume_at(self, candle, row):
+        """Volume check of candle against the precomputed average of row"""
+        if row['window_len'] < 20:
+            return False
+
+        return candle['volume'] > (row['volume_avg'] * self.volume_multiplier)
 
     def mark_daily_range_from_15m(self, df_15m, current_date):
         """Mark the daily range from 15-minute data"""
-        candle_930 = df_15m[
-            (df_15m['timestamp'].dt.date == current_date) &
-            (df_15m['timestamp'].dt.hour == 9) &
-            (df_15m['timestamp'].dt.minute == 30)
-        ]
+        return self.opening_range_index(df_15m).get(current_date)
+
+    def opening_range_index(self, df_15m):
+        """OpeningRangeIndex of df_15m, built once per frame and range start time"""
+        range_time = self.calendar.time_settings['range_start_time']
+        cache = self.range_cache
+        if cache is None or cache[0] is not df_15m or cache[1] != range_time:
+            self.range_cache = cache = (df_15m, range_time, OpeningRangeIndex(df_15m, range_time))
+        return cache[2]
 
-        if len(candle_930) > 0:
-            candle = candle_930.iloc[0]
-            return {
-                'high': candle['high'],
-                'low': candle['low'],
-                'date': current_date
-            }
-
-        return None
-
-    def detect_fair_value_gap(self, candle1, candle2, candle3, range_high, range_low):
-        """Detect Fair Value Gap pattern from 3 candles"""
-
-        # Check for BULLISH Fair Value Gap
-        bullish_gap_bottom = candle1['high']
-        bullish_gap_top = candle3['low']
-
-        if bullish_gap_top > bullish_gap_bottom:
-            candles_close_above = sum([
-                candle1['close'] > range_high,
-                candle2['close'] > range_high,
-                candle3['close'] > range_high
-            ])
-
-            candles_touch_range = sum([
-                candle1['low'] <= range_high,
-                candle2['low'] <= range_high,
-                candle3['low'] <= range_high
-            ])
-
-            if candles_close_above >= 1 and candles_touch_range >= 1:
-                fvg_price = (bullish_gap_bottom + bullish_gap_top) / 2
-
-                return {
-                    'type': 'BULLISH',
-                    'direction': 'LONG',
-                    'gap_top': bullish_gap_top,
-                    'gap_bottom': bullish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['low'] * 0.999,
-                    'candle1': candle1,
-                    'candle2': candle2,
-                    'candle3': candle3
-                }
-
-        # Check for BEARISH Fair Value Gap
-        bearish_gap_top = candle1['low']
-        bearish_gap_bottom = candle3['high']
-
-        if bearish_gap_top > bearish_gap_bottom:
-            candles_close_below = sum([
-                candle1['close'] < range_low,
-                candle2['close'] < range_low,
-                candle3['close'] < range_low
-            ])
-
-            candles_touch_range = sum([
-                candle1['high'] >= range_low,
-                candle2['high'] >= range_low,
-                candle3['high'] >= range_low
-            ])
-
-            if candles_close_below >= 1 and candles_touch_range >= 1:
-                fvg_price = (bearish_gap_top + bearish_gap_bottom) / 2
-
-                return {
-                    'type': 'BEARISH',
-                    'direction': 'SHORT',
-                    'gap_top': bearish_gap_top,
-                    'gap_bottom': bearish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['high'] * 1.001,
-                    'candle1': candle1,
-                    'candle2': candle2,
-                    'candle3': candle3
-                }
-
-        return None
-
-    def score_setup_quality(self, fvg, df_5m, df_1h, volume_ok, volatility_ok, trend):
+    def score_setup_quality(self, fvg, volume_ok, volatility_ok, trend, trend_1h):
         """
         Score setup quality from 1-5 stars
 
@@ -260,14 +201,30 @@ class RangeFVGBacktestV2:
         if trend == fvg['type']:  # BULLISH trend + BULLISH FVG
             score += 1
 
-        # Multiple timeframe confirmation (check 1-hour trend)
-        if df_1h is not None and len(df_1h) > 0:
-            trend_1h = self.get_trend_direction(df_1h)
-            if trend_1h == fvg['type']:
-                score += 1
+        # Multiple timeframe confirmation (trend of the last closed 1-hour candle)
+        if trend_1h == fvg['type']:
+            score += 1
 
         return score
 
+    def fvg_from_scan(self, fvg_scan, df, idx):
+        """
+        Look up the FVG completed by bar idx in a precomputed FairValueGapScan
+
+        Args:
+            fvg_scan: FairValueGapScan of the run
+            df: Candle frame the scan was built from (any timeframe)
+            idx: Bar index of candle3
+        """
+        fvg = fvg_scan.at(idx)
+
+        if fvg:
+            fvg['candle1'] = df.iloc[idx - 2]
+            fvg['candle2'] = df.iloc[idx - 1]
+            fvg['candle3'] = df.iloc[idx]
+
+        return fvg
+
     def calculate_position_size(self, entry_price, stop_loss, setup_quality):
         """
         Calculate position size based on risk and setup quality
@@ -328,55 +285,19 @@ class RangeFVGBacktestV2:
             'setup_quality': setup_quality
         }
 
-    def check_order_fill(self, candle):
-        """Check if pending order gets filled"""
-        if not self.pending_order:
-            return False
-
+    def fill_order(self, fill_time):
+        """Turn the pending order into an open position"""
         order = self.pending_order
-        filled = False
-
-        if order['direction'] == 'LONG':
-            if candle['low'] <= order['entry_price']:
-                filled = True
-        else:
-            if candle['high'] >= order['entry_price']:
-                filled = True
-
-        if filled:
-            self.position = {
-                'direction': order['direction'],
-                'entry_price': order['entry_price'],
-                'stop_loss': order['stop_loss'],
-                'take_profit': order['take_profit'],
-                'position_size': order['position_size'],
-                'entry_time': candle['timestamp'],
-                'setup_quality': order['setup_quality']
-            }
-            self.pending_order = None
-            return True
-
-        return False
-
-    def check_exit(self, candle):
-        """Check if position should exit"""
-        if not self.position:
-            return False, None, None
-
-        pos = self.position
-
-        if pos['direction'] == 'LONG':
-            if candle['low'] <= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-            if candle['high'] >= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-        else:
-            if candle['high'] >= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-            if candle['low'] <= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-
-        return False, None, None
+        self.position = {
+            'direction': order['direction'],
+            'entry_price': order['entry_price'],
+            'stop_loss': order['stop_loss'],
+            'take_profit': order['take_profit'],
+            'position_size': order['position_size'],
+            'entry_time': fill_time,
+            'setup_quality': order['setup_quality']
+        }
+        self.pending_order = None
 
     def close_position(self, exit_price, reason, exit_time):
         """Close position and record trade"""
@@ -408,7 +329,93 @@ class RangeFVGBacktestV2:
         self.trades.append(trade)
         self.position = None
 
-    def run_backtest(self, df_5m, df_15m, df_1h):
+    def start_day(self, current_date, daily_range):
+        """Backtest engine hook: a new trading day starts"""
+        if daily_range:
+            print(f"\n📅 {current_date} - Range: ${daily_range['high']:,.2f} / ${daily_range['low']:,.2f}")
+
+    def order_filled(self, candle_time):
+        """Backtest engine hook: the pending order traded"""
+        self.fill_order(candle_time)
+        stars = "⭐" * self.position['setup_quality']
+        print(f"  [{candle_time.strftime('%H:%M')}] ✅ Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f} {stars}")
+
+    def position_exited(self, exit_price, reason, candle_time):
+        """Backtest engine hook: stop loss or take profit hit"""
+        self.close_position(exit_price, reason, candle_time)
+        pnl_emoji = "💚" if self.trades[-1]['pnl'] > 0 else "❤️"
+        print(f"  [{candle_time.strftime('%H:%M')}] {pnl_emoji} Closed: {reason} | P&L: ${self.trades[-1]['pnl']:,.2f} | Balance: ${self.balance:,.2f}")
+
+    def fvg_detected(self, idx, fvg_scan, candles):
+        """Backtest engine hook: an FVG completed while flat"""
+        fvg = self.fvg_from_scan(fvg_scan, candles.df, idx)
+        candle = candles.df.iloc[idx]
+
+        # Check all filters
+        trend_5m = self.get_trend_direction_at(candle)
+        volatility_ok = self.check_volatility_at(candle)
+        volume_ok = self.check_volume_at(fvg['candle2'], candle)  # Check middle candle volume
+
+        # Score setup quality
+        setup_quality = self.score_setup_quality(
+            fvg, volume_ok, volatility_ok, trend_5m, self.trend_1h[idx]
+        )
+
+        stars = "⭐" * setup_quality
+
+        # Only trade if quality >= 3 stars
+        if setup_quality >= self.min_quality_stars:
+            # Check trend alignment
+            if trend_5m == fvg['type'] or (self.allow_neutral_trend and trend_5m == 'NEUTRAL'):
+                self.create_order(fvg, candle['timestamp'], setup_quality)
+                if self.pending_order:
+                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] 🎯 FVG: {fvg['direction']} @ ${self.pending_order['entry_price']:,.2f} {stars}")
+            else:
+                self.skipped_setups.append({
+                    'time': candle['timestamp'],
+                    'reason': f'Trend mismatch ({trend_5m} vs {fvg["type"]})',
+                    'quality': setup_quality
+                })
+                print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Trend mismatch {stars}")
+        else:
+            self.skipped_setups.append({
+                'time': candle['timestamp'],
+                'reason': f'Low quality ({setup_quality} stars)',
+                'quality': setup_quality
+            })
+            print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Low quality {stars}")
+
+    def prepare_run(self, df_5m, df_15m, df_1h, range_index=None):
+        """
+        Precompute everything a run needs (also used by ThresholdSweep)
+
+        Returns:
+            RangeSessionEngine: Ready to run over df_5m with indicator columns
+        """
+        # Precompute sessions, daily ranges and every FVG of the series in one pass
+        day_keys, in_session = self.calendar.session_arrays(df_5m['timestamp'])
+        if range_index is None:
+            range_index = self.opening_range_index(df_15m)
+        daily_ranges = {day: range_index.get(day) for day in pd.unique(day_keys)}
+        range_high, range_low = daily_range_arrays(day_keys, daily_ranges)
+        fvg_scan = FairValueGapScan(df_5m['high'], df_5m['low'], df_5m['close'], range_high, range_low,
+                                    stop_buffer=self.stop_buffer)
+
+        # EMA / ATR / volume columns for every FVG bar (session = the live bot's values)
+        df_5m = add_indicator_columns(
+            df_5m, ema_period=self.ema_period, atr_period=self.atr_period,
+            mode=self.indicator_mode, rows=fvg_scan.signal,
+            session_starts=self.calendar.session_starts(df_5m['timestamp'], day_keys)
+        )
+
+        # 1h trend of the last fully closed 1h candle at every 5m candle
+        alignment = TimeframeAlignment(df_5m, '5m', {'15m': df_15m, '1h': df_1h})
+        self.trend_1h = alignment.broadcast('1h', self.trend_by_candle(df_1h), fill='NEUTRAL')
+        self.skipped_setups = []
+
+        return RangeSessionEngine(self, CandleArrays(df_5m), day_keys, in_session, daily_ranges, fvg_scan)
+
+    def run_backtest(self, df_5m, df_15m, df_1h, range_index=None, workers=None, report=True):
         """
         Run enhanced backtest with all filters
 
@@ -416,6 +423,10 @@ class RangeFVGBacktestV2:
             df_5m: 5-minute candles
             df_15m: 15-minute candles
             df_1h: 1-hour candles (for trend confirmation)
+            range_index: Optional prebuilt OpeningRangeIndex of df_15m
+            workers: Run the two-phase sharded engine on this many processes
+                     (see RangeSessionEngine.run_sharded)
+            report: Print and save the results (off for parameter sweeps)
         """
         print(f"\n{'='*60}")
         print(f"🔬 ENHANCED BACKTEST v2.0")
@@ -423,111 +434,14 @@ class RangeFVGBacktestV2:
         print(f"Enhancements: Volume + Trend + Volatility + MTF")
         print(f"{'='*60}\n")
 
-        current_date = None
-        daily_range = None
-        trades_today = 0
-        skipped_setups = []
-
-        for idx in range(3, len(df_5m)):
-            candle = df_5m.iloc[idx]
-            candle_date = candle['timestamp'].date()
-            candle_time = candle['timestamp'].time()
-
-            # New day
-            if candle_date != current_date:
-                current_date = candle_date
-                daily_range = self.mark_daily_range_from_15m(df_15m, current_date)
-                trades_today = 0
-                self.pending_order = None
-
-                if daily_range:
-                    print(f"\n📅 {current_date} - Range: ${daily_range['high']:,.2f} / ${daily_range['low']:,.2f}")
-
-            if not daily_range:
-                continue
-
-            # Only trade 9:45 AM - 12:00 PM
-            if not (candle_time >= datetime.strptime('09:45', '%H:%M').time() and
-                    candle_time <= datetime.strptime('12:00', '%H:%M').time()):
-                continue
-
-            # Check order fill
-            if self.pending_order:
-                if self.check_order_fill(candle):
-                    stars = "⭐" * self.position['setup_quality']
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] ✅ Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f} {stars}")
-
-            # Check exit
-            if self.position:
-                should_exit, exit_price, reason = self.check_exit(candle)
-                if should_exit:
-                    self.close_position(exit_price, reason, candle['timestamp'])
-                    trades_today += 1
-                    pnl_emoji = "💚" if self.trades[-1]['pnl'] > 0 else "❤️"
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] {pnl_emoji} Closed: {reason} | P&L: ${self.trades[-1]['pnl']:,.2f} | Balance: ${self.balance:,.2f}")
-
-            # Look for new setups
-            if not self.position and not self.pending_order and trades_today < 1:
-                if idx >= 2:
-                    candle1 = df_5m.iloc[idx - 2]
-                    candle2 = df_5m.iloc[idx - 1]
-                    candle3 = candle
-
-                    # Detect FVG
-                    fvg = self.detect_fair_value_gap(
-                        candle1, candle2, candle3,
-                        daily_range['high'], daily_range['low']
-                    )
-
-                    if fvg:
-                        # Get current window for analysis
-                        current_window_5m = df_5m.iloc[max(0, idx-100):idx+1]
-
-                        # Find corresponding 1h data
-                        current_time = candle['timestamp']
-                        df_1h_current = df_1h[df_1h['timestamp'] <= current_time]
-
-                        # Check all filters
-                        trend_5m = self.get_trend_direction(current_window_5m)
-                        volatility_ok = self.check_volatility(current_window_5m)
-                        volume_ok = self.check_volume(candle2, current_window_5m)  # Check middle candle volume
-
-                        # Score setup quality
-                        setup_quality = self.score_setup_quality(
-                            fvg, current_window_5m, df_1h_current,
-                            volume_ok, volatility_ok, trend_5m
-                        )
-
-                        stars = "⭐" * setup_quality
-
-                        # Only trade if quality >= 3 stars
-                        if setup_quality >= 3:
-                            # Check trend alignment
-                            if trend_5m == fvg['type'] or trend_5m == 'NEUTRAL':
-                                self.create_order(fvg, candle['timestamp'], setup_quality)
-                                if self.pending_order:
-                                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] 🎯 FVG: {fvg['direction']} @ ${self.pending_order['entry_price']:,.2f} {stars}")
-                            else:
-                                skipped_setups.append({
-                                    'time': candle['timestamp'],
-                                    'reason': f'Trend mismatch ({trend_5m} vs {fvg["type"]})',
-                                    'quality': setup_quality
-                                })
-                                print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Trend mismatch {stars}")
-                        else:
-                            skipped_setups.append({
-                                'time': candle['timestamp'],
-                                'reason': f'Low quality ({setup_quality} stars)',
-                                'quality': setup_quality
-                            })
-                            print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Low quality {stars}")
-
-        # Close remaining position
-        if self.position:
-            last_candle = df_5m.iloc[-1]
-            self.close_position(last_candle['close'], 'Backtest End', last_candle['timestamp'])
-
-        self.print_results(skipped_setups)
+        engine = self.prepare_run(df_5m, df_15m, df_1h, range_index)
+        if workers:
+            engine.run_sharded(workers, collect=('skipped_setups',))
+        else:
+            engine.run()
+
+        if report:
+            self.print_results(self.skipped_setups)
 
     def print_results(self, skipped_setups):
         """Print enhanced backtest results"""
@@ -653,15 +567,18 @@ if __name__ == "__main__":
         reward_ratio=2
     )
 
+    # Only the 5m series is downloaded; higher timeframes are aggregated from it
+    backtest.prefetch_history(symbol='BTC/USDT', timeframes=['5m'], days=7)
+
     # Fetch data
     print("\nFetching 5-minute data...")
     df_5m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='5m', days=7)
 
     print("Fetching 15-minute data...")
-    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7)
+    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7, base_timeframe='5m')
 
     print("Fetching 1-hour data...")
-    df_1h = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='1h', days=7)
+    df_1h = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='1h', days=7, base_timeframe='5m')
 
     # Run backtest
     if df_5m is not None and df_15m is not None and df_1h is not None:
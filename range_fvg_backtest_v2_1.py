@@ -16,204 +16,160 @@ Philosophy: "It's better to make $0 than lose money on bad setups"
 import ccxt
 import pandas as pd
 from datetime import datetime, timedelta
-import pytz
 import json
 import os
 
+from backtest_core import CandleArrays, OpeningRangeIndex, RangeSessionEngine, TimeframeAlignment
+from candle_aggregator import load_resampled
+from candle_downloader import CandleDownloader
+from candle_file import CandleFile
+from candle_integrity import verify_candles
+from candle_store import CandleStore
+from fvg_scanner import FairValueGapScan, daily_range_arrays
+from indicators import add_indicator_columns
+from session_calendar import SessionCalendar
+
 class RangeFVGBacktestV2_1:
     def __init__(self, initial_balance=10000, risk_per_trade=0.02, reward_ratio=2):
         """Initialize ultra-selective backtest"""
         self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.candle_store = CandleStore()
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.risk_per_trade = risk_per_trade
         self.reward_ratio = reward_ratio
+        self.stop_buffer = 0.001  # Stop 0.1% beyond candle1
+
+        # Session times (New York defaults: range 9:30-9:45, entries until 12:00)
+        self.calendar = SessionCalendar()
+        self.est = self.calendar.timezone
 
-        self.est = pytz.timezone('America/New_York')
+        # (df_15m, range start time, OpeningRangeIndex) of the last frame looked up
+        self.range_cache = None
 
         self.trades = []
         self.position = None
         self.pending_order = None
         self.daily_range = None
+        self.trend_1h = None
+        self.skipped_setups = []
 
         # STRICTER parameters for v2.1
         self.volume_multiplier = 2.0  # Increased from 1.5x to 2.0x
         self.ema_period = 50
         self.atr_period = 14
         self.min_atr_multiplier = 1.3  # Increased from 1.2x to 1.3x
+        self.trend_band = 0.01  # Price must be 1% above / below the EMA for a trend
+        self.allow_neutral_trend = False  # 5m trend must match the FVG (no NEUTRAL)
         self.min_quality_stars = 4  # Increased from 3 to 4 stars
+        self.indicator_mode = 'session'  # Same warm-up and streaming values as the live bot
 
-    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7):
-        """Fetch historical OHLCV data"""
+    def fetch_historical_data(self, symbol='BTC/USDT', timeframe='5m', days=7, base_timeframe=None):
+        """
+        Fetch historical OHLCV data (only missing ranges hit the exchange)
+
+        With base_timeframe set, the candles are aggregated locally from that
+        series instead of being downloaded separately.
+        """
         print(f"Fetching {days} days of {timeframe} data for {symbol}...")
 
         since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
-        all_candles = []
-
-        while True:
-            try:
-                candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-                if not candles:
-                    break
-                all_candles.extend(candles)
-                since = candles[-1][0] + 1
-
-                if candles[-1][0] >= self.exchange.milliseconds() - (60 * 1000):
-                    break
-
-                import time
-                time.sleep(0.5)
-
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                break
-
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        if base_timeframe and base_timeframe != timeframe:
+            df = load_resampled(self.candle_store, self.exchange, symbol, timeframe, since,
+                                base_timeframe=base_timeframe)
+        else:
+            df = self.candle_store.load(self.exchange, symbol, timeframe, since)
+            df, _ = verify_candles(self.candle_store, self.exchange, symbol, timeframe, df, since=since)
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.est)
 
         print(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
         return df
 
-    def calculate_ema(self, df, period=50):
-        """Calculate Exponential Moving Average"""
-        return df['close'].ewm(span=period, adjust=False).mean()
+    def load_candle_file(self, path, since=None, until=None):
+        """
+        Load candles from a memory-mapped binary candle file (see candle_file.py)
 
-    def calculate_atr(self, df, period=14):
-        """Calculate Average True Range"""
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
+        Price columns stay on disk until touched, so multi-year datasets load instantly.
 
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
+        Args:
+            path: Candle file directory
+            since: Start time in ms (default: first candle)
+            until: End time in ms (default: after the last candle)
+        """
+        df = CandleFile(path).to_frame(since, until, timezone=self.est)
 
-        return true_range.rolling(period).mean()
+        print(f"Loaded {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
+        return df
 
-    def get_trend_direction(self, df):
-        """Determine trend direction using EMA"""
-        if len(df) < self.ema_period:
-            return 'NEUTRAL'
+    def prefetch_history(self, symbol='BTC/USDT', timeframes=('5m', '15m', '1h'), days=7):
+        """Download the missing candles of every timeframe concurrently into the candle store"""
+        since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
+        self.candle_store.prefetch(CandleDownloader(), symbol, timeframes, since, self.exchange.milliseconds())
 
-        ema = self.calculate_ema(df, self.ema_period)
-        current_price = df.iloc[-1]['close']
-        current_ema = ema.iloc[-1]
+    def calculate_ema(self, df, period=50):
+        """Calculate Exponential Moving Average"""
+        return df['close'].ewm(span=period, adjust=False).mean()
 
+    def trend_from_ema(self, current_price, current_ema):
+        """Classify price against its EMA as 'BULLISH', 'BEARISH' or 'NEUTRAL'"""
         # STRICTER trend requirement (1% instead of 0.5%)
-        if current_price > current_ema * 1.01:  # 1% above EMA
+        if current_price > current_ema * (1 + self.trend_band):  # 1% above EMA
             return 'BULLISH'
-        elif current_price < current_ema * 0.99:  # 1% below EMA
+        elif current_price < current_ema * (1 - self.trend_band):  # 1% below EMA
             return 'BEARISH'
         else:
             return 'NEUTRAL'
 
-    def check_volatility(self, df):
-        """Check if current volatility is high enough"""
-        if len(df) < self.atr_period * 2:
-            return False
+    def trend_by_candle(self, df):
+        """
+        Trend of every candle of df from the EMA up to that candle
+
+        Returns:
+            list: 'BULLISH', 'BEARISH' or 'NEUTRAL' per candle
+        """
+        ema = self.calculate_ema(df, self.ema_period).to_numpy()
+        closes = df['close'].to_numpy()
+
+        return [
+            self.trend_from_ema(closes[i], ema[i]) if i + 1 >= self.ema_period else 'NEUTRAL'
+            for i in range(len(df))
+        ]
+
+    def get_trend_direction_at(self, row):
+        """Trend from a row carrying precomputed indicator columns"""
+        if row['window_len'] < self.ema_period:
+            return 'NEUTRAL'
+
+        return self.trend_from_ema(row['close'], row['ema'])
 
-        atr = self.calculate_atr(df, self.atr_period)
-        current_atr = atr.iloc[-1]
-        avg_atr = atr.iloc[-50:].mean()
+    def check_volatility_at(self, row):
+        """Volatility check from a row carrying precomputed indicator columns"""
+        if row['window_len'] < self.atr_period * 2:
+            return False
 
-        return current_atr > (avg_atr * self.min_atr_multiplier)
+        return row['atr'] > (row['atr_avg'] * self.min_atr_multiplier)
 
-    def check_volume(self, candle, df):
-        """Check if volume is high enough - STRICTER (2.0x)"""
-        if len(df) < 20:
+    def check_volume_at(self, candle, row):
+        """Volume check of candle against the precomputed average of row"""
+        if row['window_len'] < 20:
             return False
 
-        avg_volume = df['volume'].iloc[-20:].mean()
-        return candle['volume'] > (avg_volume * self.volume_multiplier)
+        return candle['volume'] > (row['volume_avg'] * self.volume_multiplier)
 
     def mark_daily_range_from_15m(self, df_15m, current_date):
         """Mark the daily range from 15-minute data"""
-        candle_930 = df_15m[
-            (df_15m['timestamp'].dt.date == current_date) &
-            (df_15m['timestamp'].dt.hour == 9) &
-            (df_15m['timestamp'].dt.minute == 30)
-        ]
+        return self.opening_range_index(df_15m).get(current_date)
 
-        if len(candle_930) > 0:
-            candle = candle_930.iloc[0]
-            return {
-                'high': candle['high'],
-                'low': candle['low'],
-                'date': current_date
-            }
-
-        return None
-
-    def detect_fair_value_gap(self, candle1, candle2, candle3, range_high, range_low):
-        """Detect Fair Value Gap pattern"""
-
-        # BULLISH FVG
-        bullish_gap_bottom = candle1['high']
-        bullish_gap_top = candle3['low']
-
-        if bullish_gap_top > bullish_gap_bottom:
-            candles_close_above = sum([
-                candle1['close'] > range_high,
-                candle2['close'] > range_high,
-                candle3['close'] > range_high
-            ])
-
-            candles_touch_range = sum([
-                candle1['low'] <= range_high,
-                candle2['low'] <= range_high,
-                candle3['low'] <= range_high
-            ])
-
-            if candles_close_above >= 1 and candles_touch_range >= 1:
-                fvg_price = (bullish_gap_bottom + bullish_gap_top) / 2
-
-                return {
-                    'type': 'BULLISH',
-                    'direction': 'LONG',
-                    'gap_top': bullish_gap_top,
-                    'gap_bottom': bullish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['low'] * 0.999,
-                    'candle1': candle1,
-                    'candle2': candle2,
-                    'candle3': candle3
-                }
-
-        # BEARISH FVG
-        bearish_gap_top = candle1['low']
-        bearish_gap_bottom = candle3['high']
-
-        if bearish_gap_top > bearish_gap_bottom:
-            candles_close_below = sum([
-                candle1['close'] < range_low,
-                candle2['close'] < range_low,
-                candle3['close'] < range_low
-            ])
-
-            candles_touch_range = sum([
-                candle1['high'] >= range_low,
-                candle2['high'] >= range_low,
-                candle3['high'] >= range_low
-            ])
-
-            if candles_close_below >= 1 and candles_touch_range >= 1:
-                fvg_price = (bearish_gap_top + bearish_gap_bottom) / 2
-
-                return {
-                    'type': 'BEARISH',
-                    'direction': 'SHORT',
-                    'gap_top': bearish_gap_top,
-                    'gap_bottom': bearish_gap_bottom,
-                    'fvg_price': fvg_price,
-                    'stop_loss': candle1['high'] * 1.001,
-                    'candle1': candle1,
-                    'candle2': candle2,
-                    'candle3': candle3
-                }
-
-        return None
-
-    def score_setup_quality(self, fvg, df_5m, df_1h, volume_ok, volatility_ok, trend):
+    def opening_range_index(self, df_15m):
+        """OpeningRangeIndex of df_15m, built once per frame and range start time"""
+        range_time = self.calendar.time_settings['range_start_time']
+        cache = self.range_cache
+        if cache is None or cache[0] is not df_15m or cache[1] != range_time:
+            self.range_cache = cache = (df_15m, range_time, OpeningRangeIndex(df_15m, range_time))
+        return cache[2]
+
+    def score_setup_quality(self, fvg, volume_ok, volatility_ok, trend, trend_1h):
         """Score setup quality from 1-5 stars"""
         score = 1  # Baseline
 
@@ -227,23 +183,45 @@ class RangeFVGBacktestV2_1:
         if trend == fvg['type']:
             score += 1
 
-        # 1h confirmation
-        if df_1h is not None and len(df_1h) > 0:
-            trend_1h = self.get_trend_direction(df_1h)
-            if trend_1h == fvg['type']:
-                score += 1
+        # 1h confirmation (last closed 1h candle)
+        if trend_1h == fvg['type']:
+            score += 1
 
         return score
 
+    def fvg_from_scan(self, fvg_scan, df, idx):
+        """
+        Look up the FVG completed by bar idx in a precomputed FairValueGapScan
+
+        Args:
+            fvg_scan: FairValueGapScan of the run
+            df: Candle frame the scan was built from (any timeframe)
+            idx: Bar index of candle3
+        """
+        fvg = fvg_scan.at(idx)
+
+        if fvg:
+            fvg['candle1'] = df.iloc[idx - 2]
+            fvg['candle2'] = df.iloc[idx - 1]
+            fvg['candle3'] = df.iloc[idx]
+
+        return fvg
+
     def calculate_position_size(self, entry_price, stop_loss, setup_quality):
-        """Calculate position size - only 4-5 star setups"""
-        if setup_quality < 4:  # Changed from 2 to 4
-            return 0  # Skip anything below 4 stars
+        """
+        Calculate position size - only setups of min_quality_stars or more
+
+        4-5 stars by default; 3-star setups (0.5x risk) only trade when
+        min_quality_stars is lowered to 3.
+        """
+        if setup_quality < self.min_quality_stars:
+            return 0  # Skip anything below the minimum
 
         # Adjust risk based on quality
         risk_multipliers = {
             5: 1.0,   # Full 2% risk
             4: 0.75,  # 1.5% risk
+            3: 0.5,   # 1% risk (only with min_quality_stars lowered, as in v2.0)
         }
 
         risk_multiplier = risk_multipliers.get(setup_quality, 0)
@@ -284,55 +262,19 @@ class RangeFVGBacktestV2_1:
             'setup_quality': setup_quality
         }
 
-    def check_order_fill(self, candle):
-        """Check if order is filled"""
-        if not self.pending_order:
-            return False
-
+    def fill_order(self, fill_time):
+        """Turn the pending order into an open position"""
         order = self.pending_order
-        filled = False
-
-        if order['direction'] == 'LONG':
-            if candle['low'] <= order['entry_price']:
-                filled = True
-        else:
-            if candle['high'] >= order['entry_price']:
-                filled = True
-
-        if filled:
-            self.position = {
-                'direction': order['direction'],
-                'entry_price': order['entry_price'],
-                'stop_loss': order['stop_loss'],
-                'take_profit': order['take_profit'],
-                'position_size': order['position_size'],
-                'entry_time': candle['timestamp'],
-                'setup_quality': order['setup_quality']
-            }
-            self.pending_order = None
-            return True
-
-        return False
-
-    def check_exit(self, candle):
-        """Check exit conditions"""
-        if not self.position:
-            return False, None, None
-
-        pos = self.position
-
-        if pos['direction'] == 'LONG':
-            if candle['low'] <= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-            if candle['high'] >= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-        else:
-            if candle['high'] >= pos['stop_loss']:
-                return True, pos['stop_loss'], 'Stop Loss'
-            if candle['low'] <= pos['take_profit']:
-                return True, pos['take_profit'], 'Take Profit'
-
-        return False, None, None
+        self.position = {
+            'direction': order['direction'],
+            'entry_price': order['entry_price'],
+            'stop_loss': order['stop_loss'],
+            'take_profit': order['take_profit'],
+            'position_size': order['position_size'],
+            'entry_time': fill_time,
+            'setup_quality': order['setup_quality']
+        }
+        self.pending_order = None
 
     def close_position(self, exit_price, reason, exit_time):
         """Close position"""
@@ -364,8 +306,98 @@ class RangeFVGBacktestV2_1:
         self.trades.append(trade)
         self.position = None
 
-    def run_backtest(self, df_5m, df_15m, df_1h):
-        """Run ultra-selective backtest"""
+    def start_day(self, current_date, daily_range):
+        """Backtest engine hook: a new trading day starts"""
+        if daily_range:
+            print(f"\n📅 {current_date} - Range: ${daily_range['high']:,.2f} / ${daily_range['low']:,.2f}")
+
+    def order_filled(self, candle_time):
+        """Backtest engine hook: the pending order traded"""
+        self.fill_order(candle_time)
+        stars = "⭐" * self.position['setup_quality']
+        print(f"  [{candle_time.strftime('%H:%M')}] ✅ Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f} {stars}")
+
+    def position_exited(self, exit_price, reason, candle_time):
+        """Backtest engine hook: stop loss or take profit hit"""
+        self.close_position(exit_price, reason, candle_time)
+        pnl_emoji = "💚" if self.trades[-1]['pnl'] > 0 else "❤️"
+        print(f"  [{candle_time.strftime('%H:%M')}] {pnl_emoji} Closed: {reason} | P&L: ${self.trades[-1]['pnl']:,.2f} | Balance: ${self.balance:,.2f}")
+
+    def fvg_detected(self, idx, fvg_scan, candles):
+        """Backtest engine hook: an FVG completed while flat"""
+        fvg = self.fvg_from_scan(fvg_scan, candles.df, idx)
+        candle = candles.df.iloc[idx]
+
+        trend_5m = self.get_trend_direction_at(candle)
+        volatility_ok = self.check_volatility_at(candle)
+        volume_ok = self.check_volume_at(fvg['candle2'], candle)
+
+        setup_quality = self.score_setup_quality(
+            fvg, volume_ok, volatility_ok, trend_5m, self.trend_1h[idx]
+        )
+
+        stars = "⭐" * setup_quality
+
+        # Only trade 4-5 star setups
+        if setup_quality >= self.min_quality_stars:
+            if trend_5m == fvg['type'] or (self.allow_neutral_trend and trend_5m == 'NEUTRAL'):  # Must match trend
+                self.create_order(fvg, candle['timestamp'], setup_quality)
+                if self.pending_order:
+                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] 🎯 FVG: {fvg['direction']} @ ${self.pending_order['entry_price']:,.2f} {stars} HIGH QUALITY!")
+            else:
+                self.skipped_setups.append({
+                    'time': candle['timestamp'],
+                    'reason': f'Trend mismatch ({trend_5m} vs {fvg["type"]})',
+                    'quality': setup_quality
+                })
+                print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Trend mismatch {stars}")
+        else:
+            self.skipped_setups.append({
+                'time': candle['timestamp'],
+                'reason': f'Low quality ({setup_quality} stars, need {self.min_quality_stars}+)',
+                'quality': setup_quality
+            })
+            print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Need {self.min_quality_stars}+ stars {stars}")
+
+    def prepare_run(self, df_5m, df_15m, df_1h, range_index=None):
+        """
+        Precompute everything a run needs (also used by ThresholdSweep)
+
+        Returns:
+            RangeSessionEngine: Ready to run over df_5m with indicator columns
+        """
+        # Precompute sessions, daily ranges and every FVG of the series in one pass
+        day_keys, in_session = self.calendar.session_arrays(df_5m['timestamp'])
+        if range_index is None:
+            range_index = self.opening_range_index(df_15m)
+        daily_ranges = {day: range_index.get(day) for day in pd.unique(day_keys)}
+        range_high, range_low = daily_range_arrays(day_keys, daily_ranges)
+        fvg_scan = FairValueGapScan(df_5m['high'], df_5m['low'], df_5m['close'], range_high, range_low,
+                                    stop_buffer=self.stop_buffer)
+
+        # EMA / ATR / volume columns for every FVG bar (session = the live bot's values)
+        df_5m = add_indicator_columns(
+            df_5m, ema_period=self.ema_period, atr_period=self.atr_period,
+            mode=self.indicator_mode, rows=fvg_scan.signal,
+            session_starts=self.calendar.session_starts(df_5m['timestamp'], day_keys)
+        )
+
+        # 1h trend of the last fully closed 1h candle at every 5m candle
+        alignment = TimeframeAlignment(df_5m, '5m', {'15m': df_15m, '1h': df_1h})
+        self.trend_1h = alignment.broadcast('1h', self.trend_by_candle(df_1h), fill='NEUTRAL')
+        self.skipped_setups = []
+
+        return RangeSessionEngine(self, CandleArrays(df_5m), day_keys, in_session, daily_ranges, fvg_scan)
+
+    def run_backtest(self, df_5m, df_15m, df_1h, range_index=None, workers=None, report=True):
+        """
+        Run ultra-selective backtest
+
+        Args:
+            workers: Run the two-phase sharded engine on this many processes
+                     (see RangeSessionEngine.run_sharded)
+            report: Print and save the results (off for parameter sweeps)
+        """
         print(f"\n{'='*60}")
         print(f"🔬 ULTRA-SELECTIVE BACKTEST v2.1")
         print(f"Initial Balance: ${self.initial_balance:,.2f}")
@@ -373,104 +405,14 @@ class RangeFVGBacktestV2_1:
         print(f"Volume Required: {self.volume_multiplier}x average")
         print(f"{'='*60}\n")
 
-        current_date = None
-        daily_range = None
-        trades_today = 0
-        skipped_setups = []
-
-        for idx in range(3, len(df_5m)):
-            candle = df_5m.iloc[idx]
-            candle_date = candle['timestamp'].date()
-            candle_time = candle['timestamp'].time()
-
-            # New day
-            if candle_date != current_date:
-                current_date = candle_date
-                daily_range = self.mark_daily_range_from_15m(df_15m, current_date)
-                trades_today = 0
-                self.pending_order = None
-
-                if daily_range:
-                    print(f"\n📅 {current_date} - Range: ${daily_range['high']:,.2f} / ${daily_range['low']:,.2f}")
-
-            if not daily_range:
-                continue
-
-            # Trade window
-            if not (candle_time >= datetime.strptime('09:45', '%H:%M').time() and
-                    candle_time <= datetime.strptime('12:00', '%H:%M').time()):
-                continue
-
-            # Check fill
-            if self.pending_order:
-                if self.check_order_fill(candle):
-                    stars = "⭐" * self.position['setup_quality']
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] ✅ Filled: {self.position['direction']} @ ${self.position['entry_price']:,.2f} {stars}")
-
-            # Check exit
-            if self.position:
-                should_exit, exit_price, reason = self.check_exit(candle)
-                if should_exit:
-                    self.close_position(exit_price, reason, candle['timestamp'])
-                    trades_today += 1
-                    pnl_emoji = "💚" if self.trades[-1]['pnl'] > 0 else "❤️"
-                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] {pnl_emoji} Closed: {reason} | P&L: ${self.trades[-1]['pnl']:,.2f} | Balance: ${self.balance:,.2f}")
-
-            # Look for setups
-            if not self.position and not self.pending_order and trades_today < 1:
-                if idx >= 2:
-                    candle1 = df_5m.iloc[idx - 2]
-                    candle2 = df_5m.iloc[idx - 1]
-                    candle3 = candle
-
-                    fvg = self.detect_fair_value_gap(
-                        candle1, candle2, candle3,
-                        daily_range['high'], daily_range['low']
-                    )
-
-                    if fvg:
-                        current_window_5m = df_5m.iloc[max(0, idx-100):idx+1]
-                        current_time = candle['timestamp']
-                        df_1h_current = df_1h[df_1h['timestamp'] <= current_time]
-
-                        trend_5m = self.get_trend_direction(current_window_5m)
-                        volatility_ok = self.check_volatility(current_window_5m)
-                        volume_ok = self.check_volume(candle2, current_window_5m)
-
-                        setup_quality = self.score_setup_quality(
-                            fvg, current_window_5m, df_1h_current,
-                            volume_ok, volatility_ok, trend_5m
-                        )
-
-                        stars = "⭐" * setup_quality
-
-                        # Only trade 4-5 star setups
-                        if setup_quality >= self.min_quality_stars:
-                            if trend_5m == fvg['type']:  # Must match trend
-                                self.create_order(fvg, candle['timestamp'], setup_quality)
-                                if self.pending_order:
-                                    print(f"  [{candle['timestamp'].strftime('%H:%M')}] 🎯 FVG: {fvg['direction']} @ ${self.pending_order['entry_price']:,.2f} {stars} HIGH QUALITY!")
-                            else:
-                                skipped_setups.append({
-                                    'time': candle['timestamp'],
-                                    'reason': f'Trend mismatch ({trend_5m} vs {fvg["type"]})',
-                                    'quality': setup_quality
-                                })
-                                print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Trend mismatch {stars}")
-                        else:
-                            skipped_setups.append({
-                                'time': candle['timestamp'],
-                                'reason': f'Low quality ({setup_quality} stars, need {self.min_quality_stars}+)',
-                                'quality': setup_quality
-                            })
-                            print(f"  [{candle['timestamp'].strftime('%H:%M')}] ⏭️  Skipped: Need {self.min_quality_stars}+ stars {stars}")
-
-        # Close remaining
-        if self.position:
-            last_candle = df_5m.iloc[-1]
-            self.close_position(last_candle['close'], 'Backtest End', last_candle['timestamp'])
-
-        self.print_results(skipped_setups)
+        engine = self.prepare_run(df_5m, df_15m, df_1h, range_index)
+        if workers:
+            engine.run_sharded(workers, collect=('skipped_setups',))
+        else:
+            engine.run()
+
+        if report:
+            self.print_results(self.skipped_setups)
 
     def print_results(self, skipped_setups):
         """Print results"""
@@ -584,14 +526,17 @@ if __name__ == "__main__":
         reward_ratio=2
     )
 
+    # Only the 5m series is downloaded; higher timeframes are aggregated from it
+    backtest.prefetch_history(symbol='BTC/USDT', timeframes=['5m'], days=7)
+
     print("\nFetching 5-minute data...")
     df_5m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='5m', days=7)
 
     print("Fetching 15-minute data...")
-    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7)
+    df_15m = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='15m', days=7, base_timeframe='5m')
 
     print("Fetching 1-hour data...")
-    df_1h = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='1h', days=7)
+    df_1h = backtest.fetch_historical_data(symbol='BTC/USDT', timeframe='1h', days=7, base_timeframe='5m')
 
     if df_5m is not None and df_15m is not None and df_1h is not None:
         backtest.run_backtest(df_5m, df_15m, df_1h)
@@ -10,13 +10,15 @@ Based on the mentor's trading strategy:
 """
 
 import ccxt
-import pandas as pd
 import time
 from datetime import datetime, timezone
-import pytz
 import json
 import os
 
+from bar_scheduler import BarScheduler
+from candle_buffer import LiveCandles
+from session_calendar import SessionCalendar
+
 class RangeFVGBot:
     def __init__(self, symbol='BTC/USDT', paper_trading=True, initial_balance=10000):
         """
@@ -35,8 +37,15 @@ class RangeFVGBot:
             'enableRateLimit': True,
         })
 
-        # Timezone setup (Eastern Standard Time)
-        self.est = pytz.timezone('America/New_York')
+        # Session times (Eastern Standard Time, range 9:30-9:45, entries until 12:00)
+        self.calendar = SessionCalendar()
+        self.est = self.calendar.timezone
+
+        # Wake on exchange 5m bar closes and session boundaries
+        self.scheduler = BarScheduler(self.exchange, '5m', calendar=self.calendar)
+
+        # Rolling 5m candles (delta fetches); the 15m range candles are built from them
+        self.candles = LiveCandles(self.exchange, self.symbol, '5m', ['15m'])
 
         # Range tracking
         self.daily_range = {
@@ -77,15 +86,11 @@ class RangeFVGBot:
 
     def is_market_open_time(self):
         """Check if current time is during market hours (9:30 AM - 4:00 PM EST)"""
-        current_time = self.get_est_time()
-        market_open = current_time.replace(hour=9, minute=30, second=0, microsecond=0)
-        market_close = current_time.replace(hour=16, minute=0, second=0, microsecond=0)
-        return market_open <= current_time <= market_close
+        return self.calendar.is_market_open(self.get_est_time())
 
     def should_mark_range(self):
         """Check if we should mark the daily range (after 9:45 AM EST)"""
         current_time = self.get_est_time()
-        range_mark_time = current_time.replace(hour=9, minute=45, second=0, microsecond=0)
         current_date = current_time.date()
 
         # Check if it's a new day and after 9:45 AM
@@ -93,23 +98,16 @@ class RangeFVGBot:
             self.daily_range['marked'] = False
             self.daily_range['date'] = current_date
 
-        return current_time >= range_mark_time and not self.daily_range['marked']
+        return self.calendar.is_range_closed(current_time) and not self.daily_range['marked']
 
     def can_enter_trade(self):
         """Check if we can still enter trades (before 12 PM EST)"""
-        current_time = self.get_est_time()
-        entry_cutoff = current_time.replace(hour=12, minute=0, second=0, microsecond=0)
-        return current_time < entry_cutoff
+        return self.calendar.before_entry_cutoff(self.get_est_time())
 
     def get_candles(self, timeframe='5m', limit=100):
-        """Fetch OHLCV candles from exchange"""
+        """Latest candles from the rolling buffer (after warm-up only new candles are fetched)"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            # Convert to EST
-            df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.est)
-            return df
+            return self.candles.frame(timeframe, limit, timezone=self.est)
         except Exception as e:
             print(f"❌ Error fetching candles: {e}")
             return None
@@ -129,8 +127,8 @@ class RangeFVGBot:
             for idx, row in df.iterrows():
                 candle_time = row['timestamp']
                 if (candle_time.date() == current_date and
-                    candle_time.hour == 9 and
-                    candle_time.minute == 30):
+                    candle_time.hour == self.calendar.range_start.hour and
+                    candle_time.minute == self.calendar.range_start.minute):
 
                     self.daily_range['high'] = row['high']
                     self.daily_range['low'] = row['low']
@@ -537,7 +535,12 @@ class RangeFVGBot:
         print(f"{'='*60}\n")
 
         try:
+            # One-time history of the locally built timeframes
+            self.candles.backfill()
+
             while True:
+                self.candles.next_iteration()  # Frames of the last iteration may update from here on
+
                 current_time = self.get_est_time()
 
                 # Check if we should mark the daily range
@@ -547,7 +550,7 @@ class RangeFVGBot:
                 # Only trade during market hours
                 if not self.is_market_open_time():
                     print(f"[{current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}] Market closed. Waiting...")
-                    time.sleep(300)  # Sleep 5 minutes
+                    self.scheduler.wait()  # Until the next bar close or market open
                     continue
 
                 # Fetch 5-minute candles
@@ -589,8 +592,8 @@ class RangeFVGBot:
                         print(f"\n🔍 Fair Value Gap Detected: {fvg['type']}")
                         self.create_limit_order(fvg)
 
-                # Sleep for 1 minute before next check
-                time.sleep(60)
+                # Wake on the next bar close or session boundary, at least once a minute
+                self.scheduler.wait(max_wait=60)
 
         except KeyboardInterrupt:
             print(f"\n\n🛑 Bot stopped by user")
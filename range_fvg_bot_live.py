@@ -5,14 +5,17 @@ Supports both paper trading and live trading with API keys
 """
 
 import ccxt
-import pandas as pd
 import time
 from datetime import datetime
-import pytz
 import json
 import os
 import sys
 
+from bar_scheduler import BarScheduler
+from candle_buffer import LiveCandles
+from kline_stream import KlineFeed
+from session_calendar import SessionCalendar
+
 class RangeFVGBotLive:
     def __init__(self, config_file='config_live.json'):
         """
@@ -37,8 +40,26 @@ class RangeFVGBotLive:
         # Initialize exchange
         self.exchange = self.setup_exchange(exchange_config)
 
-        # Timezone setup
-        self.timezone = pytz.timezone(time_settings['timezone'])
+        # Session calendar (timezone + range / entry / market times)
+        self.calendar = SessionCalendar(time_settings)
+        self.timezone = self.calendar.timezone
+
+        # Wake on exchange bar closes and session boundaries
+        self.scheduler = BarScheduler(self.exchange, self.strategy_params['trading_timeframe'], calendar=self.calendar)
+
+        # Market data: 'stream' (WebSocket klines, REST fallback) or 'poll' (REST only)
+        self.feed = None
+        if bot_settings.get('market_data', 'poll') == 'stream':
+            self.feed = KlineFeed(self.exchange, self.symbol, [self.strategy_params['trading_timeframe']])
+
+        # Rolling trading-timeframe candles; the range candles are built from them
+        self.candles = LiveCandles(
+            self.exchange,
+            self.symbol,
+            self.strategy_params['trading_timeframe'],
+            [self.strategy_params['range_timeframe']],
+            feed=self.feed
+        )
 
         # Range tracking
         self.daily_range = {
@@ -175,35 +196,11 @@ class RangeFVGBotLive:
 
     def is_market_open_time(self):
         """Check if current time is during market hours"""
-        current_time = self.get_current_time()
-
-        market_open_str = self.time_settings['market_open']
-        market_close_str = self.time_settings['market_close']
-
-        market_open = current_time.replace(
-            hour=int(market_open_str.split(':')[0]),
-            minute=int(market_open_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-        market_close = current_time.replace(
-            hour=int(market_close_str.split(':')[0]),
-            minute=int(market_close_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
-        return market_open <= current_time <= market_close
+        return self.calendar.is_market_open(self.get_current_time())
 
     def should_mark_range(self):
         """Check if we should mark the daily range"""
         current_time = self.get_current_time()
-
-        range_end_str = self.time_settings['range_end_time']
-        range_mark_time = current_time.replace(
-            hour=int(range_end_str.split(':')[0]),
-            minute=int(range_end_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
         current_date = current_time.date()
 
         if self.daily_range['date'] != current_date:
@@ -212,21 +209,12 @@ class RangeFVGBotLive:
             self.daily_trades = 0  # Reset daily trade count
             self.daily_loss = 0    # Reset daily loss
 
-        return current_time >= range_mark_time and not self.daily_range['marked']
+        return self.calendar.is_range_closed(current_time) and not self.daily_range['marked']
 
     def can_enter_trade(self):
         """Check if we can still enter trades"""
-        current_time = self.get_current_time()
-
-        entry_cutoff_str = self.time_settings['entry_cutoff_time']
-        entry_cutoff = current_time.replace(
-            hour=int(entry_cutoff_str.split(':')[0]),
-            minute=int(entry_cutoff_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
         # Check time
-        time_ok = current_time < entry_cutoff
+        time_ok = self.calendar.before_entry_cutoff(self.get_current_time())
 
         # Check daily trade limit
         trades_ok = self.daily_trades < self.risk_mgmt['max_daily_trades']
@@ -237,17 +225,18 @@ class RangeFVGBotLive:
         return time_ok and trades_ok and loss_ok
 
     def get_candles(self, timeframe='5m', limit=100):
-        """Fetch OHLCV candles from exchange"""
+        """Latest candles from the rolling buffer (after warm-up only new candles are fetched)"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.timezone)
-            return df
+            return self.candles.frame(timeframe, limit, timezone=self.timezone)
         except Exception as e:
             print(f"❌ Error fetching candles: {e}")
             return None
 
+    def wait_for_candle(self, max_wait=60):
+        """Wait for the next bar close or session boundary (at most max_wait seconds)"""
+        wait_fn = self.feed.wait_for_close if self.feed else None
+        return self.scheduler.wait(wait_fn, max_wait=max_wait)
+
     def mark_daily_range(self):
         """Mark the high and low of the opening range candle"""
         try:
@@ -260,15 +249,13 @@ class RangeFVGBotLive:
             current_time = self.get_current_time()
             current_date = current_time.date()
 
-            range_start_str = self.time_settings['range_start_time']
-            range_hour = int(range_start_str.split(':')[0])
-            range_minute = int(range_start_str.split(':')[1])
+            range_start = self.calendar.range_start
 
             for idx, row in df.iterrows():
                 candle_time = row['timestamp']
                 if (candle_time.date() == current_date and
-                    candle_time.hour == range_hour and
-                    candle_time.minute == range_minute):
+                    candle_time.hour == range_start.hour and
+                    candle_time.minute == range_start.minute):
 
                     self.daily_range['high'] = row['high']
                     self.daily_range['low'] = row['low']
@@ -581,8 +568,16 @@ class RangeFVGBotLive:
         """Main bot loop"""
         print(f"✅ Bot started successfully\n")
 
+        if self.feed:
+            self.feed.start()
+
         try:
+            # One-time history of the locally built timeframes
+            self.candles.backfill()
+
             while True:
+                self.candles.next_iteration()  # Frames of the last iteration may update from here on
+
                 current_time = self.get_current_time()
 
                 if self.should_mark_range():
@@ -590,7 +585,7 @@ class RangeFVGBotLive:
 
                 if not self.is_market_open_time():
                     print(f"[{current_time.strftime('%Y-%m-%d %H:%M:%S')}] Market closed. Waiting...")
-                    time.sleep(300)
+                    self.wait_for_candle(max_wait=None)
                     continue
 
                 trading_tf = self.strategy_params['trading_timeframe']
@@ -629,7 +624,7 @@ class RangeFVGBotLive:
                         print(f"\n🔍 Fair Value Gap Detected: {fvg['type']}")
                         self.create_limit_order(fvg)
 
-                time.sleep(60)
+                self.wait_for_candle(max_wait=60)
 
         except KeyboardInterrupt:
             print(f"\n\n🛑 Bot stopped by user")
@@ -639,6 +634,9 @@ class RangeFVGBotLive:
             import traceback
             traceback.print_exc()
             self.save_log()
+        finally:
+            if self.feed:
+                self.feed.stop()
 
 
 if __name__ == "__main__":
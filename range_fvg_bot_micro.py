@@ -15,11 +15,16 @@ import ccxt
 import pandas as pd
 import time
 from datetime import datetime
-import pytz
 import json
 import os
 import sys
 
+from indicators import EMA, SessionIndicators
+from bar_scheduler import BarScheduler
+from candle_buffer import LiveCandles
+from kline_stream import KlineFeed
+from session_calendar import SessionCalendar
+
 class MicroCapitalBot:
     def __init__(self, config_file='config_live.json'):
         """Initialize micro-capital bot"""
@@ -39,8 +44,20 @@ class MicroCapitalBot:
         # Initialize exchange
         self.exchange = self.setup_exchange(exchange_config)
 
-        # Timezone
-        self.timezone = pytz.timezone(time_settings['timezone'])
+        # Session calendar (timezone + range / entry / market times)
+        self.calendar = SessionCalendar(time_settings)
+        self.timezone = self.calendar.timezone
+
+        # Wake on exchange bar closes and session boundaries
+        self.scheduler = BarScheduler(self.exchange, '5m', calendar=self.calendar)
+
+        # Market data: 'stream' (WebSocket klines, REST fallback) or 'poll' (REST only)
+        self.feed = None
+        if bot_settings.get('market_data', 'poll') == 'stream':
+            self.feed = KlineFeed(self.exchange, self.symbol, ['5m'])
+
+        # Rolling 5m candles; 15m (range) and 1h (trend) candles are built from them
+        self.candles = LiveCandles(self.exchange, self.symbol, '5m', ['15m', '1h'], feed=self.feed)
 
         # Range tracking
         self.daily_range = {
@@ -72,6 +89,10 @@ class MicroCapitalBot:
         self.min_atr_multiplier = 1.3
         self.min_quality_stars = 4  # Only 4-5 star setups!
 
+        # Streaming indicators, fed one closed 5m candle at a time and warmed up
+        # again at every session open (backtests: indicator_mode = 'session')
+        self.indicators = SessionIndicators(ema_period=self.ema_period, atr_period=self.atr_period)
+
         self.time_settings = time_settings
 
         print(f"\n{'='*60}")
@@ -134,35 +155,11 @@ class MicroCapitalBot:
 
     def is_market_open_time(self):
         """Check if during market hours"""
-        current_time = self.get_current_time()
-
-        market_open_str = self.time_settings['market_open']
-        market_close_str = self.time_settings['market_close']
-
-        market_open = current_time.replace(
-            hour=int(market_open_str.split(':')[0]),
-            minute=int(market_open_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-        market_close = current_time.replace(
-            hour=int(market_close_str.split(':')[0]),
-            minute=int(market_close_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
-        return market_open <= current_time <= market_close
+        return self.calendar.is_market_open(self.get_current_time())
 
     def should_mark_range(self):
         """Check if should mark range"""
         current_time = self.get_current_time()
-
-        range_end_str = self.time_settings['range_end_time']
-        range_mark_time = current_time.replace(
-            hour=int(range_end_str.split(':')[0]),
-            minute=int(range_end_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
         current_date = current_time.date()
 
         if self.daily_range['date'] != current_date:
@@ -171,86 +168,72 @@ class MicroCapitalBot:
             self.daily_trades = 0
             self.daily_loss = 0
 
-        return current_time >= range_mark_time and not self.daily_range['marked']
+        return self.calendar.is_range_closed(current_time) and not self.daily_range['marked']
 
     def can_enter_trade(self):
         """Check if can enter trades"""
-        current_time = self.get_current_time()
-
-        entry_cutoff_str = self.time_settings['entry_cutoff_time']
-        entry_cutoff = current_time.replace(
-            hour=int(entry_cutoff_str.split(':')[0]),
-            minute=int(entry_cutoff_str.split(':')[1]),
-            second=0, microsecond=0
-        )
-
-        time_ok = current_time < entry_cutoff
+        time_ok = self.calendar.before_entry_cutoff(self.get_current_time())
         trades_ok = self.daily_trades < self.risk_mgmt['max_daily_trades']
         loss_ok = abs(self.daily_loss) < self.risk_mgmt['max_daily_loss_usd']
 
         return time_ok and trades_ok and loss_ok
 
     def get_candles(self, timeframe='5m', limit=100):
-        """Fetch candles"""
+        """Latest candles from the rolling buffer (after warm-up only new candles are fetched)"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(self.timezone)
-            return df
+            return self.candles.frame(timeframe, limit, timezone=self.timezone)
         except Exception as e:
             print(f"❌ Error fetching candles: {e}")
             return None
 
-    def calculate_ema(self, df, period=50):
-        """Calculate EMA"""
-        return df['close'].ewm(span=period, adjust=False).mean()
+    def wait_for_candle(self, max_wait=60):
+        """Wait for the next bar close or session boundary (at most max_wait seconds)"""
+        wait_fn = self.feed.wait_for_close if self.feed else None
+        return self.scheduler.wait(wait_fn, max_wait=max_wait)
 
-    def calculate_atr(self, df, period=14):
-        """Calculate ATR"""
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
+    def update_indicators(self, df, timeframe_minutes=5):
+        """Feed closed candles the streaming indicators have not seen yet"""
+        session = self.get_current_time().date()
+        self.indicators.update(df, session, pd.Timedelta(minutes=timeframe_minutes))
 
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-
-        return true_range.rolling(period).mean()
+    def trend_from_ema(self, current_price, current_ema):
+        """Classify price against its EMA"""
+        if current_price > current_ema * 1.01:
+            return 'BULLISH'
+        elif current_price < current_ema * 0.99:
+            return 'BEARISH'
+        else:
+            return 'NEUTRAL'
 
     def get_trend_direction(self, df):
-        """Get trend direction"""
+        """Get trend direction of a candle frame"""
         if len(df) < self.ema_period:
             return 'NEUTRAL'
 
-        ema = self.calculate_ema(df, self.ema_period)
-        current_price = df.iloc[-1]['close']
-        current_ema = ema.iloc[-1]
+        closes = df['close'].to_numpy()
+        current_ema = EMA(self.ema_period).batch(closes)[-1]
+        return self.trend_from_ema(closes[-1], current_ema)
 
-        if current_price > current_ema * 1.01:
-            return 'BULLISH'
-        elif current_price < current_ema * 0.99:
-            return 'BEARISH'
-        else:
+    def trend_from_indicators(self, current_price, values):
+        """Get trend direction from streaming indicator values"""
+        if values['window_len'] < self.ema_period:
             return 'NEUTRAL'
 
-    def check_volatility(self, df):
-        """Check volatility"""
-        if len(df) < self.atr_period * 2:
-            return False
+        return self.trend_from_ema(current_price, values['ema'])
 
-        atr = self.calculate_atr(df, self.atr_period)
-        current_atr = atr.iloc[-1]
-        avg_atr = atr.iloc[-50:].mean()
+    def check_volatility(self, values):
+        """Check volatility from streaming indicator values"""
+        if values['window_len'] < self.atr_period * 2:
+            return False
 
-        return current_atr > (avg_atr * self.min_atr_multiplier)
+        return values['atr'] > (values['atr_avg'] * self.min_atr_multiplier)
 
-    def check_volume(self, candle, df):
-        """Check volume"""
-        if len(df) < 20:
+    def check_volume(self, candle, values):
+        """Check volume against the streaming volume average"""
+        if values['window_len'] < 20:
             return False
 
-        avg_volume = df['volume'].iloc[-20:].mean()
-        return candle['volume'] > (avg_volume * self.volume_multiplier)
+        return candle['volume'] > (values['volume_avg'] * self.volume_multiplier)
 
     def mark_daily_range(self):
         """Mark daily range"""
@@ -262,15 +245,13 @@ class MicroCapitalBot:
             current_time = self.get_current_time()
             current_date = current_time.date()
 
-            range_start_str = self.time_settings['range_start_time']
-            range_hour = int(range_start_str.split(':')[0])
-            range_minute = int(range_start_str.split(':')[1])
+            range_start = self.calendar.range_start
 
             for idx, row in df.iterrows():
                 candle_time = row['timestamp']
                 if (candle_time.date() == current_date and
-                    candle_time.hour == range_hour and
-                    candle_time.minute == range_minute):
+                    candle_time.hour == range_start.hour and
+                    candle_time.minute == range_start.minute):
 
                     self.daily_range['high'] = row['high']
                     self.daily_range['low'] = row['low']
@@ -590,8 +571,16 @@ class MicroCapitalBot:
         """Main loop"""
         print(f"✅ Bot started\n")
 
+        if self.feed:
+            self.feed.start()
+
         try:
+            # One-time history of the locally built timeframes
+            self.candles.backfill()
+
             while True:
+                self.candles.next_iteration()  # Frames of the last iteration may update from here on
+
                 current_time = self.get_current_time()
 
                 if self.should_mark_range():
@@ -599,7 +588,7 @@ class MicroCapitalBot:
 
                 if not self.is_market_open_time():
                     print(f"[{current_time.strftime('%H:%M')}] Market closed. Waiting...")
-                    time.sleep(300)
+                    self.wait_for_candle(max_wait=None)
                     continue
 
                 df_5m = self.get_candles(timeframe='5m', limit=100)
@@ -608,6 +597,8 @@ class MicroCapitalBot:
                     time.sleep(60)
                     continue
 
+                self.update_indicators(df_5m)
+
                 current_candle = df_5m.iloc[-1]
                 current_price = current_candle['close']
 
@@ -634,9 +625,10 @@ class MicroCapitalBot:
                     if fvg:
                         df_1h = self.get_candles(timeframe='1h', limit=100)
 
-                        trend_5m = self.get_trend_direction(df_5m)
-                        volatility_ok = self.check_volatility(df_5m)
-                        volume_ok = self.check_volume(fvg['candle2'], df_5m)
+                        indicator_values = self.indicators.preview(current_candle)
+                        trend_5m = self.trend_from_indicators(current_price, indicator_values)
+                        volatility_ok = self.check_volatility(indicator_values)
+                        volume_ok = self.check_volume(fvg['candle2'], indicator_values)
 
                         setup_quality = self.score_setup_quality(
                             fvg, df_5m, df_1h, volume_ok, volatility_ok, trend_5m
@@ -653,7 +645,7 @@ class MicroCapitalBot:
                         else:
                             print(f"⏭️  Skipped: Need {self.min_quality_stars}+ stars {stars}")
 
-                time.sleep(60)
+                self.wait_for_candle(max_wait=60)
 
         except KeyboardInterrupt:
             print(f"\n\n🛑 Bot stopped")
@@ -663,6 +655,9 @@ class MicroCapitalBot:
             import traceback
             traceback.print_exc()
             self.save_log()
+        finally:
+            if self.feed:
+                self.feed.stop()
 
 
 if __name__ == "__main__":
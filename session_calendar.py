@@ -0,0 +1,177 @@
+"""
+Trading Session Calendar
+Parses the `time_settings` config block once and precomputes, per local date,
+the UTC epoch boundaries of the opening range, the entry window and market
+hours. DST transitions are handled by localizing every date separately.
+
+Shared by the live bots (point-in-time checks) and the backtests
+(vectorized session masks and local date keys).
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from candle_store import timestamps_to_ms
+
+DEFAULT_TIME_SETTINGS = {
+    'timezone': 'America/New_York',
+    'range_start_time': '09:30',
+    'range_end_time': '09:45',
+    'entry_cutoff_time': '12:00',
+    'market_open': '09:30',
+    'market_close': '16:00'
+}
+
+# Boundary name -> time_settings key
+BOUNDARY_SETTINGS = {
+    'range_start': 'range_start_time',
+    'range_end': 'range_end_time',
+    'entry_cutoff': 'entry_cutoff_time',
+    'market_open': 'market_open',
+    'market_close': 'market_close'
+}
+
+
+def parse_hhmm(value):
+    """Parse an 'HH:MM' string into a datetime.time"""
+    return datetime.strptime(value, '%H:%M').time()
+
+
+class SessionCalendar:
+    def __init__(self, time_settings=None):
+        """
+        Initialize session calendar
+
+        Args:
+            time_settings: Config `time_settings` dict (missing keys use the
+                           New York defaults)
+        """
+        settings = dict(DEFAULT_TIME_SETTINGS)
+        settings.update(time_settings or {})
+
+        self.time_settings = settings
+        self.timezone = pytz.timezone(settings['timezone'])
+        self.times = {name: parse_hhmm(settings[key]) for name, key in BOUNDARY_SETTINGS.items()}
+
+        # Local date -> {boundary name: UTC epoch ms}
+        self._days = {}
+
+    @property
+    def range_start(self):
+        """Local open time of the opening range candle"""
+        return self.times['range_start']
+
+    def now(self):
+        """Current time in the session timezone"""
+        return datetime.now(self.timezone)
+
+    def boundaries(self, day):
+        """
+        UTC epoch-ms boundaries of one local date (computed once per date)
+
+        Returns:
+            dict: range_start, range_end, entry_cutoff, market_open, market_close
+        """
+        bounds = self._days.get(day)
+        if bounds is None:
+            bounds = {
+                name: int(self.timezone.localize(datetime.combine(day, local_time)).timestamp() * 1000)
+                for name, local_time in self.times.items()
+            }
+            self._days[day] = bounds
+        return bounds
+
+    def _local(self, now):
+        """Local date and epoch ms of an aware datetime (default: now)"""
+        now = now.astimezone(self.timezone) if now is not None else self.now()
+        return now.date(), int(now.timestamp() * 1000)
+
+    def is_market_open(self, now=None):
+        """market_open <= now <= market_close"""
+        day, now_ms = self._local(now)
+        bounds = self.boundaries(day)
+        return bounds['market_open'] <= now_ms <= bounds['market_close']
+
+    def is_range_closed(self, now=None):
+        """True once the opening range candle has closed (now >= range_end)"""
+        day, now_ms = self._local(now)
+        return now_ms >= self.boundaries(day)['range_end']
+
+    def before_entry_cutoff(self, now=None):
+        """True while new entries are allowed (now < entry_cutoff)"""
+        day, now_ms = self._local(now)
+        return now_ms < self.boundaries(day)['entry_cutoff']
+
+    def local_dates(self, timestamps):
+        """
+        Local session date of every timestamp
+
+        Args:
+            timestamps: Timestamp Series (tz-aware, or naive UTC)
+
+        Returns:
+            np.ndarray: datetime.date objects
+        """
+        index = pd.DatetimeIndex(timestamps)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        return index.tz_convert(self.timezone).date
+
+    def boundary_array(self, day_keys, name):
+        """Per-element UTC epoch ms of boundary `name` for an array of local dates"""
+        values = {day: self.boundaries(day)[name] for day in set(day_keys)}
+        return np.fromiter((values[day] for day in day_keys), dtype=np.int64, count=len(day_keys))
+
+    def window_mask(self, timestamps, start='range_end', end='entry_cutoff', day_keys=None):
+        """
+        Vectorized mask of timestamps inside [start, end] of their local date
+
+        Args:
+            timestamps: Candle open times
+            start, end: Boundary names (both inclusive)
+            day_keys: Precomputed local_dates(timestamps)
+
+        Returns:
+            np.ndarray: bool mask
+        """
+        if day_keys is None:
+            day_keys = self.local_dates(timestamps)
+
+        epoch_ms = timestamps_to_ms(timestamps)
+        return ((epoch_ms >= self.boundary_array(day_keys, start)) &
+                (epoch_ms <= self.boundary_array(day_keys, end)))
+
+    def session_starts(self, timestamps, day_keys=None):
+        """
+        Mask of the first market-hours candle of every local date
+        (where the live bot warms its indicators up)
+
+        Args:
+            timestamps: Candle open times
+            day_keys: Precomputed local_dates(timestamps)
+
+        Returns:
+            np.ndarray: bool mask
+        """
+        if day_keys is None:
+            day_keys = self.local_dates(timestamps)
+
+        open_mask = self.window_mask(timestamps, 'market_open', 'market_close', day_keys)
+        new_day = np.r_[True, day_keys[1:] != day_keys[:-1]]
+        # First open candle: open, and the previous candle was closed or on another date
+        previous_open = np.r_[False, open_mask[:-1]] & ~new_day
+        return open_mask & ~previous_open
+
+    def session_arrays(self, timestamps):
+        """
+        Local date keys and the backtest trading-window mask
+        (range_end <= candle open <= entry_cutoff)
+
+        Returns:
+            tuple: (day_keys, in_session)
+        """
+        day_keys = self.local_dates(timestamps)
+        return day_keys, self.window_mask(timestamps, day_keys=day_keys)
@@ -0,0 +1,218 @@
+"""
+Vectorized Swing Zone Scanner
+Computes the supply/demand levels of ScalpingBacktest.find_zones for every
+bar in one array pass.
+
+For bar idx the window is the `lookback` bars before it (df.iloc[idx-lookback:idx]).
+A swing low is a bar whose low equals the centered 3-bar rolling minimum
+inside that window, so only bars with both neighbours in the window count.
+previous_low is the second most recent swing low of the window, or the
+window's lowest low if it has fewer than two (swing highs mirror this).
+
+SwingZoneTracker keeps the same levels incrementally for the live bot, fed
+one closed candle at a time.
+"""
+
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def swing_mask(values, lows=True):
+    """Bars that are the minimum (maximum) of themselves and both neighbours"""
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(len(values), dtype=bool)
+    if len(values) < 3:
+        return mask
+
+    middle, before, after = values[1:-1], values[:-2], values[2:]
+    if lows:
+        mask[1:-1] = (middle <= before) & (middle <= after)
+    else:
+        mask[1:-1] = (middle >= before) & (middle >= after)
+    return mask
+
+
+def window_extreme(values, lookback, lows=True):
+    """
+    Min (max) of values[max(0, idx - lookback):idx] for every idx
+
+    Returns:
+        np.ndarray: NaN where the window is empty
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < 2:
+        return out
+
+    reduce = np.minimum if lows else np.maximum
+
+    # Windows still growing from the first bar
+    growing = min(lookback, n - 1)
+    out[1:growing + 1] = reduce.accumulate(values[:growing])
+
+    # Full windows of `lookback` bars
+    if n > lookback:
+        full = sliding_window_view(values[:-1], lookback)
+        out[lookback:] = full.min(axis=1) if lows else full.max(axis=1)
+
+    return out
+
+
+def previous_swing(values, lookback, lows=True):
+    """
+    Second most recent swing low (high) inside each bar's lookback window,
+    falling back to the window's lowest low (highest high)
+
+    Returns:
+        np.ndarray: One level per bar, NaN where the window has fewer than 3 bars
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    positions = np.arange(n)
+    window_start = np.maximum(positions - lookback, 0)
+
+    # Most recent swing at or before each position (-1 if none)
+    last_swing = np.maximum.accumulate(np.where(swing_mask(values, lows), positions, -1))
+
+    # Swings need both neighbours inside the window: window_start + 1 <= p <= idx - 2
+    latest = np.full(n, -1)
+    latest[2:] = last_swing[:-2]
+    second = np.where(latest >= 1, last_swing[np.maximum(latest - 1, 0)], -1)
+    has_two = second >= window_start + 1
+
+    levels = np.where(has_two, values[np.maximum(second, 0)], window_extreme(values, lookback, lows))
+    levels[positions - window_start < 3] = np.nan
+    return levels
+
+
+class SwingZoneScan:
+    def __init__(self, high, low, lookback=20):
+        """
+        Scan a whole series for the find_zones() levels
+
+        Args:
+            high, low: Per-bar price arrays
+            lookback: Bars before idx that form its window
+        """
+        self.lookback = lookback
+        self.previous_low = previous_swing(low, lookback, lows=True)
+        self.previous_high = previous_swing(high, lookback, lows=False)
+
+    def zones(self, idx):
+        """
+        Levels of bar idx, same as find_zones(df, idx)
+
+        Returns:
+            dict: previous_low / previous_high, or None if the window has fewer than 3 bars
+        """
+        if min(idx, self.lookback) < 3:
+            return None
+
+        return {
+            'previous_low': self.previous_low[idx],
+            'previous_high': self.previous_high[idx]
+        }
+
+
+class SwingZoneTracker:
+    def __init__(self, lookback=20):
+        """
+        Incremental supply/demand zones over the last `lookback` closed candles
+
+        Rolling extremes live in monotonic deques and confirmed swing points
+        in a deque of their own, so every update is amortized O(1).
+
+        Args:
+            lookback: Candles in the zone window
+        """
+        self.lookback = lookback
+        self.count = 0
+        self.last_timestamp = None
+
+        # (position, value) with values decreasing / increasing from the left
+        self.max_highs = deque()
+        self.min_lows = deque()
+
+        # Confirmed swing points (position, value), oldest first
+        self.swing_highs = deque()
+        self.swing_lows = deque()
+
+        # Last three candles, to confirm the middle one as a swing
+        self.recent = deque(maxlen=3)
+
+    @property
+    def ready(self):
+        """True once a full window of candles has been seen"""
+        return self.count >= self.lookback
+
+    def update(self, timestamp, high, low):
+        """
+        Add one closed candle
+
+        Candles at or before the last seen timestamp are ignored, so the same
+        frame can be fed repeatedly.
+
+        Returns:
+            bool: True if the candle was new
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        position = self.count
+        self.count += 1
+        self.last_timestamp = timestamp
+        window_start = position - self.lookback + 1
+
+        # Rolling extremes
+        while self.max_highs and self.max_highs[-1][1] <= high:
+            self.max_highs.pop()
+        self.max_highs.append((position, high))
+        while self.max_highs[0][0] < window_start:
+            self.max_highs.popleft()
+
+        while self.min_lows and self.min_lows[-1][1] >= low:
+            self.min_lows.pop()
+        self.min_lows.append((position, low))
+        while self.min_lows[0][0] < window_start:
+            self.min_lows.popleft()
+
+        # The previous candle is a swing once both neighbours are known
+        self.recent.append((high, low))
+        if len(self.recent) == 3:
+            (high1, low1), (high2, low2), (high3, low3) = self.recent
+            if high2 >= high1 and high2 >= high3:
+                self.swing_highs.append((position - 1, high2))
+            if low2 <= low1 and low2 <= low3:
+                self.swing_lows.append((position - 1, low2))
+
+        # Swings need their left neighbour inside the window too
+        while self.swing_highs and self.swing_highs[0][0] <= window_start:
+            self.swing_highs.popleft()
+        while self.swing_lows and self.swing_lows[0][0] <= window_start:
+            self.swing_lows.popleft()
+
+        return True
+
+    def zones(self):
+        """
+        Current zones, same as ScalpingBot.find_supply_demand_zones() on the
+        window's candles
+
+        Returns:
+            dict: {'supply', 'demand', 'previous_low', 'previous_high'} or None before the first candle
+        """
+        if not self.count:
+            return None
+
+        supply_zone = self.max_highs[0][1]
+        demand_zone = self.min_lows[0][1]
+
+        return {
+            'supply': supply_zone,
+            'demand': demand_zone,
+            'previous_low': self.swing_lows[-2][1] if len(self.swing_lows) >= 2 else demand_zone,
+            'previous_high': self.swing_highs[-2][1] if len(self.swing_highs) >= 2 else supply_zone
+        }
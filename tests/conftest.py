@@ -0,0 +1,67 @@
+"""
+Shared pytest fixtures: repository imports and generated candle frames
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_aggregator import resample_candles  # noqa: E402
+
+
+def generate_candles(days, seed, start='2024-01-01'):
+    """
+    Random-walk 5m candles with fat tails and slow volatility swings
+
+    Returns:
+        DataFrame: OHLCV rows with integer ms timestamps
+    """
+    rng = np.random.default_rng(seed)
+    n = days * 288
+    returns = rng.standard_t(3, n) * 25.0 * (1 + 0.8 * np.sin(np.arange(n) / 500))
+    close = 40000 + np.cumsum(returns)
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 3, n)
+
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp(start, tz='UTC').value // 10**6 + np.arange(n, dtype=np.int64) * 300000,
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.exponential(15, n),
+        'low': np.minimum(open_, close) - rng.exponential(15, n),
+        'close': close,
+        'volume': rng.lognormal(3, 0.8, n)
+    })
+
+
+def to_local(df, timezone='America/New_York'):
+    """Copy of df with tz-aware local timestamps, as the backtests load them"""
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True).dt.tz_convert(timezone)
+    return df
+
+
+@pytest.fixture(scope='session')
+def candles():
+    """Factory fixture: candles(days, seed=1) -> local 5m DataFrame"""
+    def make(days, seed=1):
+        return to_local(generate_candles(days, seed))
+    return make
+
+
+@pytest.fixture(scope='session')
+def candle_frames():
+    """Factory fixture: candle_frames(days, seed=1) -> local (5m, 15m, 1h) DataFrames"""
+    def make(days, seed=1):
+        base = generate_candles(days, seed)
+        return tuple(
+            to_local(df) for df in (
+                base,
+                resample_candles(base, '15m', '5m'),
+                resample_candles(base, '1h', '5m')
+            )
+        )
+    return make
@@ -0,0 +1,177 @@
+"""
+The array engine and the sweeps must reproduce the candle-by-candle backtest
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from backtest_core import SessionBars, limit_order_filled, session_spans, stop_or_target_hit
+from parameter_sweep import METRIC_COLUMNS, ExitSweep, ParameterSweep, ThresholdSweep
+from range_fvg_backtest_v2 import RangeFVGBacktestV2
+from range_fvg_backtest_v2_1 import RangeFVGBacktestV2_1
+
+BACKTESTS = [RangeFVGBacktestV2, RangeFVGBacktestV2_1]
+
+# Looser filters than the defaults, so a short dataset still trades
+LOOSE_FILTERS = {
+    'volume_multiplier': 0.8,
+    'min_atr_multiplier': 0.8,
+    'min_quality_stars': 2,
+    'allow_neutral_trend': True
+}
+
+
+def loose_backtest(backtest_class):
+    backtest = backtest_class(initial_balance=10000)
+    for name, value in LOOSE_FILTERS.items():
+        setattr(backtest, name, value)
+    return backtest
+
+
+def per_bar_loop(engine, start_idx=3):
+    """
+    The original loop: every tradable candle checks the fill, then the exit,
+    then looks for a new FVG, through the same strategy hooks
+    """
+    strategy = engine.strategy
+    candles = engine.candles
+
+    for current_date, spans in session_spans(engine.day_keys, engine.in_session, engine.daily_ranges, start_idx):
+        trades_today = 0
+        strategy.pending_order = None
+        strategy.start_day(current_date, engine.daily_ranges[current_date])
+
+        for start, end in spans:
+            for idx in range(start, end):
+                high, low = candles.high[idx], candles.low[idx]
+
+                order = strategy.pending_order
+                if order and limit_order_filled(order['direction'], order['entry_price'], high, low):
+                    strategy.order_filled(candles.time_at(idx))
+
+                pos = strategy.position
+                if pos:
+                    exit_price, reason = stop_or_target_hit(
+                        pos['direction'], pos['stop_loss'], pos['take_profit'], high, low
+                    )
+                    if reason:
+                        strategy.position_exited(exit_price, reason, candles.time_at(idx))
+                        trades_today += 1
+
+                if (not strategy.position and not strategy.pending_order and
+                        trades_today < engine.max_trades_per_day and engine.fvg_scan.signal[idx]):
+                    strategy.fvg_detected(idx, engine.fvg_scan, candles)
+
+    if strategy.position:
+        strategy.close_position(candles.close[-1], 'Backtest End', candles.time_at(-1))
+
+
+def run_engine(backtest_class, frames, how):
+    """Trades and skipped setups of one loose backtest run"""
+    backtest = loose_backtest(backtest_class)
+    engine = backtest.prepare_run(*frames)
+
+    if how == 'per_bar':
+        per_bar_loop(engine)
+    elif how == 'sequential':
+        engine.run()
+    else:
+        engine.run_sharded(workers=2, collect=('skipped_setups',))
+
+    return backtest.trades, backtest.skipped_setups, backtest.balance
+
+
+def assert_same_metrics(got, expected):
+    """Metric columns equal value for value (NaN == NaN)"""
+    assert len(got) == len(expected)
+    for column in METRIC_COLUMNS:
+        for a, b in zip(got[column], expected[column]):
+            assert a == b or (math.isnan(a) and math.isnan(b)), column
+
+
+@pytest.fixture(scope='module')
+def frames(candle_frames):
+    return candle_frames(40, seed=3)
+
+
+@pytest.mark.parametrize('backtest_class', BACKTESTS)
+def test_engine_matches_per_bar_loop(backtest_class, frames):
+    trades, skipped, balance = run_engine(backtest_class, frames, 'per_bar')
+    engine_trades, engine_skipped, engine_balance = run_engine(backtest_class, frames, 'sequential')
+
+    assert len(trades) > 5
+    assert engine_trades == trades
+    assert engine_skipped == skipped
+    assert engine_balance == balance
+
+
+@pytest.mark.parametrize('backtest_class', BACKTESTS)
+def test_sharded_run_matches_sequential(backtest_class, frames):
+    trades, skipped, balance = run_engine(backtest_class, frames, 'sequential')
+    sharded_trades, sharded_skipped, sharded_balance = run_engine(backtest_class, frames, 'sharded')
+
+    assert len(sharded_trades) == len(trades)
+    assert [setup['time'] for setup in sharded_skipped] == [setup['time'] for setup in skipped]
+    assert sharded_balance == pytest.approx(balance, rel=1e-9)
+
+    for got, expected in zip(sharded_trades, trades):
+        assert got.keys() == expected.keys()
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert got[key] == pytest.approx(value, rel=1e-9), key
+            else:
+                assert got[key] == value, key
+
+
+@pytest.mark.parametrize('window', [1, 3, 64])
+def test_first_exit_matches_bar_scan(window):
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 600))
+    high = close + rng.exponential(0.5, 600)
+    low = close - rng.exponential(0.5, 600)
+    days = [(day, [(day * 100 + 10, day * 100 + 70)]) for day in range(6)]
+    bars = SessionBars(high, low, days)
+
+    for position in range(0, len(bars), 7):
+        for direction in ('LONG', 'SHORT'):
+            entry = (bars.high[position] + bars.low[position]) / 2
+            sign = 1 if direction == 'LONG' else -1
+            stop_loss, take_profit = entry - sign * 2.0, entry + sign * 3.0
+
+            expected = None
+            for scan in range(position, len(bars)):
+                exit_price, reason = stop_or_target_hit(
+                    direction, stop_loss, take_profit, bars.high[scan], bars.low[scan]
+                )
+                if reason:
+                    expected = (scan, exit_price, reason)
+                    break
+
+            assert bars.first_exit(position, direction, stop_loss, take_profit, window=window) == expected
+
+
+@pytest.mark.parametrize('backtest_class', BACKTESTS)
+def test_threshold_sweep_matches_parameter_sweep(backtest_class, frames):
+    grid = {'volume_multiplier': [0.8, 1.5], 'trend_band': [0.0, 0.005], 'min_quality_stars': [2, 4]}
+    parameter_sweep = ParameterSweep(*frames, backtest_class)
+    sweep = ThresholdSweep(backtest_class(initial_balance=10000), *frames, parameter_sweep.range_index)
+
+    expected = parameter_sweep.run(grid, workers=1, sort_by=None)
+    assert expected['trades'].sum() > 0
+    assert_same_metrics(sweep.run(grid, sort_by=None), expected)
+
+
+@pytest.mark.parametrize('backtest_class', BACKTESTS)
+def test_exit_sweep_matches_parameter_sweep(backtest_class, frames):
+    grid = {'reward_ratio': [1.0, 2.0, 4.0], 'stop_buffer': [0.0, 0.003]}
+    parameter_sweep = ParameterSweep(*frames, backtest_class)
+    sweep = ExitSweep(loose_backtest(backtest_class), *frames, parameter_sweep.range_index)
+
+    # ParameterSweep builds its backtests from the grid, so pin the loose filters there too
+    expected = parameter_sweep.run(
+        {**{name: [value] for name, value in LOOSE_FILTERS.items()}, **grid}, workers=1, sort_by=None
+    )
+    assert expected['trades'].sum() > 0
+    assert_same_metrics(sweep.run(grid, sort_by=None), expected)
@@ -0,0 +1,39 @@
+"""
+Higher-timeframe aggregation of base candles
+"""
+
+import numpy as np
+import pandas as pd
+
+from candle_aggregator import resample_candles
+
+HOUR_MS = 3600000
+
+
+def base_candles(hours, drop=()):
+    """Flat 5m candles over `hours` hours with the given rows removed"""
+    timestamps = np.arange(0, hours * HOUR_MS, 300000)
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'open': np.arange(len(timestamps), dtype=float),
+        'high': np.arange(len(timestamps), dtype=float) + 1,
+        'low': np.arange(len(timestamps), dtype=float) - 1,
+        'close': np.arange(len(timestamps), dtype=float) + 0.5,
+        'volume': 1.0
+    })
+    return df.drop(index=list(drop)).reset_index(drop=True)
+
+
+def test_bucket_with_missing_candle_is_kept():
+    result = resample_candles(base_candles(2, drop=[5]), '1h', '5m')
+
+    assert list(result['timestamp']) == [0, HOUR_MS]
+    assert result['volume'].tolist() == [11.0, 12.0]
+    assert result['close'].iloc[0] == 11.5
+
+
+def test_forming_final_bucket_is_dropped():
+    df = base_candles(3).iloc[:-2]
+
+    assert list(resample_candles(df, '1h', '5m')['timestamp']) == [0, HOUR_MS]
+    assert len(resample_candles(df, '1h', '5m', complete_only=False)) == 3
@@ -0,0 +1,60 @@
+"""
+Live and backtest indicator values must agree candle for candle
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_COLUMNS, SESSION_WARMUP, SessionIndicators, add_indicator_columns
+from session_calendar import SessionCalendar
+
+
+def live_values(df, calendar, ema_period=50, atr_period=14):
+    """
+    Replay the micro bot's loop: at every market-hours candle it sees the
+    last 100 candles (the last one still forming) and previews the indicators
+    """
+    indicators = SessionIndicators(ema_period=ema_period, atr_period=atr_period)
+    step = pd.Timedelta(minutes=5)
+    values = {}
+
+    for idx in range(len(df)):
+        now = df['timestamp'].iloc[idx]
+        if not calendar.is_market_open(now):
+            continue
+
+        frame = df.iloc[max(0, idx - SESSION_WARMUP):idx + 1]
+        indicators.update(frame, now.date(), step)
+        values[idx] = indicators.preview(frame.iloc[-1])
+
+    return values
+
+
+def test_session_mode_matches_live_bot(candles):
+    df = candles(4)
+    calendar = SessionCalendar()
+    live = live_values(df, calendar)
+
+    rows = np.array(sorted(live))
+    backtest = add_indicator_columns(
+        df, mode='session', rows=rows,
+        session_starts=calendar.session_starts(df['timestamp'])
+    )
+
+    assert len(rows) > 200
+    for idx in rows:
+        for column in INDICATOR_COLUMNS:
+            expected = live[idx][column]
+            got = backtest[column].iloc[idx]
+            assert got == expected or (np.isnan(got) and np.isnan(expected)), (idx, column)
+
+
+def test_session_mode_restarts_every_session(candles):
+    df = candles(3)
+    calendar = SessionCalendar()
+    starts = calendar.session_starts(df['timestamp'])
+
+    backtest = add_indicator_columns(df, mode='session', session_starts=starts)
+
+    assert starts.sum() == 3
+    assert (backtest['window_len'][starts] == SESSION_WARMUP + 1).all()